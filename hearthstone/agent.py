@@ -173,6 +173,28 @@ class Agent:
         """
         pass
 
+    def batch_key(self) -> Optional[typing.Hashable]:
+        """
+        Agents returning the same key, other than None, can have their buy phase actions chosen together.
+
+        Returns: The batch key of this agent, or None if it decides alone
+
+        """
+        return None
+
+    def buy_phase_actions(self, agents: List['Agent'], players: List['Player']) -> List[Action]:
+        """
+        Chooses the buy phase actions of several agents sharing this agent's batch key at once
+
+        Args:
+            agents: The agents to choose for, each controlling the player at the same position
+            players: The players controlled by the agents. This function should not modify them.
+
+        Returns: One action per player
+
+        """
+        return [agent.buy_phase_action(player) for agent, player in zip(agents, players)]
+
     def discover_choice_action(self, player: 'Player') -> 'Card':
         """
 
@@ -192,6 +214,13 @@ class Agent:
         """
         pass
 
+    def reset(self):
+        """
+        Called before an agent that has finished a game is handed another one, e.g. by an AgentPool. Agents that keep
+        state from one game to the next clear it here, so every game is played as a newly built agent would play it.
+        """
+        pass
+
 def generate_valid_actions(player: 'Player') -> Generator[Action, None, None]:
     return (action for action in generate_all_actions(player) if action.valid(player))
 
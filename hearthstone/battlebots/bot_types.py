@@ -14,8 +14,12 @@ class PriorityFunctionBot(Agent):
             authors = ["JB", "AS", "ES", "JS", "DVP"]
         self.authors = authors
         self.priority = priority
+        self.seed = seed
         self.local_random = random.Random(seed)
 
+    def reset(self):
+        self.local_random.seed(self.seed)
+
     def discover_choice_action(self, player: 'Player') -> 'Card':
         discover_cards = player.discovered_cards
         discover_cards = sorted(discover_cards, key=lambda card: self.priority(player, card), reverse=True)
@@ -12,8 +12,12 @@ class CheapoBot(Agent):
     authors = ["Brian Kelly"]
 
     def __init__(self, seed: int):
+        self.seed = seed
         self.local_random = random.Random(seed)
 
+    def reset(self):
+        self.local_random.seed(self.seed)
+
     def rearrange_cards(self, player: 'Player') -> List['Card']:
         card_list = player.in_play.copy()
         self.local_random.shuffle(card_list)
@@ -18,8 +18,12 @@ class EarlyGameBot(Agent):
             authors = ["Jake Bumgardner", "Adam Salwen", "Ethan Saxenian"]
         self.authors = authors
         self.priority = priority
+        self.seed = seed
         self.local_random = random.Random(seed)
 
+    def reset(self):
+        self.local_random.seed(self.seed)
+
     def rearrange_cards(self, player: 'Player') -> List['Card']:
         card_list = player.in_play.copy()
         self.local_random.shuffle(card_list)
@@ -0,0 +1,198 @@
+import math
+import random
+import time
+import typing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Dict, Tuple
+
+from hearthstone.agent import Agent, Action, EndPhaseAction, generate_valid_actions, BuyAction, SummonAction, \
+    TripleRewardsAction
+from hearthstone.battlebots.ordering import rate_position
+from hearthstone.combat_cache import CombatCache
+from hearthstone.randomizer import SeededRandomizer
+
+if typing.TYPE_CHECKING:
+    from hearthstone.cards import Card
+    from hearthstone.player import Player
+    from hearthstone.tavern import Tavern
+
+
+class SearchNode:
+    """
+    A sequence of buy phase actions. The tree is open loop: draws and rerolls make the state after a sequence
+    random, so a node stands for the actions taken rather than for one state.
+    """
+    def __init__(self, action: Optional[Action] = None):
+        self.action = action
+        self.children: Dict[str, 'SearchNode'] = {}
+        self.visits = 0
+        self.total_value = 0.0
+
+    def mean_value(self) -> float:
+        return self.total_value / self.visits if self.visits else 0.0
+
+    def ucb_score(self, parent_visits: int, exploration: float) -> float:
+        return self.mean_value() + exploration * math.sqrt(math.log(parent_visits) / self.visits)
+
+
+#  Root statistics sent back by a search process: action key -> (action, visits, total value)
+RootStatistics = Dict[str, Tuple[Action, int, float]]
+
+_worker_combat_cache: Optional[CombatCache] = None
+
+
+def _init_search_worker():
+    global _worker_combat_cache
+    _worker_combat_cache = CombatCache()
+
+
+def search_root(snapshot: 'Tavern', player_name: str, seed: int, time_budget_secs: Optional[float],
+                max_iterations: Optional[int], num_trials: int, max_turn_actions: int,
+                exploration: float) -> RootStatistics:
+    """
+    Worker entry point: grows a search tree of its own on the snapshot and returns the statistics of its root.
+    """
+    bot = MCTSBot(seed, time_budget_secs, max_iterations, num_trials, max_turn_actions, exploration,
+                  _worker_combat_cache)
+    root = bot.search_tree(snapshot, player_name)
+    return {key: (node.action, node.visits, node.total_value) for key, node in root.children.items()}
+
+
+class MCTSBot(Agent):
+    """
+    Chooses buy phase actions with Monte Carlo tree search on forks of the tavern.
+
+    Each iteration replays a path down the tree on a new fork, adds one untried action, finishes the turn with
+    random buys and summons and scores the resulting board by its combat odds against the board of a sampled living
+    opponent. Forks draw from the bot's own randomizer, so the search never sees the game's upcoming draws.
+
+    The search stops after time_budget_secs or max_iterations, whichever comes first. With num_processes set, every
+    process grows its own tree for the whole time budget and its share of max_iterations, and the visits and values
+    at the roots are summed before choosing. Call shutdown() when done with such a bot.
+    """
+    authors: List[str] = []
+
+    def __init__(self, seed: int, time_budget_secs: Optional[float] = 0.5, max_iterations: Optional[int] = None,
+                 num_trials: int = 16, max_turn_actions: int = 12, exploration: float = 1.0,
+                 combat_cache: Optional[CombatCache] = None, num_processes: int = 0):
+        assert time_budget_secs is not None or max_iterations is not None, "the search needs a budget"
+        self.seed = seed
+        self.local_random = random.Random(seed)
+        self.time_budget_secs = time_budget_secs
+        self.max_iterations = max_iterations
+        self.num_trials = num_trials
+        self.max_turn_actions = max_turn_actions
+        self.exploration = exploration
+        self.combat_cache = combat_cache or CombatCache()
+        self.num_processes = num_processes
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def reset(self):
+        self.local_random.seed(self.seed)
+        self.shutdown()
+
+    def rearrange_cards(self, player: 'Player') -> List['Card']:
+        return sorted(player.in_play, key=rate_position)
+
+    def discover_choice_action(self, player: 'Player') -> 'Card':
+        return max(player.discovered_cards, key=lambda card: (card.tier, card.attack + card.health))
+
+    def buy_phase_action(self, player: 'Player') -> Action:
+        #  Iterations fork this copy rather than the game, which would make the game copy every card it draws
+        snapshot = player.tavern.fork(share_cards=False)
+        if self.num_processes:
+            children = self.search_in_processes(snapshot, player.name)
+        else:
+            children = self.search_tree(snapshot, player.name).children
+        if not children:
+            return EndPhaseAction(False)
+        #  Actions are indices into the player's cards, so those found on a fork apply to the player as well
+        return max(children.values(), key=lambda node: (node.visits, node.mean_value())).action
+
+    def search_tree(self, snapshot: 'Tavern', player_name: str) -> SearchNode:
+        root = SearchNode()
+        deadline = None if self.time_budget_secs is None else time.monotonic() + self.time_budget_secs
+        iterations = 0
+        while (self.max_iterations is None or iterations < self.max_iterations) and \
+                (deadline is None or time.monotonic() < deadline):
+            self.search(root, snapshot, player_name)
+            iterations += 1
+        return root
+
+    def search_in_processes(self, snapshot: 'Tavern', player_name: str) -> Dict[str, SearchNode]:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.num_processes, initializer=_init_search_worker)
+        max_iterations = None if self.max_iterations is None else math.ceil(self.max_iterations / self.num_processes)
+        futures = [self.executor.submit(search_root, snapshot, player_name, self.local_random.getrandbits(64),
+                                        self.time_budget_secs, max_iterations, self.num_trials,
+                                        self.max_turn_actions, self.exploration)
+                   for _ in range(self.num_processes)]
+        children: Dict[str, SearchNode] = {}
+        for future in futures:
+            for key, (action, visits, total_value) in future.result().items():
+                node = children.setdefault(key, SearchNode(action))
+                node.visits += visits
+                node.total_value += total_value
+        return children
+
+    def search(self, root: SearchNode, snapshot: 'Tavern', player_name: str):
+        tavern = snapshot.fork()
+        tavern.randomizer = SeededRandomizer(self.local_random.getrandbits(64))
+        searching_player = tavern.players[player_name]
+        node = root
+        path = [root]
+        num_actions = 0
+        turn_over = False
+        expanded = False
+        while not turn_over and not expanded and num_actions < self.max_turn_actions:
+            valid_actions = {repr(action): action for action in generate_valid_actions(searching_player)}
+            untried = [key for key in valid_actions if key not in node.children]
+            if untried:
+                key = self.local_random.choice(untried)
+                node.children[key] = SearchNode(valid_actions[key])
+                expanded = True
+            else:
+                key = max(valid_actions, key=lambda key: node.children[key].ucb_score(node.visits, self.exploration))
+            node = node.children[key]
+            path.append(node)
+            turn_over = self.apply(searching_player, valid_actions[key])
+            num_actions += 1
+
+        while not turn_over and num_actions < self.max_turn_actions:
+            action = self.local_random.choice(self.rollout_actions(searching_player))
+            turn_over = self.apply(searching_player, action)
+            num_actions += 1
+
+        value = self.evaluate(searching_player)
+        for node in path:
+            node.visits += 1
+            node.total_value += value
+
+    @staticmethod
+    def rollout_actions(player: 'Player') -> List[Action]:
+        #  Rollouts only build up the board, random sells and rerolls mostly throw good boards away
+        return [action for action in generate_valid_actions(player)
+                if type(action) in (BuyAction, SummonAction, TripleRewardsAction) or
+                (type(action) is EndPhaseAction and not action.freeze)]
+
+    def apply(self, player: 'Player', action: Action) -> bool:
+        """
+        Returns: Whether the action ended the buy phase
+        """
+        action.apply(player)
+        if player.discovered_cards:
+            player.select_discover(self.discover_choice_action(player))
+        return type(action) is EndPhaseAction
+
+    def evaluate(self, player: 'Player') -> float:
+        #  Chance of winning minus chance of losing the next fight, against one sampled opponent
+        opponents = [other for other in player.tavern.players.values() if other is not player and other.health > 0]
+        if not opponents:
+            return 0.0
+        odds = self.combat_cache.simulate_combat(player, self.local_random.choice(opponents), self.num_trials)
+        return odds.win_probability - odds.loss_probability
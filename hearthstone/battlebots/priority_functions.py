@@ -15,8 +15,7 @@ def attack_health_priority_bot(seed: int, priority_function_bot: Callable, monst
 def attack_health_tripler_priority_bot(seed: int, priority_function_bot: Callable, monster_type: str = None):
     def priority(player: 'Player', card: 'MonsterCard'):
         score = card.health + card.attack + card.tier
-        num_existing = len([existing for existing in player.hand + player.in_play if
-                            type(existing) == type(card) and not existing.golden])
+        num_existing = player.count_non_golden(type(card))
         if num_existing == 2:
             score += 50
         elif num_existing == 1:
@@ -70,8 +69,7 @@ def priority_saurolisk_buff_bot(seed: int, priority_function_bot: Callable, mons
 def priority_adaptive_tripler_bot(seed: int, priority_function_bot: Callable, monster_type: str = None):
     def priority(player: 'Player', card: 'MonsterCard'):
         score = card.health + card.attack + card.tier
-        num_existing = len([existing for existing in player.hand + player.in_play if
-                            type(existing) == type(card) and not existing.golden])
+        num_existing = player.count_non_golden(type(card))
         if num_existing == 2:
             score += 50
         elif num_existing == 1:
@@ -90,8 +88,7 @@ def priority_adaptive_tripler_bot(seed: int, priority_function_bot: Callable, mo
 def priority_health_tripler_bot(seed: int, priority_function_bot: Callable, monster_type: str = None):
     def priority(player: 'Player', card: 'MonsterCard'):
         score = card.health * 2 + card.attack + card.tier
-        num_existing = len([existing for existing in player.hand + player.in_play if
-                            type(existing) == type(card) and not existing.golden])
+        num_existing = player.count_non_golden(type(card))
         if num_existing == 2:
             score += 50
         elif num_existing == 1:
@@ -105,8 +102,7 @@ def priority_health_tripler_bot(seed: int, priority_function_bot: Callable, mons
 def priority_attack_tripler_bot(seed: int, priority_function_bot: Callable, monster_type: str = None):
     def priority(player: 'Player', card: 'MonsterCard'):
         score = card.health + card.attack * 2 + card.tier
-        num_existing = len([existing for existing in player.hand + player.in_play if
-                            type(existing) == type(card) and not existing.golden])
+        num_existing = player.count_non_golden(type(card))
         if num_existing == 2:
             score += 50
         elif num_existing == 1:
@@ -120,8 +116,7 @@ def priority_attack_tripler_bot(seed: int, priority_function_bot: Callable, mons
 def battlerattler_priority_bot(seed: int, priority_function_bot: Callable, monster_type: str = None):
     def priority(player: 'Player', card: 'MonsterCard'):
         score = card.health + card.attack + card.tier
-        num_existing = len([existing for existing in player.hand + player.in_play if
-                            type(existing) == type(card) and not existing.golden])
+        num_existing = player.count_non_golden(type(card))
         if num_existing == 2:
             score += 50
         elif num_existing == 1:
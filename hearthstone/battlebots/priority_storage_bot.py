@@ -17,8 +17,12 @@ class PriorityStorageBot(Agent):
         self.authors = authors
         self.priority = priority
         self.storage_priority = storage_priority
+        self.seed = seed
         self.local_random = random.Random(seed)
 
+    def reset(self):
+        self.local_random.seed(self.seed)
+
     def rearrange_cards(self, player: 'Player') -> List['Card']:
         card_list = player.in_play.copy()
         self.local_random.shuffle(card_list)
@@ -82,8 +86,7 @@ class PriorityStorageBot(Agent):
 def priority_st_ad_tr_bot(seed: int):
     def priority(player: 'Player', card: 'MonsterCard'):
         score = card.health + card.attack + card.tier
-        num_existing = len([existing for existing in player.hand + player.in_play if
-                            type(existing) == type(card) and not existing.golden])
+        num_existing = player.count_non_golden(type(card))
         if num_existing == 2:
             score += 50
         counts = {}
@@ -94,8 +97,7 @@ def priority_st_ad_tr_bot(seed: int):
 
     def storage_priority(player: 'Player', card: 'MonsterCard'):
         score = 0
-        num_existing = len([existing for existing in player.hand + player.in_play if
-                            type(existing) == type(card) and not existing.golden])
+        num_existing = player.count_non_golden(type(card))
         if num_existing == 2:
             score += 50
         elif num_existing == 1:
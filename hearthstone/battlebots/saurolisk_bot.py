@@ -15,8 +15,12 @@ if typing.TYPE_CHECKING:
 class SauroliskBot(Agent):
     authors = ["Jake Bumgardner"]
     def __init__(self, seed: int):
+        self.seed = seed
         self.local_random = random.Random(seed)
 
+    def reset(self):
+        self.local_random.seed(self.seed)
+
     def rearrange_cards(self, player: 'Player') -> List['Card']:
         card_list = player.in_play.copy()
         self.local_random.shuffle(card_list)
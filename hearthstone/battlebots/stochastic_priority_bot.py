@@ -20,10 +20,14 @@ class LearnedPriorityBot(Agent):
         self.priority_dict = defaultdict(lambda: 0)
         self.priority = None
         self.set_priority_function()
+        self.seed = seed
         self.local_random = random.Random(seed)
         self.rand_factor = rand_factor
         self.current_game_cards = defaultdict(lambda:0)
 
+    def reset(self):
+        self.local_random.seed(self.seed)
+
     def learn_from_game(self, place: int):
         for card, score in self.current_game_cards.items():
             self.priority_dict[card] += (3-place) * score
@@ -49,7 +53,7 @@ class LearnedPriorityBot(Agent):
 
     def adjusted_priority(self, player, card):
         score = self.priority(player, card)
-        num_existing = len([existing for existing in player.hand + player.in_play if type(existing) == type(card) and not existing.golden])
+        num_existing = player.count_non_golden(type(card))
         if num_existing == 2:
             score += 100000
         elif num_existing == 1:
@@ -13,10 +13,14 @@ class SupremacyBot(Agent):
     authors = ["Jeremy Salwen"]
 
     def __init__(self, monster_type: str, upgrade: bool, seed: int):
+        self.seed = seed
         self.local_random = random.Random(seed)
         self.monster_type = monster_type
         self.upgrade = upgrade
 
+    def reset(self):
+        self.local_random.seed(self.seed)
+
     def rearrange_cards(self, player: 'Player') -> List['Card']:
         card_list = player.in_play.copy()
         self.local_random.shuffle(card_list)
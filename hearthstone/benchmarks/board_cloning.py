@@ -0,0 +1,68 @@
+import copy
+import functools
+import timeit
+from typing import List, Type
+
+from hearthstone.benchmarks.combat_allocations import make_boards
+from hearthstone.card_factory import make_metaclass
+from hearthstone.cards import MonsterCard
+
+
+DictCardType = make_metaclass(lambda klass: None)
+
+
+class DictCard(metaclass=DictCardType):
+    """
+    Stands in for a card as it was before cards had slots: the same class depth and metaclass, with the attributes
+    kept in the instance __dict__ and copied by the generic copy protocol.
+    """
+
+
+class DictMonsterCard(DictCard):
+    pass
+
+
+@functools.lru_cache(maxsize=None)
+def dict_card_type(card_type: Type[MonsterCard]) -> Type[DictMonsterCard]:
+    return DictCardType(card_type.__name__, (DictMonsterCard,), {})
+
+
+def dict_cards(cards: List[MonsterCard]) -> List[DictMonsterCard]:
+    dict_based = []
+    for card in cards:
+        dict_card = dict_card_type(type(card))()
+        #  magnetized_cards used to be a class attribute
+        dict_card.__dict__.update({attribute: getattr(card, attribute) for attribute in card.instance_slots
+                                   if attribute != 'magnetized_cards'})
+        dict_card.bool_attribute_list = list(MonsterCard.bool_attribute_list)
+        dict_based.append(dict_card)
+    return dict_based
+
+
+def main():
+    number = 2000
+    adam, ethan = make_boards()
+    adam_dict_cards, ethan_dict_cards = dict_cards(adam.in_play), dict_cards(ethan.in_play)
+
+    def copy_dict_boards():
+        return [copy.copy(card) for card in adam_dict_cards], [copy.copy(card) for card in ethan_dict_cards]
+
+    def copy_boards():
+        return [copy.copy(card) for card in adam.in_play], [copy.copy(card) for card in ethan.in_play]
+
+    def clone_boards():
+        return [card.clone_for_combat() for card in adam.in_play], [card.clone_for_combat() for card in ethan.in_play]
+
+    #  The best of several runs, as the others mostly measure whatever else the machine was doing
+    dict_copy_time = min(timeit.repeat(copy_dict_boards, number=number, repeat=5)) / number
+    copy_time = min(timeit.repeat(copy_boards, number=number, repeat=5)) / number
+    clone_time = min(timeit.repeat(clone_boards, number=number, repeat=5)) / number
+    print(f"copy.copy of dict based cards: {dict_copy_time * 1e6:.1f} us per 7v7 board")
+    print(f"copy.copy of slotted cards: {copy_time * 1e6:.1f} us per 7v7 board")
+    print(f"clone_for_combat: {clone_time * 1e6:.1f} us per 7v7 board")
+    print(f"speedup: {dict_copy_time / clone_time:.1f}x over dict based cards, "
+          f"{copy_time / clone_time:.1f}x over slotted cards")
+
+
+if __name__ == '__main__':
+    main()
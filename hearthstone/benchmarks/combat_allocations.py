@@ -0,0 +1,108 @@
+import sys
+from typing import Tuple
+
+from hearthstone import combat
+from hearthstone.card_pool import *
+from hearthstone.combat import WarParty, resolve_combat
+from hearthstone.events import CombatPhaseContext, CardEvent
+from hearthstone.hero_pool import *
+from hearthstone.player import Player
+from hearthstone.randomizer import SeededRandomizer
+
+
+def make_boards() -> Tuple[Player, Player]:
+    adam = Player.new_player_with_hero(None, "Adam", Deathwing())
+    ethan = Player.new_player_with_hero(None, "Ethan")
+    adam.in_play = [ScavengingHyena(), KaboomBot(), SoulJuggler(), ImpGangBoss(), RatPack(), MurlocWarleader(), OldMurkeye()]
+    ethan.in_play = [SelflessHero(), BolvarFireblood(), SecurityRover(), DeflectOBot(), ReplicatingMenace(), RedWhelp(),
+                     SouthseaCaptain()]
+    return adam, ethan
+
+
+class InstanceCounter:
+    """
+    Counts the instances of a class made while active, and the bytes allocated for them, by wrapping its __init__.
+
+    Instances are freed as soon as a fight drops them, so the memory they take never shows in the current or peak
+    traced memory. The bytes of each instance and its __dict__ are added up as it is made instead.
+    """
+    def __init__(self, klass):
+        self.klass = klass
+        self.count = 0
+        self.bytes = 0
+        self.original_init = klass.__init__
+
+    def __enter__(self):
+        original_init = self.original_init
+
+        def counting_init(instance, *args, **kwargs):
+            original_init(instance, *args, **kwargs)
+            self.count += 1
+            self.bytes += sys.getsizeof(instance) + sys.getsizeof(instance.__dict__)
+
+        self.klass.__init__ = counting_init
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.klass.__init__ = self.original_init
+
+
+class PreChangeAllocations:
+    """
+    Makes fights allocate the way they did before contexts and events were reused: a new context for every attack and
+    every enemy context lookup, and a new event for every broadcast.
+    """
+    def __enter__(self):
+        self.original_start_attack = combat.start_attack
+        self.original_enemy_context = CombatPhaseContext.enemy_context
+        self.original_broadcast_card_event = CombatPhaseContext.broadcast_card_event
+        original_start_attack = self.original_start_attack
+
+        def start_attack(attacker, defender, attacking_war_party, defending_war_party, randomizer,
+                         combat_phase_context=None):
+            original_start_attack(attacker, defender, attacking_war_party, defending_war_party, randomizer)
+
+        def enemy_context(context):
+            return CombatPhaseContext(context.enemy_war_party, context.friendly_war_party, context.randomizer)
+
+        def broadcast_card_event(context, card, event):
+            context.broadcast_combat_event(CardEvent(card, event))
+
+        combat.start_attack = start_attack
+        CombatPhaseContext.enemy_context = enemy_context
+        CombatPhaseContext.broadcast_card_event = broadcast_card_event
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        combat.start_attack = self.original_start_attack
+        CombatPhaseContext.enemy_context = self.original_enemy_context
+        CombatPhaseContext.broadcast_card_event = self.original_broadcast_card_event
+
+
+def count_allocations(num_fights: int) -> Tuple[float, float, float]:
+    """
+    Returns: Contexts made, events made and KiB allocated for both, per fight
+    """
+    with InstanceCounter(CombatPhaseContext) as contexts, InstanceCounter(CardEvent) as events:
+        run_fights(num_fights)
+    return contexts.count / num_fights, events.count / num_fights, (contexts.bytes + events.bytes) / 1024 / num_fights
+
+
+def run_fights(num_fights: int):
+    adam, ethan = make_boards()
+    for seed in range(num_fights):
+        resolve_combat(WarParty(adam), WarParty(ethan), SeededRandomizer(seed))
+
+
+def main():
+    num_fights = 1000
+    with PreChangeAllocations():
+        baseline_contexts, baseline_events, baseline_kib = count_allocations(num_fights)
+    contexts, events, kib = count_allocations(num_fights)
+    print(f"contexts per fight: {baseline_contexts:.1f} before, {contexts:.1f} after")
+    print(f"events per fight: {baseline_events:.1f} before, {events:.1f} after")
+    print(f"allocated for contexts and events per fight: {baseline_kib:.1f} KiB before, {kib:.1f} KiB after")
+
+
+if __name__ == '__main__':
+    main()
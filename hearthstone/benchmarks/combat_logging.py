@@ -0,0 +1,50 @@
+import logging
+import os
+import sys
+import time
+
+from hearthstone.battlebots.random_bot import RandomBot
+from hearthstone.host import RoundRobinHost
+from hearthstone.randomizer import SeededRandomizer
+
+
+def run_games(num_games: int) -> float:
+    start = time.perf_counter()
+    for game in range(num_games):
+        host = RoundRobinHost({f"RandomBot {i}": RandomBot(game * 8 + i) for i in range(8)}, SeededRandomizer(game))
+        host.play_game()
+    return time.perf_counter() - start
+
+
+class DebugLogging:
+    """
+    Turns on debug logging for the hearthstone package while active. Records go through a formatter to
+    os.devnull, so every message is built as it would be when debugging, without printing it.
+    """
+    def __enter__(self):
+        self.logger = logging.getLogger("hearthstone")
+        self.level = self.logger.level
+        self.stream = open(os.devnull, "w")
+        self.handler = logging.StreamHandler(self.stream)
+        self.handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(logging.DEBUG)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.logger.setLevel(self.level)
+        self.logger.removeHandler(self.handler)
+        self.stream.close()
+
+
+def main(num_games: int = 10000):
+    #  Logging is left at its default WARNING level in training and ladder runs
+    off_time = run_games(num_games)
+    with DebugLogging():
+        on_time = run_games(num_games)
+    print(f"{num_games} games with debug logging off: {off_time:.1f} s ({off_time / num_games * 1e3:.1f} ms per game)")
+    print(f"{num_games} games with debug logging on: {on_time:.1f} s ({on_time / num_games * 1e3:.1f} ms per game)")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,40 @@
+import threading
+import time
+
+import torch
+
+from hearthstone.host import RoundRobinHost
+from hearthstone.randomizer import SeededRandomizer
+from hearthstone.training.pytorch.feedforward_net import HearthstoneFFNet
+from hearthstone.training.pytorch.hearthstone_state_encoder import DEFAULT_PLAYER_ENCODING, DEFAULT_CARDS_ENCODING
+from hearthstone.training.pytorch.inference_server import InferenceServer
+from hearthstone.training.pytorch.pytorch_bot import PytorchBot
+
+
+def play_games_in_threads(net, num_threads: int) -> float:
+    def play_game(seed: int):
+        host = RoundRobinHost({f"pytorch_bot_{i}": PytorchBot(net) for i in range(8)}, SeededRandomizer(seed))
+        host.play_game()
+
+    threads = [threading.Thread(target=play_game, args=(seed,)) for seed in range(num_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    num_threads = 16
+    torch.manual_seed(0)
+    net = HearthstoneFFNet(DEFAULT_PLAYER_ENCODING, DEFAULT_CARDS_ENCODING, hidden_layers=2, hidden_size=1024)
+    direct_time = play_games_in_threads(net, num_threads)
+    with InferenceServer(net, max_batch_size=num_threads) as server:
+        server_time = play_games_in_threads(server, num_threads)
+    print(f"direct forward passes: {direct_time:.2f} s for {num_threads} games")
+    print(f"inference server: {server_time:.2f} s for {num_threads} games, mean batch size {server.mean_batch_size():.1f}")
+
+
+if __name__ == '__main__':
+    main()
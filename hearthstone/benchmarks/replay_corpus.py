@@ -0,0 +1,26 @@
+import sys
+import time
+from typing import List
+
+from hearthstone.game_log import ReplayHost
+
+
+def replay_logs(paths: List[str]) -> float:
+    total_time = 0.0
+    for path in paths:
+        with open(path) as f:
+            host = ReplayHost(f)
+        start = time.perf_counter()
+        host.play_game()
+        total_time += time.perf_counter() - start
+    return total_time
+
+
+def main():
+    paths = sys.argv[1:]
+    total_time = replay_logs(paths)
+    print(f"replayed {len(paths)} games in {total_time:.2f}s ({total_time / max(len(paths), 1) * 1000:.1f} ms per game)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+import timeit
+
+import torch
+
+from hearthstone.battlebots.random_bot import RandomBot
+from hearthstone.host import RoundRobinHost
+from hearthstone.randomizer import SeededRandomizer
+from hearthstone.training.pytorch.hearthstone_state_encoder import encode_player, encode_players, \
+    DEFAULT_PLAYER_ENCODING, DEFAULT_CARDS_ENCODING
+
+
+def make_players(num_games: int):
+    players = []
+    for game in range(num_games):
+        host = RoundRobinHost({f"random_bot_{i}": RandomBot(i) for i in range(8)}, SeededRandomizer(game))
+        host.start_game()
+        for _ in range(5):
+            host.play_round()
+        players.extend(host.tavern.players.values())
+    return players
+
+
+def main():
+    number = 20
+    players = make_players(32)
+
+    def walk_feature_tree():
+        return [(DEFAULT_PLAYER_ENCODING.encode(player), DEFAULT_CARDS_ENCODING.encode(player)) for player in players]
+
+    def encode_one_by_one():
+        states = [encode_player(player) for player in players]
+        return torch.stack([state.player_tensor for state in states]), torch.stack([state.cards_tensor for state in states])
+
+    def encode_batch():
+        return encode_players(players)
+
+    tree_time = timeit.timeit(walk_feature_tree, number=number) / number
+    single_time = timeit.timeit(encode_one_by_one, number=number) / number
+    batch_time = timeit.timeit(encode_batch, number=number) / number
+    print(f"Feature.encode: {tree_time * 1e3:.1f} ms per {len(players)} players")
+    print(f"encode_player: {single_time * 1e3:.1f} ms per {len(players)} players")
+    print(f"encode_players: {batch_time * 1e3:.1f} ms per {len(players)} players")
+    print(f"speedup: {tree_time / single_time:.1f}x compiled, {tree_time / batch_time:.1f}x batched")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+import copy
+import timeit
+
+from hearthstone.battlebots.random_bot import RandomBot
+from hearthstone.cards import PrintingPress
+from hearthstone.host import RoundRobinHost
+from hearthstone.randomizer import SeededRandomizer
+from hearthstone.tavern import Tavern
+
+
+def mid_game_tavern(counted_deck: bool = False, num_rounds: int = 6) -> Tavern:
+    host = RoundRobinHost({f"RandomBot {i}": RandomBot(i) for i in range(8)}, SeededRandomizer(1))
+    if counted_deck:
+        host.tavern.deck = PrintingPress.make_counted_cards()
+    host.start_game()
+    for _ in range(num_rounds):
+        host.play_round()
+    return host.tavern
+
+
+def main():
+    number = 1000
+    tavern = mid_game_tavern()
+    counted_tavern = mid_game_tavern(counted_deck=True)
+    deepcopy_time = timeit.timeit(lambda: copy.deepcopy(tavern), number=number // 10) / (number // 10)
+    fork_time = timeit.timeit(tavern.fork, number=number) / number
+    counted_fork_time = timeit.timeit(counted_tavern.fork, number=number) / number
+    print(f"copy.deepcopy: {deepcopy_time * 1e3:.3f} ms per tavern")
+    print(f"Tavern.fork: {fork_time * 1e3:.3f} ms per tavern")
+    print(f"Tavern.fork with a counted card pool: {counted_fork_time * 1e3:.3f} ms per tavern")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import functools
+import typing
+from collections import namedtuple
+from typing import Dict, Callable, Type, Optional
+
+from hearthstone import hero
+from hearthstone.cards import PrintingPress, MonsterCard
+from hearthstone.hero import Hero, EmptyHero
+from hearthstone.player import Player
+if typing.TYPE_CHECKING:
+    from hearthstone.combat import WarParty
+
+#  Compact, hashable and picklable descriptions of the combat relevant state of a board.
+#  They carry no references to the tavern, so they are cheap to send to other processes.
+CardDescription = namedtuple('CardDescription', ('card_type', 'attack', 'health', 'golden', 'divine_shield', 'magnetic',
+                                                 'poisonous', 'taunt', 'windfury', 'cleave', 'reborn', 'deathrattles'))
+
+BoardDescription = namedtuple('BoardDescription', ('hero_type', 'hero_power_used', 'tavern_tier', 'cards'))
+
+
+#  The lookup tables below only depend on the card and hero classes, so they are built once per process.
+@functools.lru_cache(maxsize=None)
+def _card_types() -> Dict[str, Type[MonsterCard]]:
+    return {card_type.__name__: card_type for card_type in PrintingPress.cards}
+
+
+@functools.lru_cache(maxsize=None)
+def _hero_types() -> Dict[str, Type[Hero]]:
+    hero_types = {hero_type.__name__: hero_type for hero_type in hero.VALHALLA}
+    hero_types[EmptyHero.__name__] = EmptyHero
+    return hero_types
+
+
+@functools.lru_cache(maxsize=None)
+def _deathrattles() -> Dict[str, Callable]:
+    deathrattles = {}
+    for card_type in PrintingPress.cards:
+        deathrattle = vars(card_type).get('base_deathrattle')
+        if deathrattle is not None:
+            deathrattles[deathrattle.__qualname__] = deathrattle
+    return deathrattles
+
+
+def describe_card(card: MonsterCard) -> CardDescription:
+    return CardDescription(type(card).__name__, card.attack, card.health, card.golden, card.divine_shield,
+                           card.magnetic, card.poisonous, card.taunt, card.windfury, card.cleave, card.reborn,
+                           tuple(deathrattle.__qualname__ for deathrattle in card.deathrattles))
+
+
+def describe_board(player: Player) -> BoardDescription:
+    return BoardDescription(type(player.hero).__name__, player.hero.hero_power_used, player.tavern_tier,
+                            tuple(describe_card(card) for card in player.in_play))
+
+
+def describe_war_party(war_party: 'WarParty') -> BoardDescription:
+    #  Only meaningful before the fight starts, dead cards are described like live ones
+    owner = war_party.owner
+    return BoardDescription(type(owner.hero).__name__, owner.hero.hero_power_used, owner.tavern_tier,
+                            tuple(describe_card(card) for card in war_party.board))
+
+
+def build_card(description: CardDescription) -> MonsterCard:
+    card = _card_types()[description.card_type]()
+    card.attack = description.attack
+    card.health = description.health
+    card.golden = description.golden
+    card.divine_shield = description.divine_shield
+    card.magnetic = description.magnetic
+    card.poisonous = description.poisonous
+    card.taunt = description.taunt
+    card.windfury = description.windfury
+    card.cleave = description.cleave
+    card.reborn = description.reborn
+    deathrattles = _deathrattles()
+    card.deathrattles = [deathrattles[name] for name in description.deathrattles]
+    return card
+
+
+def build_player(description: BoardDescription, name: Optional[str] = None) -> Player:
+    """
+    Build a tavern-less player whose board matches the description, suitable for combat only.
+    """
+    player_hero = _hero_types()[description.hero_type]()
+    player_hero.hero_power_used = description.hero_power_used
+    player = Player.new_player_with_hero(None, name or description.hero_type, player_hero)
+    player.tavern_tier = description.tavern_tier
+    player.in_play = [build_card(card) for card in description.cards]
+    return player
@@ -6,11 +6,14 @@ from hearthstone.cards import MonsterCard, CardEvent
 from hearthstone.events import BuyPhaseContext, CombatPhaseContext, EVENTS
 from hearthstone.monster_types import MONSTER_TYPES
 
+logger = logging.getLogger(__name__)
+
 class MamaBear(MonsterCard):
     tier = 6
     monster_type = MONSTER_TYPES.BEAST
     base_attack = 5
     base_health = 5
+    handled_events = frozenset({EVENTS.SUMMON_BUY})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         if event.event is EVENTS.SUMMON_BUY and event.card.monster_type in (MONSTER_TYPES.BEAST, MONSTER_TYPES.ALL):
@@ -50,11 +53,10 @@ class FreedealingGambler(MonsterCard):
     monster_type = MONSTER_TYPES.PIRATE
     base_attack = 3
     base_health = 3
-    redeem_rate = 3
 
-    def golden_transformation(self, base_cards: List['MonsterCard']):
-        super().golden_transformation(base_cards)
-        self.redeem_rate *= 2
+    @property
+    def redeem_rate(self):
+        return 6 if self.golden else 3
 
 
 class DragonspawnLieutenant(MonsterCard):
@@ -101,6 +103,7 @@ class ScavengingHyena(MonsterCard):
     monster_type = MONSTER_TYPES.BEAST
     base_attack = 2
     base_health = 2
+    handled_events = frozenset({EVENTS.DIES})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         if event.event is EVENTS.DIES and event.card.monster_type in (MONSTER_TYPES.BEAST, MONSTER_TYPES.ALL) and event.card in context.friendly_war_party.board:
@@ -128,6 +131,7 @@ class WrathWeaver(MonsterCard):
     monster_type = None
     base_attack = 1
     base_health = 1
+    handled_events = frozenset({EVENTS.SUMMON_BUY})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         if event.event is EVENTS.SUMMON_BUY and event.card.monster_type in (MONSTER_TYPES.DEMON, MONSTER_TYPES.ALL):
@@ -165,6 +169,7 @@ class MicroMachine(MonsterCard):
     monster_type = MONSTER_TYPES.MECH
     base_attack = 1
     base_health = 2
+    handled_events = frozenset({EVENTS.BUY_START})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         if event.event is EVENTS.BUY_START:
@@ -179,6 +184,7 @@ class MurlocTidecaller(MonsterCard):
     monster_type = MONSTER_TYPES.MURLOC
     base_attack = 1
     base_health = 2
+    handled_events = frozenset({EVENTS.SUMMON_BUY, EVENTS.SUMMON_COMBAT})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         bonus = 2 if self.golden else 1
@@ -244,6 +250,7 @@ class RedWhelp(MonsterCard):
     monster_type = MONSTER_TYPES.DRAGON
     base_attack = 1
     base_health = 2
+    handled_events = frozenset({EVENTS.COMBAT_START})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         if event.event is EVENTS.COMBAT_START:
@@ -341,6 +348,7 @@ class RabidSaurolisk(MonsterCard):
     monster_type = MONSTER_TYPES.BEAST
     base_attack = 3
     base_health = 2
+    handled_events = frozenset({EVENTS.SUMMON_BUY})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         bonus = 2 if self.golden else 1
@@ -354,6 +362,7 @@ class GlyphGuardian(MonsterCard):
     monster_type = MONSTER_TYPES.DRAGON
     base_attack = 2
     base_health = 4
+    handled_events = frozenset({EVENTS.ON_ATTACK})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         if event.event is EVENTS.ON_ATTACK and event.card == self:
@@ -391,6 +400,7 @@ class MurlocWarleader(MonsterCard):
     monster_type = MONSTER_TYPES.MURLOC
     base_attack = 3
     base_health = 3
+    handled_events = frozenset({EVENTS.COMBAT_START, EVENTS.SUMMON_COMBAT})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         bonus = 2
@@ -421,6 +431,7 @@ class StewardOfTime(MonsterCard):
     monster_type = MONSTER_TYPES.DRAGON
     base_attack = 3
     base_health = 4
+    handled_events = frozenset({EVENTS.SELL})
 
     def handle_event_in_hand(self, event: CardEvent, context: BuyPhaseContext):
         bonus = 2 if self.golden else 1
@@ -455,6 +466,7 @@ class SkyPirate(MonsterCard):
     monster_type = MONSTER_TYPES.PIRATE
     base_attack = 1
     base_health = 1
+    handled_events = frozenset({EVENTS.SUMMON_COMBAT})
 
     def handle_event_powers(self, event: CardEvent, context: CombatPhaseContext):
         if event.event is EVENTS.SUMMON_COMBAT and event.card == self:
@@ -464,8 +476,8 @@ class SkyPirate(MonsterCard):
             defender = defending_war_party.get_random_monster(context.randomizer)
             if not defender:
                 return
-            logging.debug(f'{attacking_war_party.owner.name} is attacking {defending_war_party.owner.name}')
-            combat.start_attack(attacker, defender, attacking_war_party, defending_war_party, context.randomizer)
+            logger.debug('%s is attacking %s', attacking_war_party.owner.name, defending_war_party.owner.name)
+            combat.start_attack(attacker, defender, attacking_war_party, defending_war_party, context.randomizer, context)
 
 
 class DeckSwabbie(MonsterCard):
@@ -545,6 +557,7 @@ class ArcaneCannon(MonsterCard):
     base_attack = 2
     base_health = 2
     cant_attack = True
+    handled_events = frozenset({EVENTS.ON_ATTACK})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         damage = 4 if self.golden else 2
@@ -554,7 +567,7 @@ class ArcaneCannon(MonsterCard):
                 if abs(friendly_live_war_party.index(self) - friendly_live_war_party.index(event.card)) == 1:
                     target = context.randomizer.select_enemy_minion([card for card in context.enemy_war_party.board if card])
                     target.take_damage(damage, context)
-                    target.resolve_death(CombatPhaseContext(context.enemy_war_party, context.friendly_war_party, context.randomizer))
+                    target.resolve_death(context.enemy_context())
 
 
 class NathrezimOverseer(MonsterCard):
@@ -578,6 +591,7 @@ class OldMurkeye(MonsterCard):
     monster_type = MONSTER_TYPES.MURLOC
     base_attack = 2
     base_health = 4
+    handled_events = frozenset({EVENTS.COMBAT_START, EVENTS.DIES, EVENTS.SUMMON_COMBAT})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         bonus = 2 if self.golden else 1
@@ -643,6 +657,7 @@ class Goldgrubber(MonsterCard):
     monster_type = MONSTER_TYPES.PIRATE
     base_attack = 2
     base_health = 2
+    handled_events = frozenset({EVENTS.BUY_END})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         if event.event is EVENTS.BUY_END:
@@ -711,6 +726,7 @@ class CrowdFavorite(MonsterCard):
     tier = 3
     base_attack = 4
     base_health = 4
+    handled_events = frozenset({EVENTS.SUMMON_BUY})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         bonus = 2 if self.golden else 1
@@ -725,6 +741,7 @@ class DeflectOBot(MonsterCard):
     base_attack = 3
     base_health = 2
     base_divine_shield = True
+    handled_events = frozenset({EVENTS.SUMMON_COMBAT})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         bonus = 2 if self.golden else 1
@@ -769,6 +786,7 @@ class ImpGangBoss(MonsterCard):
     monster_type = MONSTER_TYPES.DEMON
     base_attack = 2
     base_health = 4
+    handled_events = frozenset({EVENTS.CARD_DAMAGED})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         if event.event is EVENTS.CARD_DAMAGED and self == event.card:
@@ -808,6 +826,7 @@ class MonstrousMacaw(MonsterCard):
     monster_type = MONSTER_TYPES.BEAST
     base_attack = 3
     base_health = 2
+    handled_events = frozenset({EVENTS.AFTER_ATTACK})
 
     def handle_event(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         if event.event is EVENTS.AFTER_ATTACK and self == event.card:
@@ -842,6 +861,7 @@ class PackLeader(MonsterCard):
     base_attack = 3
     base_health = 3
     monster_type = None
+    handled_events = frozenset({EVENTS.SUMMON_BUY, EVENTS.SUMMON_COMBAT})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         friendly_summon = event.event is EVENTS.SUMMON_BUY or (
@@ -876,6 +896,7 @@ class SaltyLooter(MonsterCard):
     base_attack = 3
     base_health = 3
     monster_type = MONSTER_TYPES.PIRATE
+    handled_events = frozenset({EVENTS.SUMMON_BUY})
 
     def handle_event_powers(self, event: CardEvent, context: BuyPhaseContext):
         if event.event is EVENTS.SUMMON_BUY and event.card.monster_type in (MONSTER_TYPES.PIRATE, MONSTER_TYPES.ALL) and event.card != self:
@@ -889,6 +910,7 @@ class SoulJuggler(MonsterCard):
     base_attack = 3
     base_health = 3
     monster_type = None
+    handled_events = frozenset({EVENTS.DIES})
 
     def handle_event_powers(self, event: CardEvent, context: CombatPhaseContext):
         if event.event is EVENTS.DIES and event.card.monster_type in (MONSTER_TYPES.DEMON, MONSTER_TYPES.ALL) and event.card in context.friendly_war_party.board:
@@ -957,6 +979,7 @@ class SecurityRover(MonsterCard):
     base_attack = 2
     base_health = 6
     monster_type = MONSTER_TYPES.MECH
+    handled_events = frozenset({EVENTS.CARD_DAMAGED})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         if event.event is EVENTS.CARD_DAMAGED and self == event.card:
@@ -999,6 +1022,7 @@ class RipsnarlCaptain(MonsterCard):
     base_attack = 3
     base_health = 4
     monster_type = MONSTER_TYPES.PIRATE
+    handled_events = frozenset({EVENTS.ON_ATTACK})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         if event.event is EVENTS.ON_ATTACK and event.card.monster_type in (MONSTER_TYPES.PIRATE, MONSTER_TYPES.ALL) and event.card in context.friendly_war_party.board and event.card != self:
@@ -1031,6 +1055,7 @@ class SouthseaCaptain(MonsterCard):
     monster_type = MONSTER_TYPES.PIRATE
     base_attack = 3
     base_health = 3
+    handled_events = frozenset({EVENTS.COMBAT_START, EVENTS.SUMMON_COMBAT})
 
     def handle_event_powers(self, event: CardEvent, context: Union[BuyPhaseContext, CombatPhaseContext]):
         bonus = 1
@@ -1065,6 +1090,7 @@ class BolvarFireblood(MonsterCard):
     base_attack = 1
     base_health = 7
     base_divine_shield = True
+    handled_events = frozenset({EVENTS.DIVINE_SHIELD_LOST})
 
     def handle_event_powers(self, event: CardEvent, context: CombatPhaseContext):
         if event.event is EVENTS.DIVINE_SHIELD_LOST and event.card in context.friendly_war_party.board:
@@ -1077,6 +1103,7 @@ class DrakonidEnforcer(MonsterCard):
     monster_type = MONSTER_TYPES.DRAGON
     base_attack = 3
     base_health = 6
+    handled_events = frozenset({EVENTS.DIVINE_SHIELD_LOST})
 
     def handle_event_powers(self, event: CardEvent, context: CombatPhaseContext):
         if event.event is EVENTS.DIVINE_SHIELD_LOST and event.card in context.friendly_war_party.board:
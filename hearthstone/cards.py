@@ -1,7 +1,7 @@
 import itertools
 from collections import defaultdict
-from typing import Set, List, Optional, Callable, Type, Union, Iterator
-from hearthstone.events import BuyPhaseContext, CombatPhaseContext, EVENTS
+from typing import Set, List, Optional, Callable, Type, Union, Iterator, FrozenSet, Tuple, Dict, Sequence
+from hearthstone.events import BuyPhaseContext, CombatPhaseContext, EVENTS, CardEvent
 from hearthstone.card_factory import make_metaclass
 
 
@@ -9,27 +9,35 @@ class PrintingPress:
     cards: Set[Type['Card']] = set()
     cards_per_tier = {1: 18, 2: 15, 3: 13, 4: 11, 5: 9, 6: 6}
 
+    @classmethod
+    def card_counts(cls) -> Dict[Type['Card'], int]:
+        #  cards is a set, sort it so the deck is in the same order in every process
+        return {card: cls.cards_per_tier[card.tier]
+                for card in sorted(cls.cards, key=lambda card_type: card_type.__name__) if not card.token}
+
     @classmethod
     def make_cards(cls) -> 'CardList':
         cardlist = []
-        for card in cls.cards:
-            if not card.token:
-                cardlist.extend([card() for _ in range(cls.cards_per_tier[card.tier])])
+        for card, count in cls.card_counts().items():
+            cardlist.extend([card() for _ in range(count)])
         return CardList(cardlist)
 
+    @classmethod
+    def make_counted_cards(cls) -> 'CountedCardList':
+        return CountedCardList(cls.card_counts())
+
     @classmethod
     def add_card(cls, card_class):
         cls.cards.add(card_class)
 
 
-class CardEvent:
-    def __init__(self, card: Optional['MonsterCard'], event: EVENTS, targets: Optional[List['MonsterCard']] = None):
-        self.card = card
-        self.event = EVENTS(event)
-        self.targets = targets
-
-
-CardType = make_metaclass(PrintingPress.add_card, ("Card", "MonsterCard"))
+class CardType(make_metaclass(PrintingPress.add_card, ("Card", "MonsterCard"))):
+    def __new__(mcs, name, bases, kwargs):
+        #  Card classes only add class level constants, so they share the slotted instance layout of their base
+        kwargs.setdefault('__slots__', ())
+        klass = super().__new__(mcs, name, bases, kwargs)
+        klass.instance_slots = tuple(slot for base in reversed(klass.__mro__) for slot in vars(base).get('__slots__', ()))
+        return klass
 
 
 class Card(metaclass=CardType):
@@ -41,11 +49,20 @@ class Card(metaclass=CardType):
     tier: int
     token = False
     tracked = False
+    __slots__ = ('state', 'tavern')
+    instance_slots: Tuple[str, ...]
 
     def __init__(self):
         self.state = None
         self.tavern = None
 
+    def __copy__(self):
+        #  Copying slot by slot is about twice as fast as the generic copy protocol for slotted classes
+        clone = object.__new__(type(self))
+        for attribute in self.instance_slots:
+            setattr(clone, attribute, getattr(self, attribute))
+        return clone
+
 
 class MonsterCard(Card):
     type_name = "monster"
@@ -65,7 +82,11 @@ class MonsterCard(Card):
     base_reborn = False
     token = False
     cant_attack = False
-    magnetized_cards = []
+    bool_attribute_list = ("divine_shield", "magnetic", "poisonous", "taunt", "windfury", "cleave", "reborn")
+    #  Events handled by handle_event_powers (or an overridden handle_event), used to index combat listeners
+    handled_events: FrozenSet[EVENTS] = frozenset()
+    __slots__ = ('health', 'attack', 'divine_shield', 'magnetic', 'poisonous', 'taunt', 'windfury', 'cleave',
+                 'deathrattles', 'reborn', 'dead', 'golden', 'battlecry', 'magnetized_cards')
 
     def __init__(self):
         super().__init__()
@@ -83,11 +104,31 @@ class MonsterCard(Card):
         self.reborn = self.base_reborn
         self.dead = False
         self.golden = False
-        self.battlecry: Optional[Callable[[CombatPhaseContext], None]] = self.base_battlecry
-        self.bool_attribute_list = [
-            "divine_shield", "magnetic", "poisonous", "taunt",
-            "windfury", "cleave", "reborn"
-        ]
+        #  Kept unbound like the deathrattles, so copies of the card run it on themselves
+        self.battlecry: Optional[Callable[['MonsterCard', List['MonsterCard'], BuyPhaseContext], None]] = \
+            None if self.base_battlecry is None else self.base_battlecry.__func__
+        self.magnetized_cards: Tuple['MonsterCard', ...] = ()
+
+    def clone_for_combat(self) -> 'MonsterCard':
+        #  A copy for a war party. Mutable state is copied so nothing done in combat leaks back to the original
+        clone = object.__new__(type(self))
+        clone.state = self.state
+        clone.tavern = self.tavern
+        clone.health = self.health
+        clone.attack = self.attack
+        clone.divine_shield = self.divine_shield
+        clone.magnetic = self.magnetic
+        clone.poisonous = self.poisonous
+        clone.taunt = self.taunt
+        clone.windfury = self.windfury
+        clone.cleave = self.cleave
+        clone.deathrattles = self.deathrattles.copy()
+        clone.reborn = self.reborn
+        clone.dead = self.dead
+        clone.golden = self.golden
+        clone.battlecry = self.battlecry
+        clone.magnetized_cards = self.magnetized_cards
+        return clone
 
     def __repr__(self):
         rep = f"{type(self).__name__} {self.attack}/{self.health} (t{self.tier})" #  TODO: add a proper enum to the monster typing
@@ -106,16 +147,15 @@ class MonsterCard(Card):
     def take_damage(self, damage: int, combat_phase_context: CombatPhaseContext):
         if self.divine_shield and not damage <= 0:
             self.divine_shield = False
-            combat_phase_context.broadcast_combat_event(CardEvent(self, EVENTS.DIVINE_SHIELD_LOST))
+            combat_phase_context.broadcast_card_event(self, EVENTS.DIVINE_SHIELD_LOST)
         else:
             self.health -= damage
-            combat_phase_context.broadcast_combat_event(CardEvent(self, EVENTS.CARD_DAMAGED))
+            combat_phase_context.broadcast_card_event(self, EVENTS.CARD_DAMAGED)
 
     def resolve_death(self, context: CombatPhaseContext):
         if self.health <= 0:
             self.dead = True
-            card_death_event = CardEvent(self, EVENTS.DIES)
-            context.broadcast_combat_event(card_death_event)
+            context.broadcast_card_event(self, EVENTS.DIES)
             if self.reborn:
                 self.resolve_reborn()
 
@@ -142,7 +182,7 @@ class MonsterCard(Card):
                     deathrattle(self, context)
             elif event.event is EVENTS.SUMMON_BUY:
                 if self.battlecry:
-                    self.battlecry(event.targets, context)
+                    self.battlecry(self, event.targets, context)
                 if event.card.tracked:
                     context.owner.counted_cards[type(event.card)] += 1
         if not self.dead:
@@ -182,50 +222,196 @@ class MonsterCard(Card):
         for attr in magnetic_card.bool_attribute_list:
             if getattr(magnetic_card, attr):
                 setattr(self, attr, True)
-        self.magnetized_cards.append(type(magnetic_card)())
+        self.magnetized_cards += (type(magnetic_card)(),)
 
     def overkill(self):
         return
 
     def dissolve(self) -> List['MonsterCard']:
         if self.token:
-            return [] + self.magnetized_cards
+            return list(self.magnetized_cards)
         elif self.golden:
-            return [type(self)()]*3 + self.magnetized_cards
+            return [type(self)() for _ in range(3)] + list(self.magnetized_cards)
         else:
-            return [type(self)()] + self.magnetized_cards
+            return [type(self)()] + list(self.magnetized_cards)
 
     def summon_minion_multiplier(self) -> int:
         return 1
 
 
+class TierView(Sequence):
+    """
+    The cards of every tier up to max_tier as one read only sequence, without copying them into a single list.
+    """
+    def __init__(self, cards_by_tier: Dict[int, List[Card]], max_tier: int):
+        self.tiers = [cards_by_tier[tier] for tier in range(max_tier + 1) if tier in cards_by_tier]
+
+    def __len__(self) -> int:
+        return sum(len(cards) for cards in self.tiers)
+
+    def __getitem__(self, index: int) -> Card:
+        if index < 0:
+            index += len(self)
+        for cards in self.tiers:
+            if index < len(cards):
+                return cards[index]
+            index -= len(cards)
+        raise IndexError("TierView index out of range")
+
+
 class CardList:
+    """
+    The pool of cards in the tavern, kept as one array per tier along with the position of every card in its array.
+    A card is removed by moving the last card of its tier into its place, so draws, returns and removals all take
+    constant time. The order of cards within a tier is therefore arbitrary.
+
+    A fork shares its cards with the pool it was forked from. Both then hand out copies of the cards removed from
+    them, so a card changed in one game is never drawn in the other. A fork made with share_cards=False copies every
+    card up front instead, which leaves the original handing out its own cards.
+    """
     def __init__(self, cards: List[Card]):
-        self.cards_by_tier = defaultdict(lambda: [])
+        self.cards_by_tier: Dict[int, List[Card]] = defaultdict(list)
+        self.positions: Dict[Card, int] = {}
+        self.shared = False
         for card in cards:
-            self.cards_by_tier[card.tier].append(card)
+            self.return_card(card)
+
+    def fork(self, share_cards: bool = True) -> 'CardList':
+        if not share_cards:
+            #  Cards are returned in the order they are held, so both pools keep the same positions
+            return CardList([card.clone_for_combat() for card in self.all_cards()])
+        forked = object.__new__(CardList)
+        forked.cards_by_tier = defaultdict(list, {tier: cards.copy() for tier, cards in self.cards_by_tier.items()})
+        forked.positions = self.positions.copy()
+        forked.shared = True
+        self.shared = True
+        return forked
 
     def draw(self, player):
-        valid_cards = []
-        for tier in range(player.tavern_tier+1):
-            valid_cards.extend(self.cards_by_tier[tier])
+        valid_cards = TierView(self.cards_by_tier, player.tavern_tier)
         assert valid_cards, "fnord"
         random_card = player.tavern.randomizer.select_draw_card(valid_cards, player.name, player.tavern.turn_count)
-        self.cards_by_tier[random_card.tier].remove(random_card)
-        return random_card
+        return self.remove_card(random_card)
 
     def return_cards(self, cards: Iterator[MonsterCard]):
         for card in cards:
             self.return_card(card)
 
     def return_card(self, card: MonsterCard):
-        self.cards_by_tier[card.tier].append(card)
-
-    def remove_card(self, card: MonsterCard):
-        self.cards_by_tier[card.tier].remove(card)
+        assert card not in self.positions, f"{card} is already in the deck"
+        tier_cards = self.cards_by_tier[card.tier]
+        self.positions[card] = len(tier_cards)
+        tier_cards.append(card)
+
+    def remove_card(self, card: MonsterCard) -> MonsterCard:
+        """
+        Returns: The card to use in place of the removed one
+        """
+        tier_cards = self.cards_by_tier[card.tier]
+        index = self.positions.pop(card)
+        last_card = tier_cards.pop()
+        if last_card is not card:
+            tier_cards[index] = last_card
+            self.positions[last_card] = index
+        return card.clone_for_combat() if self.shared else card
+
+    def cards_of_tier(self, tier: int) -> List[Card]:
+        return list(self.cards_by_tier.get(tier, ()))
 
     def all_cards(self):
         return itertools.chain.from_iterable(self.cards_by_tier.values())
 
     def __len__(self) -> int:
-        return sum(len(value) for value in self.cards_by_tier.values())
+        return len(self.positions)
+
+
+class CountedTierView(Sequence):
+    """
+    The cards of every tier up to max_tier of a CountedCardList as one read only sequence. Each access makes a new
+    card of the type at that index.
+    """
+    def __init__(self, card_list: 'CountedCardList', max_tier: int):
+        self.card_list = card_list
+        self.tiers = [tier for tier in range(max_tier + 1) if tier in card_list.card_types_by_tier]
+
+    def __len__(self) -> int:
+        return sum(self.card_list.tier_totals[tier] for tier in self.tiers)
+
+    def __getitem__(self, index: int) -> Card:
+        if index < 0:
+            index += len(self)
+        counts = self.card_list.counts
+        for tier in self.tiers:
+            if index >= self.card_list.tier_totals[tier]:
+                index -= self.card_list.tier_totals[tier]
+                continue
+            for card_type in self.card_list.card_types_by_tier[tier]:
+                if index < counts[card_type]:
+                    return card_type()
+                index -= counts[card_type]
+        raise IndexError("CountedTierView index out of range")
+
+
+class CountedCardList:
+    """
+    A pool of cards that only counts the copies left of each card type, with the interface of CardList. A card is
+    made when it is drawn or otherwise taken from the pool, and cards given back are counted and dropped, so a new
+    pool costs one count per card type rather than one object per copy.
+
+    Cards given back are always fresh copies from dissolve, so nothing is lost by dropping them.
+    """
+    def __init__(self, counts: Dict[Type[Card], int]):
+        self.card_types_by_tier: Dict[int, List[Type[Card]]] = defaultdict(list)
+        self.counts: Dict[Type[Card], int] = {}
+        self.tier_totals: Dict[int, int] = defaultdict(int)
+        for card_type, count in counts.items():
+            self._add_card_type(card_type)
+            self.counts[card_type] = count
+            self.tier_totals[card_type.tier] += count
+
+    def fork(self, share_cards: bool = True) -> 'CountedCardList':
+        #  There are no cards to share, only counts
+        forked = object.__new__(CountedCardList)
+        forked.card_types_by_tier = defaultdict(list, {tier: card_types.copy() for tier, card_types in
+                                                              self.card_types_by_tier.items()})
+        forked.counts = self.counts.copy()
+        forked.tier_totals = defaultdict(int, self.tier_totals)
+        return forked
+
+    def _add_card_type(self, card_type: Type[Card]):
+        self.card_types_by_tier[card_type.tier].append(card_type)
+        self.counts[card_type] = 0
+
+    def draw(self, player):
+        valid_cards = CountedTierView(self, player.tavern_tier)
+        assert valid_cards, "fnord"
+        random_card = player.tavern.randomizer.select_draw_card(valid_cards, player.name, player.tavern.turn_count)
+        return self.remove_card(random_card)
+
+    def return_cards(self, cards: Iterator[MonsterCard]):
+        for card in cards:
+            self.return_card(card)
+
+    def return_card(self, card: MonsterCard):
+        card_type = type(card)
+        if card_type not in self.counts:
+            self._add_card_type(card_type)
+        self.counts[card_type] += 1
+        self.tier_totals[card_type.tier] += 1
+
+    def remove_card(self, card: MonsterCard) -> MonsterCard:
+        card_type = type(card)
+        assert self.counts.get(card_type, 0) > 0, f"no {card_type.__name__} left in the deck"
+        self.counts[card_type] -= 1
+        self.tier_totals[card_type.tier] -= 1
+        return card
+
+    def cards_of_tier(self, tier: int) -> List[Card]:
+        return [card_type() for card_type in self.card_types_by_tier.get(tier, ())
+                for _ in range(self.counts[card_type])]
+
+    def all_cards(self):
+        return itertools.chain.from_iterable(self.cards_of_tier(tier) for tier in list(self.card_types_by_tier))
+
+    def __len__(self) -> int:
+        return sum(self.tier_totals.values())
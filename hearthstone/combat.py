@@ -1,9 +1,7 @@
-import copy
 import logging
 import typing
-from typing import Optional, List
+from typing import Optional, List, Dict, Sequence
 from hearthstone.events import CombatPhaseContext, EVENTS
-from hearthstone.cards import CardEvent
 if typing.TYPE_CHECKING:
     from hearthstone.player import Player
     from hearthstone.randomizer import Randomizer
@@ -17,9 +15,34 @@ class WarParty:
     #  (HalfBoard)
     def __init__(self, player: 'Player'):
         self.owner = player
-        self.board = [copy.copy(card) for card in player.in_play]
+        self.board = [card.clone_for_combat() for card in player.in_play]
         self.next_attacker_idx = 0
 
+    @property
+    def board(self) -> List['MonsterCard']:
+        return self._board
+
+    @board.setter
+    def board(self, board: List['MonsterCard']):
+        self._board = board
+        self.update_listeners()
+
+    def update_listeners(self):
+        #  Must be called whenever cards are added to the board.
+        #  Builds new lists instead of appending so broadcasts in progress keep iterating over the old board
+        listeners: Dict[EVENTS, List['MonsterCard']] = {}
+        for card in self._board:
+            events = card.handled_events
+            if card.deathrattles:
+                events = events | {EVENTS.DIES}
+            for event in events:
+                listeners.setdefault(event, []).append(card)
+        self._listeners = listeners
+
+    def listeners(self, event: EVENTS) -> Sequence['MonsterCard']:
+        #  Cards whose handle_event reacts to the event, in board order
+        return self._listeners.get(event, ())
+
     def find_next(self) -> Optional['MonsterCard']:
         #  Sets the index for the next monster who will fight from your side.
         #  Must be called after active player monster fights
@@ -56,9 +79,10 @@ class WarParty:
         if not index:
             index = len(context.friendly_war_party.board)
         context.friendly_war_party.board.insert(index, monster)
+        context.friendly_war_party.update_listeners()
         if index < context.friendly_war_party.next_attacker_idx:
             context.friendly_war_party.next_attacker_idx += 1
-        context.broadcast_combat_event(CardEvent(monster, EVENTS.SUMMON_COMBAT))
+        context.broadcast_card_event(monster, EVENTS.SUMMON_COMBAT)
 
     def get_index(self, card):
         return self.board.index(card)
@@ -71,57 +95,81 @@ def fight_boards(war_party_1: 'WarParty', war_party_2: 'WarParty', randomizer: '
     #  Currently we are not randomizing the first to fight here
     #  Expect to pass half boards into fight_boards in random order i.e. by shuffling players in combat step
     #  Half boards are copies, the originals state cannot be changed in the combat step
-    logger.debug(f"{war_party_1.owner.name}'s board is {war_party_1.board}")
-    logger.debug(f"{war_party_2.owner.name}'s board is {war_party_2.board}")
+    resolve_combat(war_party_1, war_party_2, randomizer)
+    damage(war_party_1, war_party_2)
+
+
+def resolve_combat(war_party_1: 'WarParty', war_party_2: 'WarParty', randomizer: 'Randomizer'):
+    #  Plays out the fight between the two half boards without dealing any damage to their owners
+    #  Log messages are formatted lazily so fights pay nothing for them unless debug logging is on
+    logger.debug("%s's board is %s", war_party_1.owner.name, war_party_1.board)
+    logger.debug("%s's board is %s", war_party_2.owner.name, war_party_2.board)
     attacking_war_party = war_party_1
     defending_war_party = war_party_2
     if war_party_2.num_cards() > war_party_1.num_cards():
         attacking_war_party, defending_war_party = defending_war_party, attacking_war_party
 
-    start_combat_event = CardEvent(None, EVENTS.COMBAT_START)
+    #  The same pair of contexts is used for the whole fight
+    context = CombatPhaseContext(war_party_1, war_party_2, randomizer)
+    attacking_context = context if attacking_war_party is war_party_1 else context.enemy_context()
     # Friendly vs enemy warparty does not matter for broadcast_combat_event
-    CombatPhaseContext(war_party_1, war_party_2, randomizer).broadcast_combat_event(start_combat_event)
+    context.broadcast_card_event(None, EVENTS.COMBAT_START)
 
     for _ in range(100):
         attacker = attacking_war_party.find_next()
         defender = defending_war_party.get_random_monster(randomizer)
-        logger.debug(f'{attacking_war_party.owner.name} is attacking {defending_war_party.owner.name}')
+        logger.debug('%s is attacking %s', attacking_war_party.owner.name, defending_war_party.owner.name)
         if not defender:
             break
         if attacker:
-            start_attack(attacker, defender, attacking_war_party, defending_war_party, randomizer)
+            start_attack(attacker, defender, attacking_war_party, defending_war_party, randomizer, attacking_context)
         elif not defending_war_party.attackers():
             break
         attacking_war_party, defending_war_party = defending_war_party, attacking_war_party
-    damage(war_party_1, war_party_2)
+        attacking_context = attacking_context.enemy_context()
 
 
-def damage(half_board_1: 'WarParty', half_board_2: 'WarParty'):
+def combat_damage(half_board_1: 'WarParty', half_board_2: 'WarParty') -> int:
+    #  Damage dealt by the winner of a resolved fight.
+    #  Positive if half_board_1 won, negative if half_board_2 won and zero for a tie
     monster_damage_1 = sum([card.tier for card in half_board_1.board if not card.dead])
     monster_damage_2 = sum([card.tier for card in half_board_2.board if not card.dead])
     # Handle case where both players have cards left on board.
     if monster_damage_1 > 0 and monster_damage_2 > 0:
-        logger.debug('neither player won (both players have minions left)')
+        return 0
     elif monster_damage_1 > 0:
-        logger.debug(f'{half_board_1.owner.name} has won the fight')
-        half_board_2.owner.health -= monster_damage_1 + half_board_1.owner.tavern_tier
+        return monster_damage_1 + half_board_1.owner.tavern_tier
     elif monster_damage_2 > 0:
-        logger.debug(f'{half_board_2.owner.name} has won the fight')
-        half_board_1.owner.health -= monster_damage_2 + half_board_2.owner.tavern_tier
+        return -(monster_damage_2 + half_board_2.owner.tavern_tier)
+    else:
+        return 0
+
+
+def damage(half_board_1: 'WarParty', half_board_2: 'WarParty'):
+    damage_dealt = combat_damage(half_board_1, half_board_2)
+    if damage_dealt > 0:
+        logger.debug('%s has won the fight', half_board_1.owner.name)
+        half_board_2.owner.health -= damage_dealt
+    elif damage_dealt < 0:
+        logger.debug('%s has won the fight', half_board_2.owner.name)
+        half_board_1.owner.health += damage_dealt
+    elif any(not card.dead for card in half_board_1.board):
+        logger.debug('neither player won (both players have minions left)')
     else:
         logger.debug('neither player won (no minions left)')
 
 
 def start_attack(attacker: 'MonsterCard', defender: 'MonsterCard', attacking_war_party: 'WarParty', defending_war_party: 'WarParty',
-                 randomizer: 'Randomizer'):
-    logger.debug(f'{attacker} is attacking {defender}')
-    on_attack_event = CardEvent(attacker, EVENTS.ON_ATTACK)
-    combat_phase_context = CombatPhaseContext(attacking_war_party, defending_war_party, randomizer)
-    combat_phase_context.broadcast_combat_event(on_attack_event)
+                 randomizer: 'Randomizer', combat_phase_context: Optional[CombatPhaseContext] = None):
+    #  combat_phase_context must have the attacking war party as its friendly war party
+    logger.debug('%s is attacking %s', attacker, defender)
+    if combat_phase_context is None:
+        combat_phase_context = CombatPhaseContext(attacking_war_party, defending_war_party, randomizer)
+    combat_phase_context.broadcast_card_event(attacker, EVENTS.ON_ATTACK)
     attacker.take_damage(defender.attack, combat_phase_context)
     defender.take_damage(attacker.attack, combat_phase_context)
     # handle "after combat" events here
-    combat_phase_context.broadcast_combat_event(CardEvent(attacker, EVENTS.AFTER_ATTACK))
-    attacker.resolve_death(CombatPhaseContext(attacking_war_party, defending_war_party, randomizer))
-    defender.resolve_death(CombatPhaseContext(defending_war_party, attacking_war_party, randomizer))
-    logger.debug(f'{attacker} has just attacked {defender}')
+    combat_phase_context.broadcast_card_event(attacker, EVENTS.AFTER_ATTACK)
+    attacker.resolve_death(combat_phase_context)
+    defender.resolve_death(combat_phase_context.enemy_context())
+    logger.debug('%s has just attacked %s', attacker, defender)
@@ -0,0 +1,52 @@
+from collections import OrderedDict
+from typing import Callable, Tuple
+
+from hearthstone.board_description import BoardDescription, describe_board
+from hearthstone.combat_simulator import CombatOdds, simulate_combat
+from hearthstone.player import Player
+
+CacheKey = Tuple[BoardDescription, BoardDescription, int, int]
+
+
+class CombatCache:
+    """
+    LRU cache of combat odds, keyed by the signatures of both boards, the number of trials and the seed.
+
+    Odds are seeded, so a cached entry is exactly what the simulation would return again. Pairs are not
+    reordered: swapping the boards changes which trials go first and would not give identical odds.
+    Callers get their own copy of the odds, so adding to them does not change the cached entry.
+    """
+    def __init__(self, max_size: int = 4096,
+                 simulate: Callable[[Player, Player, int, int], CombatOdds] = simulate_combat):
+        self.max_size = max_size
+        self.simulate = simulate
+        self.entries: 'OrderedDict[CacheKey, CombatOdds]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def simulate_combat(self, board_a: Player, board_b: Player, n: int = 10_000, seed: int = 0) -> CombatOdds:
+        key = (describe_board(board_a), describe_board(board_b), n, seed)
+        odds = self.entries.get(key)
+        if odds is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return CombatOdds(odds.damage_counts)
+        self.misses += 1
+        odds = self.simulate(board_a, board_b, n, seed)
+        self.entries[key] = odds
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return CombatOdds(odds.damage_counts)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,97 @@
+import typing
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+from hearthstone.combat import WarParty, resolve_combat, combat_damage
+from hearthstone.randomizer import SeededRandomizer, derive_seed
+
+if typing.TYPE_CHECKING:
+    from hearthstone.player import Player
+    from hearthstone.randomizer import Randomizer
+
+
+class CombatOdds:
+    """
+    Outcome distribution of repeated fights between two boards, seen from the first board.
+
+    Damage is signed: positive values are damage dealt by the first board, negative values damage taken by it.
+    """
+    def __init__(self, damage_counts: Optional[Dict[int, int]] = None):
+        self.damage_counts: typing.Counter[int] = Counter(damage_counts or {})
+
+    def __repr__(self):
+        return f"CombatOdds(win={self.win_probability:.3f}, tie={self.tie_probability:.3f}, " \
+               f"loss={self.loss_probability:.3f}, trials={self.num_trials})"
+
+    def __add__(self, other: 'CombatOdds') -> 'CombatOdds':
+        return CombatOdds(self.damage_counts + other.damage_counts)
+
+    @property
+    def num_trials(self) -> int:
+        return sum(self.damage_counts.values())
+
+    def _probability(self, predicate: typing.Callable[[int], bool]) -> float:
+        if not self.num_trials:
+            return 0.0
+        return sum(count for dealt, count in self.damage_counts.items() if predicate(dealt)) / self.num_trials
+
+    @property
+    def win_probability(self) -> float:
+        return self._probability(lambda dealt: dealt > 0)
+
+    @property
+    def tie_probability(self) -> float:
+        return self._probability(lambda dealt: dealt == 0)
+
+    @property
+    def loss_probability(self) -> float:
+        return self._probability(lambda dealt: dealt < 0)
+
+    def damage_distribution(self) -> Dict[int, float]:
+        num_trials = self.num_trials
+        return {dealt: count / num_trials for dealt, count in sorted(self.damage_counts.items())}
+
+    def expected_damage(self) -> float:
+        if not self.num_trials:
+            return 0.0
+        return sum(dealt * count for dealt, count in self.damage_counts.items()) / self.num_trials
+
+
+def simulate_trial(board_a: 'Player', board_b: 'Player', randomizer: 'Randomizer') -> int:
+    """
+    Fight copies of both players' boards once, without dealing damage to either player.
+
+    The first attacker is picked the same way the tavern pairs players.
+
+    :return: the signed damage dealt by board_a
+    """
+    war_party_a = WarParty(board_a)
+    war_party_b = WarParty(board_b)
+    [(first, _)] = randomizer.select_player_pairings([board_a, board_b])
+    if first is board_a:
+        resolve_combat(war_party_a, war_party_b, randomizer)
+    else:
+        resolve_combat(war_party_b, war_party_a, randomizer)
+    return combat_damage(war_party_a, war_party_b)
+
+
+def simulate_trials(board_a: 'Player', board_b: 'Player', trials: Iterable[int], seed: int = 0) -> CombatOdds:
+    """
+    Run the given trials, each one with its own randomizer derived from the seed and the trial number.
+
+    Any partition of the trial numbers gives the same combined odds.
+    """
+    damage_counts: typing.Counter[int] = Counter()
+    for trial in trials:
+        randomizer = SeededRandomizer(derive_seed(seed, trial))
+        damage_counts[simulate_trial(board_a, board_b, randomizer)] += 1
+    return CombatOdds(damage_counts)
+
+
+def simulate_combat(board_a: 'Player', board_b: 'Player', n: int = 10_000, seed: int = 0) -> CombatOdds:
+    """
+    Estimate the odds of board_a against board_b with n seeded trials.
+
+    Neither player's health is touched.
+    """
+    return simulate_trials(board_a, board_b, range(n), seed)
@@ -1,10 +1,12 @@
 import typing
 import enum
+import weakref
+from typing import Optional, List
 if typing.TYPE_CHECKING:
     from hearthstone.player import Player
     from hearthstone.randomizer import Randomizer
     from hearthstone.tavern import WarParty
-    from hearthstone.cards import CardEvent
+    from hearthstone.cards import MonsterCard
 
 
 class EVENTS(enum.Enum):
@@ -23,6 +25,13 @@ class EVENTS(enum.Enum):
     DIVINE_SHIELD_LOST = 13
 
 
+class CardEvent:
+    def __init__(self, card: Optional['MonsterCard'], event: EVENTS, targets: Optional[List['MonsterCard']] = None):
+        self.card = card
+        self.event = EVENTS(event)
+        self.targets = targets
+
+
 class BuyPhaseContext:
     def __init__(self, owner: 'Player', randomizer: 'Randomizer'):
         self.owner = owner
@@ -36,23 +45,56 @@ class BuyPhaseContext:
 
 
 class CombatPhaseContext:
-    def __init__(self, friendly_war_party: 'WarParty', enemy_war_party: 'WarParty', randomizer: 'Randomizer'):
+    def __init__(self, friendly_war_party: 'WarParty', enemy_war_party: 'WarParty', randomizer: 'Randomizer',
+                 event_pool: Optional[List[CardEvent]] = None):
         self.friendly_war_party = friendly_war_party
         self.enemy_war_party = enemy_war_party
         self.randomizer = randomizer
+        #  Spare event records, shared with the enemy context
+        self.event_pool = [] if event_pool is None else event_pool
+        self._enemy_context: Optional['CombatPhaseContext'] = None
+        self._enemy_context_ref: Optional[weakref.ReferenceType] = None
 
     def broadcast_combat_event(self, event: 'CardEvent'):
-        #  boards are copied to prevent reindexing lists while iterating over them
-        self.friendly_war_party.owner.hero.handle_event(event, self)
-        for card in self.friendly_war_party.board.copy():
+        #  listener lists are replaced rather than mutated when a board changes, so they are safe to iterate over
+        friendly_hero = self.friendly_war_party.owner.hero
+        if event.event in friendly_hero.handled_events:
+            friendly_hero.handle_event(event, self)
+        for card in self.friendly_war_party.listeners(event.event):
             # it's ok for the card to be dead
             card.handle_event(event, self)
-        self.enemy_war_party.owner.hero.handle_event(event, self.enemy_context())
-        for card in self.enemy_war_party.board.copy():
-            card.handle_event(event, self.enemy_context())
+        enemy_context = self.enemy_context()
+        enemy_hero = self.enemy_war_party.owner.hero
+        if event.event in enemy_hero.handled_events:
+            enemy_hero.handle_event(event, enemy_context)
+        for card in self.enemy_war_party.listeners(event.event):
+            card.handle_event(event, enemy_context)
+
+    def broadcast_card_event(self, card: Optional['MonsterCard'], event: EVENTS):
+        #  Broadcasts a reused event record, so handlers must not hold on to the event after handling it.
+        #  Broadcasts nest, which is fine since records go back to the pool in the reverse order they were taken
+        if self.event_pool:
+            card_event = self.event_pool.pop()
+            card_event.card = card
+            card_event.event = event
+            card_event.targets = None
+        else:
+            card_event = CardEvent(card, event)
+        self.broadcast_combat_event(card_event)
+        self.event_pool.append(card_event)
 
-    def enemy_context(self):
-        return CombatPhaseContext(self.enemy_war_party, self.friendly_war_party, self.randomizer)
+    def enemy_context(self) -> 'CombatPhaseContext':
+        #  The two contexts of a fight are made once and refer to each other.
+        #  The enemy context only holds a weak reference back, so the pair is freed without waiting for the garbage collector
+        enemy_context = self._enemy_context
+        if enemy_context is None and self._enemy_context_ref is not None:
+            enemy_context = self._enemy_context_ref()
+        if enemy_context is None:
+            enemy_context = CombatPhaseContext(self.enemy_war_party, self.friendly_war_party, self.randomizer,
+                                               self.event_pool)
+            enemy_context._enemy_context_ref = weakref.ref(self)
+            self._enemy_context = enemy_context
+        return enemy_context
 
     def summon_minion_multiplier(self) -> int:
         summon_multiplier = 1
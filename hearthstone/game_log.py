@@ -0,0 +1,94 @@
+import json
+import typing
+from collections import defaultdict, deque
+from typing import Dict, List, TextIO, Iterable, Deque
+
+from hearthstone.agent import Agent, Action
+from hearthstone.host import RoundRobinHost
+from hearthstone.randomizer import SeededRandomizer
+
+if typing.TYPE_CHECKING:
+    from hearthstone.cards import Card
+    from hearthstone.hero import Hero
+    from hearthstone.player import Player
+
+#  A game log is a json document per line. The first line holds the seed and the player names, every other line
+#  one decision of a player, referred to by their position in the player list. Decisions are stored as indices
+#  into what the player was offered, so replaying them only needs the seeded tavern to make the same offers again.
+
+ACTION_TYPES = {action_type.__name__: action_type for action_type in Action.__subclasses__()}
+
+
+def encode_action(action: Action) -> list:
+    return [type(action).__name__, vars(action)]
+
+
+def decode_action(encoded_action: list) -> Action:
+    action_type, fields = encoded_action
+    return ACTION_TYPES[action_type](**fields)
+
+
+class GameLogWriter:
+    def __init__(self, file: TextIO):
+        self.file = file
+        self.player_indices: Dict[str, int] = {}
+
+    def write(self, record: dict):
+        self.file.write(json.dumps(record, separators=(',', ':')) + "\n")
+
+    def header(self, seed: int, player_names: List[str]):
+        self.player_indices = {name: index for index, name in enumerate(player_names)}
+        self.write({"seed": seed, "players": player_names})
+
+    def hero_choice(self, player: 'Player', hero: 'Hero'):
+        self.write({"player": self.player_indices[player.name], "hero": player.hero_options.index(hero)})
+
+    def buy_phase_action(self, player: 'Player', action: Action):
+        self.write({"player": self.player_indices[player.name], "action": encode_action(action)})
+
+    def discover_choice(self, player: 'Player', card: 'Card'):
+        self.write({"player": self.player_indices[player.name], "discover": player.discovered_cards.index(card)})
+
+    def rearrangement(self, player: 'Player', arrangement: List['Card']):
+        permutation = [player.in_play.index(card) for card in arrangement]
+        self.write({"player": self.player_indices[player.name], "arrangement": permutation})
+
+
+class ReplayAgent(Agent):
+    """
+    Plays back the decisions one player made in a logged game.
+    """
+    def __init__(self, records: Deque[dict]):
+        self.records = records
+
+    def next_record(self, kind: str):
+        record = self.records.popleft()
+        assert kind in record, f"expected a {kind} record, the log has {record}"
+        return record[kind]
+
+    def hero_choice_action(self, player: 'Player') -> 'Hero':
+        return player.hero_options[self.next_record("hero")]
+
+    def buy_phase_action(self, player: 'Player') -> Action:
+        return decode_action(self.next_record("action"))
+
+    def discover_choice_action(self, player: 'Player') -> 'Card':
+        return player.discovered_cards[self.next_record("discover")]
+
+    def rearrange_cards(self, player: 'Player') -> List['Card']:
+        return [player.in_play[index] for index in self.next_record("arrangement")]
+
+
+class ReplayHost(RoundRobinHost):
+    """
+    Re-runs a logged game without the agents that played it.
+    """
+    def __init__(self, log_lines: Iterable[str]):
+        lines = iter(log_lines)
+        header = json.loads(next(lines))
+        records_by_player: Dict[int, Deque[dict]] = defaultdict(deque)
+        for line in lines:
+            record = json.loads(line)
+            records_by_player[record["player"]].append(record)
+        agents = {name: ReplayAgent(records_by_player[index]) for index, name in enumerate(header["players"])}
+        super().__init__(agents, SeededRandomizer(header["seed"]))
@@ -1,8 +1,8 @@
-from typing import Union, Tuple
+from typing import Union, Tuple, FrozenSet
 
 from hearthstone.cards import CardEvent
 from hearthstone.card_factory import make_metaclass
-from hearthstone.events import BuyPhaseContext, CombatPhaseContext
+from hearthstone.events import BuyPhaseContext, CombatPhaseContext, EVENTS
 
 VALHALLA = []
 
@@ -14,6 +14,8 @@ class Hero(metaclass=HeroType):
     hero_power_used = False
     can_use_power = True
     current_type = None
+    #  Events handled by handle_event, heroes are only notified of these during combat
+    handled_events: FrozenSet[EVENTS] = frozenset()
 
     def __repr__(self):
         return str(type(self).__name__)
@@ -35,6 +35,7 @@ class PatchWerk(Hero):
 
 class Nefarian(Hero):
     power_cost = 1
+    handled_events = frozenset({EVENTS.COMBAT_START})
 
     # hero power is called nefarious fire
 
@@ -47,6 +48,8 @@ class Nefarian(Hero):
 
 
 class Deathwing(Hero):
+    handled_events = frozenset({EVENTS.COMBAT_START, EVENTS.SUMMON_COMBAT})
+
     def hero_power_valid_impl(self, context: BuyPhaseContext):
         return False
 
@@ -61,6 +64,8 @@ class Deathwing(Hero):
 
 
 class MillificentManastorm(Hero):
+    handled_events = frozenset({EVENTS.BUY})
+
     def hero_power_valid_impl(self, context: BuyPhaseContext):
         return False
 
@@ -94,6 +99,7 @@ class YoggSaron(Hero):
 
 class PatchesThePirate(Hero):
     power_cost = 4
+    handled_events = frozenset({EVENTS.BUY})
 
     def handle_event(self, event: CardEvent, context: BuyPhaseContext):
         if event.event is EVENTS.BUY and event.card.monster_type in (MONSTER_TYPES.PIRATE, MONSTER_TYPES.ALL):
@@ -104,7 +110,7 @@ class PatchesThePirate(Hero):
                    card.monster_type in (MONSTER_TYPES.PIRATE, MONSTER_TYPES.ALL) and card.tier <= context.owner.tavern_tier]
 
         card = context.randomizer.select_gain_card(pirates)
-        context.owner.tavern.deck.remove_card(card)
+        card = context.owner.tavern.deck.remove_card(card)
         context.owner.hand.append(card)
         context.owner.check_golden(type(card))
         self.power_cost = 4
@@ -114,18 +120,24 @@ class PatchesThePirate(Hero):
 
 
 class DancinDeryl(Hero):
+    handled_events = frozenset({EVENTS.SELL})
+
     def hero_power_valid_impl(self, context: BuyPhaseContext):
         return False
 
     def handle_event(self, event: CardEvent, context: BuyPhaseContext):
         if event.event is EVENTS.SELL:
             for _ in range(2):
+                if not context.owner.store:
+                    return
                 card = context.randomizer.select_from_store(context.owner.store)
                 card.attack += 1
                 card.health += 1
 
 
 class FungalmancerFlurgl(Hero):
+    handled_events = frozenset({EVENTS.SELL})
+
     def hero_power_valid_impl(self, context: BuyPhaseContext):
         return False
 
@@ -134,12 +146,13 @@ class FungalmancerFlurgl(Hero):
             murlocs = [card for card in context.owner.tavern.deck.all_cards() if
                        card.monster_type in (MONSTER_TYPES.MURLOC, MONSTER_TYPES.ALL) and card.tier <= context.owner.tavern_tier]
             card = context.randomizer.select_add_to_store(murlocs)
-            context.owner.tavern.deck.remove_card(card)
+            card = context.owner.tavern.deck.remove_card(card)
             context.owner.store.append(card)
 
 
 class KaelthasSunstrider(Hero):
     buy_counter = 0
+    handled_events = frozenset({EVENTS.BUY})
 
     def hero_power_valid_impl(self, context: BuyPhaseContext):
         return False
@@ -171,6 +184,8 @@ class SkycapnKragg(Hero):
 
 
 class TheCurator(Hero):
+    handled_events = frozenset({EVENTS.BUY_START})
+
     def hero_power_valid_impl(self, context: BuyPhaseContext):
         return False
 
@@ -180,6 +195,8 @@ class TheCurator(Hero):
 
 
 class TheRatKing(Hero):
+    handled_events = frozenset({EVENTS.BUY_START, EVENTS.BUY})
+
     def hero_power_valid_impl(self, context: BuyPhaseContext):
         return False
 
@@ -194,6 +211,8 @@ class TheRatKing(Hero):
 
 
 class Ysera(Hero):
+    handled_events = frozenset({EVENTS.BUY_START})
+
     def hero_power_valid_impl(self, context: BuyPhaseContext):
         return False
 
@@ -202,7 +221,7 @@ class Ysera(Hero):
             dragons = [card for card in context.owner.tavern.deck.all_cards() if card.monster_type in
                        (MONSTER_TYPES.DRAGON, MONSTER_TYPES.ALL) and card.tier <= context.owner.tavern_tier]
             card = context.randomizer.select_add_to_store(dragons)
-            context.owner.tavern.deck.remove_card(card)
+            card = context.owner.tavern.deck.remove_card(card)
             context.owner.store.append(card)
 
 
@@ -1,37 +1,57 @@
 import typing
-from typing import Dict
+from collections import defaultdict
+from typing import Dict, Optional, List
 from hearthstone.tavern import Tavern
 from hearthstone.agent import EndPhaseAction
+from hearthstone.randomizer import SeededRandomizer
 if typing.TYPE_CHECKING:
-    from hearthstone.agent import Agent
+    from hearthstone.agent import Agent, Action
+    from hearthstone.player import Player
+    from hearthstone.game_log import GameLogWriter
+    from hearthstone.randomizer import Randomizer
 
 
 class RoundRobinHost:
     tavern: Tavern
     agents: Dict[str, 'Agent']
 
-    def __init__(self, agents: Dict[str, 'Agent']):
-        self.tavern = Tavern()
+    def __init__(self, agents: Dict[str, 'Agent'], randomizer: Optional['Randomizer'] = None,
+                 game_log: Optional['GameLogWriter'] = None):
+        self.tavern = Tavern(randomizer)
         self.agents = agents
+        self.game_log = game_log
+        if game_log:
+            assert isinstance(self.tavern.randomizer, SeededRandomizer), "only seeded games can be replayed"
+            game_log.header(self.tavern.randomizer.seed, list(agents.keys()))
         for player_name in agents.keys():
             self.tavern.add_player(player_name)
 
     def start_game(self):
         for player_name, player in self.tavern.players.items():
-            player.choose_hero(self.agents[player_name].hero_choice_action(player))
+            hero = self.agents[player_name].hero_choice_action(player)
+            if self.game_log:
+                self.game_log.hero_choice(player, hero)
+            player.choose_hero(hero)
 
-    def play_round_generator(self) -> typing.Generator:
+    def play_round_generator(self) -> typing.Generator['Player', Optional['Action'], None]:
+        #  Yields each player about to make a buy phase decision. The chosen action can be sent back,
+        #  otherwise the player's agent is asked for it.
         self.tavern.buying_step()
         for player_name, player in self.tavern.players.items():
             if player.health <= 0:
                 continue
             agent = self.agents[player_name]
             for _ in range(20):
-                action = agent.buy_phase_action(player)
-                yield
+                action = yield player
+                if action is None:
+                    action = agent.buy_phase_action(player)
+                if self.game_log:
+                    self.game_log.buy_phase_action(player, action)
                 action.apply(player)
                 if player.discovered_cards:
                     discovered_card = agent.discover_choice_action(player)
+                    if self.game_log:
+                        self.game_log.discover_choice(player, discovered_card)
                     player.select_discover(discovered_card)
 
                 if type(action) is EndPhaseAction:
@@ -39,6 +59,8 @@ class RoundRobinHost:
             if len(player.in_play) > 1:
                 arrangement = agent.rearrange_cards(player)
                 assert set(arrangement) == set(player.in_play)
+                if self.game_log:
+                    self.game_log.rearrangement(player, arrangement)
                 player.in_play = arrangement
             self.tavern.combat_step()
         if self.tavern.game_over():
@@ -56,3 +78,66 @@ class RoundRobinHost:
         self.start_game()
         while not self.game_over():
             self.play_round()
+
+
+class BatchedHost:
+    """
+    Plays several games in lockstep, one buy phase decision per game at a time.
+
+    Pending decisions of agents sharing a batch key are made together, so e.g. policy bots using the same network
+    evaluate all their games in a single forward pass.
+    """
+    def __init__(self, hosts: Optional[List[RoundRobinHost]] = None):
+        self.hosts: List[RoundRobinHost] = []
+        self.generators: Dict[RoundRobinHost, typing.Generator] = {}
+        self.pending_players: Dict[RoundRobinHost, 'Player'] = {}
+        for host in hosts or []:
+            self.add_host(host)
+
+    def add_host(self, host: RoundRobinHost):
+        host.start_game()
+        self.hosts.append(host)
+        self.generators[host] = host.play_round_generator()
+        self._advance(host, None)
+
+    def _advance(self, host: RoundRobinHost, action: Optional['Action']) -> bool:
+        #  Runs the host up to its next decision, returns False once the game is over
+        while True:
+            try:
+                self.pending_players[host] = self.generators[host].send(action)
+                return True
+            except StopIteration:
+                if host.game_over():
+                    self.hosts.remove(host)
+                    del self.generators[host]
+                    del self.pending_players[host]
+                    return False
+                self.generators[host] = host.play_round_generator()
+                action = None
+
+    def step(self) -> List[RoundRobinHost]:
+        """
+        Makes the pending decision of every game and runs each game up to its next one.
+
+        :return: the hosts whose games ended, they are no longer played
+        """
+        batches: Dict[typing.Hashable, List[RoundRobinHost]] = defaultdict(list)
+        actions: Dict[RoundRobinHost, 'Action'] = {}
+        for host in self.hosts:
+            player = self.pending_players[host]
+            agent = host.agents[player.name]
+            batch_key = agent.batch_key()
+            if batch_key is None:
+                actions[host] = agent.buy_phase_action(player)
+            else:
+                batches[batch_key].append(host)
+        for batch in batches.values():
+            players = [self.pending_players[host] for host in batch]
+            agents = [host.agents[player.name] for host, player in zip(batch, players)]
+            for host, action in zip(batch, agents[0].buy_phase_actions(agents, players)):
+                actions[host] = action
+        return [host for host, action in actions.items() if not self._advance(host, action)]
+
+    def play_games(self):
+        while self.hosts:
+            self.step()
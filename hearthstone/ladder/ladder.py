@@ -1,25 +1,62 @@
+import copy
+import functools
 import json
 import random
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Callable
+from typing import List, Callable, Dict, Tuple, Optional
 
 import trueskill
 
 from hearthstone.agent import Agent
 from hearthstone.battlebots.cheapo_bot import CheapoBot
 from hearthstone.battlebots.get_bot_contestants import get_priority_bot_contestant_tuples
+from hearthstone.battlebots.mcts_bot import MCTSBot
 from hearthstone.battlebots.no_action_bot import NoActionBot
 from hearthstone.battlebots.random_bot import RandomBot
 from hearthstone.battlebots.saurolisk_bot import SauroliskBot
 from hearthstone.battlebots.supremacy_bot import SupremacyBot
 from hearthstone.host import RoundRobinHost
 from hearthstone.monster_types import MONSTER_TYPES
+from hearthstone.randomizer import SeededRandomizer
+
+
+class AgentPool:
+    """
+    Hands out a separate agent to every game a contestant is playing, and keeps agents given back for later games so
+    they are only built once.
+    """
+    def __init__(self, agent_generator: Callable[[], Agent]):
+        self.agent_generator = agent_generator
+        self.idle_agents: List[Agent] = []
+        self.lock = threading.Lock()
+
+    def acquire(self) -> Agent:
+        with self.lock:
+            if self.idle_agents:
+                return self.idle_agents.pop()
+        return self.agent_generator()
+
+    def release(self, agent: Agent):
+        agent.reset()
+        with self.lock:
+            self.idle_agents.append(agent)
+
+    def prewarm(self, num_agents: int = 1):
+        """
+        Builds agents ahead of the first game, so their set up is not paid for while a game is being played.
+        """
+        agents = [self.agent_generator() for _ in range(num_agents)]
+        with self.lock:
+            self.idle_agents.extend(agents)
 
 
 class Contestant:
     def __init__(self, name,  agent_generator: Callable[[], Agent]):
         self.name = name
         self.agent_generator = agent_generator
+        self.agent_pool = AgentPool(agent_generator)
         self.elo = 1200
         self.trueskill = trueskill.Rating()
         self.games_played = 0
@@ -55,11 +92,13 @@ def print_standings(contestants: List[Contestant]):
 
 
 def run_tournament(contestants: List[Contestant], num_rounds=10):
-    agents = {contestant.name: contestant.agent_generator() for contestant in contestants}
     for _ in range(num_rounds):
         round_contestants = random.sample(contestants, k=8)
-        host = RoundRobinHost({c.name: agents[c.name] for c in round_contestants})
+        agents = {c.name: c.agent_pool.acquire() for c in round_contestants}
+        host = RoundRobinHost(agents)
         host.play_game()
+        for c in round_contestants:
+            c.agent_pool.release(agents[c.name])
         winner_names = list(reversed([name for name, player in host.tavern.losers]))
         print(host.tavern.losers[-1][1].in_play)
         ranked_contestants = sorted(round_contestants, key=lambda c: winner_names.index(c.name))
@@ -69,13 +108,74 @@ def run_tournament(contestants: List[Contestant], num_rounds=10):
             contestant.games_played += 1
 
 
+#  The contestants of a ladder worker process, by name
+_worker_contestants: Dict[str, Contestant] = {}
+
+
+def _init_ladder_worker(contestants_factory: Callable[[], List[Contestant]]):
+    global _worker_contestants
+    _worker_contestants = {contestant.name: contestant for contestant in contestants_factory()}
+    #  A worker plays one game at a time, so one agent per contestant is all it will ever need
+    for contestant in _worker_contestants.values():
+        contestant.agent_pool.prewarm()
+
+
+def play_ladder_game(round_index: int, names: List[str], seed: int) -> Tuple[int, List[str]]:
+    """
+    Worker entry point: plays one game between the named contestants.
+
+    Returns: The round index and the contestant names from winner to loser
+    """
+    agents = {name: _worker_contestants[name].agent_pool.acquire() for name in names}
+    host = RoundRobinHost(agents, SeededRandomizer(seed))
+    try:
+        host.play_game()
+    finally:
+        for name in names:
+            _worker_contestants[name].agent_pool.release(agents[name])
+    return round_index, list(reversed([name for name, player in host.tavern.losers]))
+
+
+def run_parallel_tournament(contestants: List[Contestant], contestants_factory: Callable[[], List[Contestant]],
+                            num_rounds=10, max_workers: Optional[int] = None, seed: int = 0,
+                            standings_path: Optional[str] = None, checkpoint_every: int = 100):
+    """
+    Plays the games of a tournament in worker processes, each building its own contestants with contestants_factory.
+
+    The line-up and seed of every game are drawn up front, and results are applied to the ratings in round order
+    whatever order the games finish in, so a tournament with the same seed gives the same ratings with any number
+    of workers. The standings are saved every checkpoint_every games and at the end when standings_path is given.
+    """
+    rng = random.Random(seed)
+    schedule = [(round_index, [contestant.name for contestant in rng.sample(contestants, k=8)], rng.randrange(2 ** 32))
+                for round_index in range(num_rounds)]
+    contestants_by_name = {contestant.name: contestant for contestant in contestants}
+    finished_rounds: Dict[int, List[str]] = {}
+    next_round = 0
+    with ProcessPoolExecutor(max_workers, initializer=_init_ladder_worker, initargs=(contestants_factory,)) as executor:
+        futures = [executor.submit(play_ladder_game, *game) for game in schedule]
+        for future in as_completed(futures):
+            round_index, winner_names = future.result()
+            finished_rounds[round_index] = winner_names
+            while next_round in finished_rounds:
+                ranked_contestants = [contestants_by_name[name] for name in finished_rounds.pop(next_round)]
+                update_ratings(ranked_contestants)
+                for contestant in ranked_contestants:
+                    contestant.games_played += 1
+                next_round += 1
+                if standings_path and next_round % checkpoint_every == 0:
+                    save_ratings(contestants, standings_path)
+    if standings_path:
+        save_ratings(contestants, standings_path)
+
+
 def all_contestants():
     all_bots = [Contestant(f"RandomBot", lambda: RandomBot(1))]
     all_bots += [Contestant(f"NoActionBot ", lambda: NoActionBot())]
     all_bots += [Contestant(f"CheapoBot", lambda: CheapoBot(3))]
-    all_bots += [Contestant(f"SupremacyBot {t}", lambda: SupremacyBot(t, False, i)) for i, t in
+    all_bots += [Contestant(f"SupremacyBot {t}", functools.partial(SupremacyBot, t, False, i)) for i, t in
                  enumerate([MONSTER_TYPES.MURLOC, MONSTER_TYPES.BEAST, MONSTER_TYPES.MECH, MONSTER_TYPES.DRAGON, MONSTER_TYPES.DEMON, MONSTER_TYPES.PIRATE])]
-    all_bots += [Contestant(f"SupremacyUpgradeBot {t}", lambda: SupremacyBot(t, True, i)) for i, t in
+    all_bots += [Contestant(f"SupremacyUpgradeBot {t}", functools.partial(SupremacyBot, t, True, i)) for i, t in
                  enumerate([MONSTER_TYPES.MURLOC, MONSTER_TYPES.BEAST, MONSTER_TYPES.MECH, MONSTER_TYPES.DRAGON, MONSTER_TYPES.DEMON, MONSTER_TYPES.PIRATE])]
     all_bots += [Contestant("SauroliskBot", lambda: SauroliskBot(5))]
     # all_bots += [Contestant("PriorityHealthAttackBot", attack_health_priority_bot(6))]
@@ -95,10 +195,18 @@ def all_contestants():
     # all_bots += [Contestant("PriorityBuffSauroliskBot", priority_saurolisk_buff_bot(17))]
     # all_bots += [Contestant("PriorityBuffSauroliskBot", priority_saurolisk_buff_bot(18))]
     #
-    all_bots += [Contestant(name, lambda: bot) for name, bot in get_priority_bot_contestant_tuples()]
+    #  Each agent is a copy of the built bot, so games never share one
+    all_bots += [Contestant(name, functools.partial(copy.deepcopy, bot)) for name, bot in get_priority_bot_contestant_tuples()]
     return all_bots
 
 
+def ladder_contestants():
+    #  Search bots are too slow to be training opponents, so they only play on the ladder
+    #  A fixed number of iterations rather than a time budget, so results don't depend on the machine or its load
+    return all_contestants() + [Contestant("MCTSBot", functools.partial(MCTSBot, 19, time_budget_secs=None,
+                                                                        max_iterations=20))]
+
+
 def load_ratings(contestants: List[Contestant], path):
     with open(path) as f:
         standings = json.load(f)
@@ -125,11 +233,10 @@ def save_ratings(contestants: List[Contestant], path):
 
 
 def main():
-    contestants = all_contestants()
+    contestants = ladder_contestants()
     standings_path = "../../data/standings.json"
     load_ratings(contestants, standings_path)
-    run_tournament(contestants, 100)
-    save_ratings(contestants, standings_path)
+    run_parallel_tournament(contestants, ladder_contestants, 100, standings_path=standings_path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,48 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from hearthstone.board_description import BoardDescription, describe_board, build_player
+from hearthstone.combat_simulator import CombatOdds, simulate_trials
+from hearthstone.player import Player
+
+
+def simulate_batch(description_a: BoardDescription, description_b: BoardDescription,
+                   start: int, stop: int, seed: int) -> CombatOdds:
+    """
+    Worker entry point: rebuild both boards from their descriptions and run trials start to stop.
+    """
+    return simulate_trials(build_player(description_a), build_player(description_b), range(start, stop), seed)
+
+
+class ParallelCombatSimulator:
+    """
+    Runs combat trials on a pool of worker processes.
+
+    Trials are split into fixed size batches and every trial is seeded from its own number, so the odds are
+    identical to simulate_combat with the same seed whatever the number of workers.
+    """
+    def __init__(self, max_workers: Optional[int] = None, batch_size: int = 500):
+        self.batch_size = batch_size
+        self.executor = ProcessPoolExecutor(max_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+    def simulate_combat(self, board_a: Player, board_b: Player, n: int = 10_000, seed: int = 0) -> CombatOdds:
+        return self.simulate_descriptions(describe_board(board_a), describe_board(board_b), n, seed)
+
+    def simulate_descriptions(self, description_a: BoardDescription, description_b: BoardDescription,
+                              n: int = 10_000, seed: int = 0) -> CombatOdds:
+        futures = [self.executor.submit(simulate_batch, description_a, description_b,
+                                        start, min(start + self.batch_size, n), seed)
+                   for start in range(0, n, self.batch_size)]
+        odds = CombatOdds()
+        for future in futures:
+            odds += future.result()
+        return odds
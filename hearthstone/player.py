@@ -1,7 +1,8 @@
+import copy
 import itertools
 import typing
-from collections import defaultdict
-from typing import Optional, List, Callable, Type
+from collections import defaultdict, Counter
+from typing import Optional, List, Callable, Type, Iterable
 
 from hearthstone.cards import MonsterCard, CardEvent, Card
 from hearthstone.events import BuyPhaseContext, EVENTS
@@ -23,6 +24,78 @@ StoreIndex = typing.NewType("StoreIndex", int)
 HandIndex = typing.NewType("HandIndex", int)
 BoardIndex = typing.NewType("BoardIndex", int)
 
+class TrackedCardList(list):
+    """
+    A list of cards that keeps a count of the non golden cards of each type in it. Several lists can share one count.
+
+    A card must be golden before it is added, turning a card golden in place is not seen by the count.
+    """
+    __slots__ = ('counts',)
+
+    def __init__(self, counts: typing.Counter[Type[MonsterCard]], cards: Iterable[MonsterCard] = ()):
+        #  Does not count the cards it starts with, see track and untrack
+        super().__init__(cards)
+        self.counts = counts
+
+    def __reduce__(self):
+        return TrackedCardList, (self.counts, list(self))
+
+    def track(self, cards: Iterable[MonsterCard]):
+        for card in cards:
+            if not card.golden:
+                self.counts[type(card)] += 1
+
+    def untrack(self, cards: Iterable[MonsterCard]):
+        for card in cards:
+            if not card.golden:
+                self.counts[type(card)] -= 1
+
+    def append(self, card: MonsterCard):
+        super().append(card)
+        self.track((card,))
+
+    def extend(self, cards: Iterable[MonsterCard]):
+        cards = list(cards)
+        super().extend(cards)
+        self.track(cards)
+
+    def __iadd__(self, cards: Iterable[MonsterCard]):
+        self.extend(cards)
+        return self
+
+    def insert(self, index: int, card: MonsterCard):
+        super().insert(index, card)
+        self.track((card,))
+
+    def pop(self, index: int = -1) -> MonsterCard:
+        card = super().pop(index)
+        self.untrack((card,))
+        return card
+
+    def remove(self, card: MonsterCard):
+        super().remove(card)
+        self.untrack((card,))
+
+    def clear(self):
+        self.untrack(self)
+        super().clear()
+
+    def __setitem__(self, index, value):
+        removed = self[index] if isinstance(index, slice) else (self[index],)
+        self.untrack(removed)
+        if isinstance(index, slice):
+            value = list(value)
+            self.track(value)
+        else:
+            self.track((value,))
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index):
+        removed = self[index] if isinstance(index, slice) else (self[index],)
+        self.untrack(removed)
+        super().__delitem__(index)
+
+
 class Player:
     def __init__(self, tavern: 'Tavern', name: str, hero_options: List['Hero']):
         self.name = name
@@ -39,11 +112,62 @@ class Player:
         self.refresh_store_cost = 1
         self._tavern_upgrade_costs = (0, 5, 7, 8, 9, 10)
         self.tavern_upgrade_cost = 5
-        self.hand: List[MonsterCard] = []
-        self.in_play: List[MonsterCard] = []
+        #  Non golden cards of each type in hand and in play, kept up to date by the two lists
+        self.non_golden_counts: typing.Counter[Type[MonsterCard]] = Counter()
+        self._hand = TrackedCardList(self.non_golden_counts)
+        self._in_play = TrackedCardList(self.non_golden_counts)
         self.store: List[MonsterCard] = []
         self.frozen = False
-        self.counted_cards = defaultdict(lambda: 0)
+        self.counted_cards = defaultdict(int)
+        #  Caches the valid action mask between decisions, see training.pytorch.hearthstone_state_encoder
+        self.action_mask_tracker = None
+
+    @property
+    def hand(self) -> TrackedCardList:
+        return self._hand
+
+    @hand.setter
+    def hand(self, cards: Iterable[MonsterCard]):
+        self._hand = self._replace_tracked_cards(self._hand, cards)
+
+    @property
+    def in_play(self) -> TrackedCardList:
+        return self._in_play
+
+    @in_play.setter
+    def in_play(self, cards: Iterable[MonsterCard]):
+        self._in_play = self._replace_tracked_cards(self._in_play, cards)
+
+    def _replace_tracked_cards(self, old_cards: TrackedCardList, cards: Iterable[MonsterCard]) -> TrackedCardList:
+        old_cards.untrack(old_cards)
+        new_cards = TrackedCardList(self.non_golden_counts, cards)
+        new_cards.track(new_cards)
+        return new_cards
+
+    def count_non_golden(self, card_type: Type[MonsterCard]) -> int:
+        #  Copies of card_type owned in hand or in play that are not golden
+        return self.non_golden_counts[card_type]
+
+    def fork(self, tavern: Optional['Tavern']) -> 'Player':
+        """
+        A copy of this player that plays in the given tavern. Cards and the hero are copied, everything else that
+        changes during a game is rebuilt rather than shared.
+        """
+        forked = object.__new__(Player)
+        forked.__dict__.update(self.__dict__)
+        forked.tavern = tavern
+        #  clone_for_combat copies all the mutable state of a card
+        forked.non_golden_counts = self.non_golden_counts.copy()
+        forked._hand = TrackedCardList(forked.non_golden_counts, [card.clone_for_combat() for card in self._hand])
+        forked._in_play = TrackedCardList(forked.non_golden_counts, [card.clone_for_combat() for card in self._in_play])
+        forked.store = [card.clone_for_combat() for card in self.store]
+        forked.discovered_cards = [card.clone_for_combat() for card in self.discovered_cards]
+        forked.triple_rewards = self.triple_rewards.copy()
+        forked.counted_cards = self.counted_cards.copy()
+        forked.hero = copy.copy(self.hero)
+        forked.hero_options = [copy.copy(hero) for hero in self.hero_options]
+        forked.action_mask_tracker = None
+        return forked
 
     @staticmethod
     def new_player_with_hero(tavern: 'Tavern', name: str, hero: Optional['Hero'] = None) -> 'Player':
@@ -129,17 +253,19 @@ class Player:
         if not self.triple_rewards:
             return
         discover_tier = self.triple_rewards.pop(-1).level
-        self.draw_discover(lambda card: card.tier == discover_tier)
+        self.draw_discover(lambda card: card.tier == discover_tier, discover_tier)
 
     def validate_triple_rewards(self) -> bool:
         return bool(self.triple_rewards)
 
-    def draw_discover(self, predicate: Callable[[Card], bool]):
-        discoverables = [card for card in self.tavern.deck.all_cards() if predicate(card)]
+    def draw_discover(self, predicate: Callable[[Card], bool], tier: Optional[int] = None):
+        #  If every card the predicate accepts is of one tier, passing it spares a scan of the whole deck
+        candidates = self.tavern.deck.all_cards() if tier is None else self.tavern.deck.cards_of_tier(tier)
+        discoverables = [card for card in candidates if predicate(card)]
         for _ in range(3):
-            self.discovered_cards.append(self.tavern.randomizer.select_discover_card(discoverables))
-            discoverables.remove(self.discovered_cards[-1])
-            self.tavern.deck.remove_card(self.discovered_cards[-1])
+            card = self.tavern.randomizer.select_discover_card(discoverables)
+            discoverables.remove(card)
+            self.discovered_cards.append(self.tavern.deck.remove_card(card))
 
     def select_discover(self, card: Card):
         assert (card in self.discovered_cards)
@@ -187,9 +313,9 @@ class Player:
         return True
 
     def check_golden(self, check_card: Type[MonsterCard]):
-        cards = [card for card in self.in_play + self.hand if isinstance(card, check_card) and not card.golden]
-        assert len(cards) <= 3, f"fnord{cards}"
-        if len(cards) == 3:
+        assert self.count_non_golden(check_card) <= 3, f"fnord{check_card}"
+        if self.count_non_golden(check_card) == 3:
+            cards = [card for card in self.in_play + self.hand if type(card) is check_card and not card.golden]
             for card in cards:
                 if card in self.in_play:
                     self.in_play.remove(card)
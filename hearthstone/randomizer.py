@@ -1,6 +1,8 @@
+import copy
+import hashlib
 import random
 import typing
-from typing import List, Tuple
+from typing import List, Tuple, Union, Dict, Set
 
 from hearthstone.monster_types import MONSTER_TYPES
 
@@ -47,6 +49,14 @@ class Randomizer:
     def select_monster_type(self, monster_types: List['MONSTER_TYPES'], round_number: int) -> 'MONSTER_TYPES':
         raise NotImplementedError()
 
+    def combat_randomizer(self, player_1: 'Player', player_2: 'Player', round_number: int) -> 'Randomizer':
+        #  The randomizer used for one fight of a combat step
+        return self
+
+    def fork(self) -> 'Randomizer':
+        #  An independent copy that will make the same choices as this randomizer from now on
+        return copy.deepcopy(self)
+
 
 class DefaultRandomizer(Randomizer):
     def select_draw_card(self, cards: List['Card'], player_name: str, round_number: int) -> 'Card':
@@ -85,4 +95,122 @@ class DefaultRandomizer(Randomizer):
         return random.choice(cards)
 
     def select_monster_type(self, monster_types: List['MONSTER_TYPES'], round_number: int) -> 'MONSTER_TYPES':
-        return random.choice(monster_types)
\ No newline at end of file
+        return random.choice(monster_types)
+
+    def fork(self) -> 'Randomizer':
+        return self
+
+
+def copy_random(stream: random.Random) -> random.Random:
+    #  Several times faster than copy.deepcopy, which goes through the pickle protocol
+    copied = random.Random.__new__(random.Random)
+    copied.setstate(stream.getstate())
+    return copied
+
+
+def derive_seed(seed: Union[int, str], *keys) -> int:
+    """
+    Derive a child seed from a parent seed and a sequence of keys.
+
+    The derivation only depends on the string form of its arguments, so it is stable across processes and runs.
+    """
+    key = "/".join(str(part) for part in (seed,) + keys)
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+class SeededRandomizer(Randomizer):
+    """
+    A reproducible randomizer made of independent streams derived from one seed.
+
+    Draws use one stream per player and round and monster types one stream per round, so the random numbers a
+    player's draws consume do not depend on the order in which players act. The cards they pick still do, since all
+    players draw from the shared card pool and earlier draws change what is left in it.
+    Each fight gets a child randomizer derived from the round and the players.
+    Every other choice comes from the main stream, which is the stream with no keys.
+
+    Rounds only go forward, so the streams of a round are dropped once a later round asks for a stream.
+    """
+    def __init__(self, seed: int):
+        self.seed = seed
+        self.streams: Dict[Tuple, random.Random] = {(): random.Random(seed)}
+        #  Streams this randomizer shares with a fork, see fork
+        self.shared_streams: Set[Tuple] = set()
+        self.round_number = 0
+
+    @property
+    def local_random(self) -> random.Random:
+        return self.stream()
+
+    def stream(self, *keys) -> random.Random:
+        stream = self.streams.get(keys)
+        if stream is None:
+            stream = random.Random(derive_seed(self.seed, *keys))
+            self.streams[keys] = stream
+        elif keys in self.shared_streams:
+            stream = copy_random(stream)
+            self.streams[keys] = stream
+            self.shared_streams.discard(keys)
+        return stream
+
+    def round_stream(self, round_number: int, *keys) -> random.Random:
+        #  Streams of a round have the round number as their last key
+        if round_number > self.round_number:
+            self.round_number = round_number
+            self.streams = {stream_keys: stream for stream_keys, stream in self.streams.items()
+                            if not stream_keys or stream_keys[-1] >= round_number}
+            self.shared_streams.intersection_update(self.streams)
+        return self.stream(*keys, round_number)
+
+    def spawn(self, *keys) -> 'SeededRandomizer':
+        #  An independent child randomizer, e.g. one per game of a tournament
+        return SeededRandomizer(derive_seed(self.seed, *keys))
+
+    def fork(self) -> 'SeededRandomizer':
+        #  Copying a stream is slow and most are never used again, so the streams are shared and each side copies a
+        #  stream the first time it uses it after the fork
+        forked = copy.copy(self)
+        forked.streams = self.streams.copy()
+        forked.shared_streams = set(self.streams)
+        self.shared_streams = set(self.streams)
+        return forked
+
+    def combat_randomizer(self, player_1: 'Player', player_2: 'Player', round_number: int) -> 'SeededRandomizer':
+        return self.spawn("combat", round_number, player_1.name, player_2.name)
+
+    def select_draw_card(self, cards: List['Card'], player_name: str, round_number: int) -> 'Card':
+        return self.round_stream(round_number, "draw", player_name).choice(cards)
+
+    def select_player_pairings(self, players: List['Player']) -> List[Tuple['Player', 'Player']]:
+        self.local_random.shuffle(players)
+        number_of_battles = len(players) // 2
+        return list(zip(players[:number_of_battles], players[number_of_battles:]))
+
+    def select_attack_target(self, defenders: List['Card']) -> 'Card':
+        return self.local_random.choice(defenders)
+
+    def select_friendly_minion(self, friendly_minions: List['Card']) -> 'Card':
+        return self.local_random.choice(friendly_minions)
+
+    def select_enemy_minion(self, enemy_minions: List['Card']) -> 'Card':
+        return self.local_random.choice(enemy_minions)
+
+    def select_discover_card(self, discoverables: List['Card']) -> 'Card':
+        return self.local_random.choice(discoverables)
+
+    def select_from_store(self, store: List['Card']) -> 'Card':
+        return self.local_random.choice(store)
+
+    def select_gain_card(self, cards: List['Card']) -> 'Card':
+        return self.local_random.choice(cards)
+
+    def select_hero(self, hero_pool: List['Hero']) -> 'Hero':
+        return self.local_random.choice(hero_pool)
+
+    def select_summon_minion(self, cards: List['Card']) -> 'Card':
+        return self.local_random.choice(cards)
+
+    def select_add_to_store(self, cards: List['Card']) -> 'Card':
+        return self.local_random.choice(cards)
+
+    def select_monster_type(self, monster_types: List['MONSTER_TYPES'], round_number: int) -> 'MONSTER_TYPES':
+        return self.round_stream(round_number, "monster_type").choice(monster_types)
@@ -1,24 +1,58 @@
-from typing import Dict
+import copy
+from typing import Dict, Optional, Union
 
 from hearthstone import combat, hero
 from hearthstone.events import EVENTS
-from hearthstone.cards import CardList, CardEvent, PrintingPress
+from hearthstone.cards import CardList, CountedCardList, CardEvent, PrintingPress
 from hearthstone.combat import WarParty
 from hearthstone.hero import Hero, EmptyHero
 from hearthstone.player import Player
-from hearthstone.randomizer import DefaultRandomizer
+from hearthstone.randomizer import DefaultRandomizer, Randomizer
 
 
 class Tavern:
-    def __init__(self):
+    def __init__(self, randomizer: Optional[Randomizer] = None, deck: Optional[Union[CardList, CountedCardList]] = None):
         self.players: Dict[str, Player] = {}
-        self.deck: CardList = PrintingPress.make_cards()
+        self.deck: Union[CardList, CountedCardList] = deck if deck is not None else PrintingPress.make_cards()
         self.hero_pool = [hero_type() for hero_type in hero.VALHALLA * 3]
         self.turn_count = 0
         self.current_player_pairings = []
-        self.randomizer = DefaultRandomizer()
+        self.randomizer = randomizer or DefaultRandomizer()
         self.losers = []
 
+    def fork(self, share_cards: bool = True) -> 'Tavern':
+        """
+        An independent copy of the game: players, card pool and randomizer. Cards in the pool are shared until one of
+        the two taverns takes them, so a fork costs about as much as copying the cards players hold.
+
+        Sharing makes both taverns copy the cards they take from the pool. With share_cards=False the pool is copied
+        up front instead, so this tavern keeps taking its own cards, e.g. when many forks are made from the copy.
+        """
+        forked = object.__new__(Tavern)
+        forked.__dict__.update(self.__dict__)
+        forked.deck = self.deck.fork(share_cards)
+        forked.randomizer = self.randomizer.fork()
+        forked.players = {name: player.fork(forked) for name, player in self.players.items()}
+        #  Heroes left in the pool are only handed out while players join, after that the pool is never changed
+        if any(player.hero is None for player in self.players.values()) or not self.players:
+            forked.hero_pool = [copy.copy(hero) for hero in self.hero_pool]
+        else:
+            forked.hero_pool = self.hero_pool.copy()
+        forked.current_player_pairings = [(forked.players[player_1.name], forked.players[player_2.name])
+                                          for player_1, player_2 in self.current_player_pairings]
+        forked.losers = [(name, forked.players[name]) for name, player in self.losers]
+        return forked
+
+    def snapshot(self) -> 'Tavern':
+        return self.fork()
+
+    def restore(self, snapshot: 'Tavern'):
+        #  Puts this tavern back in the state of the snapshot, which can be restored again later
+        restored = snapshot.fork()
+        self.__dict__.update(restored.__dict__)
+        for player in self.players.values():
+            player.tavern = self
+
     def select_three_heroes(self):
         hero_choices = []
         for _ in range(3):
@@ -51,7 +85,8 @@ class Tavern:
             player.decrease_tavern_upgrade_cost()
             player.broadcast_buy_phase_event(CardEvent(None, EVENTS.BUY_END))
         for player_1, player_2 in self.current_player_pairings:
-            combat.fight_boards(WarParty(player_1), WarParty(player_2), self.randomizer)
+            randomizer = self.randomizer.combat_randomizer(player_1, player_2, self.turn_count)
+            combat.fight_boards(WarParty(player_1), WarParty(player_2), randomizer)
         self.turn_count += 1
 
     def generate_pairings(self):
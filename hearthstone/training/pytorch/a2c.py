@@ -12,7 +12,7 @@ from hearthstone.ladder.ladder import Contestant, update_ratings, print_standing
 from hearthstone.training.pytorch.feedforward_net import HearthstoneFFNet
 from hearthstone.training.pytorch.hearthstone_state_encoder import Transition, get_indexed_action, \
     DEFAULT_PLAYER_ENCODING, DEFAULT_CARDS_ENCODING
-from hearthstone.training.pytorch.policy_gradient import easier_contestants, tensorize_batch
+from hearthstone.training.pytorch.policy_gradient import easier_contestants
 from hearthstone.training.pytorch.pytorch_bot import PytorchBot
 from hearthstone.training.pytorch.replay_buffer import ReplayBuffer, SurveiledPytorchBot
 
@@ -24,9 +24,8 @@ def learn(tensorboard: SummaryWriter, optimizer: optim.Adam, learning_net: nn.Mo
     if len(replay_buffer) < batch_size:
         return
 
-    transitions: List[Transition] = replay_buffer.sample(batch_size)
+    transition_batch = replay_buffer.sample(batch_size)
     replay_buffer.clear()
-    transition_batch = tensorize_batch(transitions)
     # TODO turn off gradient here
     # Note transition_batch.valid_actions is not the set of valid actions from the next state, but we are ignoring the policy network here so it doesn't matter
     next_policy_, next_value = learning_net(transition_batch.next_state, transition_batch.valid_actions)
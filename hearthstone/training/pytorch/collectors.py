@@ -0,0 +1,211 @@
+import queue
+import random
+from typing import List, Dict, Callable, Any, Optional
+
+import torch
+import torch.multiprocessing as mp
+from torch import nn
+
+from hearthstone.agent import Agent
+from hearthstone.host import RoundRobinHost, BatchedHost
+from hearthstone.ladder.ladder import Contestant, update_ratings
+from hearthstone.training.pytorch.hearthstone_state_encoder import Transition
+from hearthstone.training.pytorch.replay_buffer import ReplayBuffer, SurveiledPytorchBot
+
+
+class Worker:
+    """
+    Keeps num_games games of the learning bot against sampled opponents going in lockstep on a BatchedHost,
+    starting a new game whenever one ends.
+    """
+    def __init__(self, learning_bot_contestant: Contestant, other_contestants: List[Contestant], num_games: int):
+        self.other_contestants = other_contestants
+        self.learning_bot_contestant = learning_bot_contestant
+        self.batched_host = BatchedHost()
+        self.round_contestants: Dict[RoundRobinHost, List[Contestant]] = {}
+        self.round_agents: Dict[RoundRobinHost, Dict[str, Agent]] = {}
+        for _ in range(num_games):
+            self._start_new_game()
+
+    def _start_new_game(self):
+        round_contestants = [self.learning_bot_contestant] + random.sample(self.other_contestants, k=7)
+        agents = {contestant.name: contestant.agent_pool.acquire() for contestant in round_contestants}
+        host = RoundRobinHost(agents)
+        self.round_contestants[host] = round_contestants
+        self.round_agents[host] = agents
+        self.batched_host.add_host(host)
+
+    def play_step(self) -> List[List[Contestant]]:
+        """
+        Ratings are left to the caller, see rate_game.
+
+        Returns: The contestants of each game that finished during this step, from winner to loser
+        """
+        results = []
+        for host in self.batched_host.step():
+            winner_names = list(reversed([name for name, player in host.tavern.losers]))
+            round_contestants = self.round_contestants.pop(host)
+            agents = self.round_agents.pop(host)
+            ranked_contestants = sorted(round_contestants, key=lambda c: winner_names.index(c.name))
+            for contestant in round_contestants:
+                contestant.agent_pool.release(agents[contestant.name])
+            results.append(ranked_contestants)
+            self._start_new_game()
+        return results
+
+
+def rate_game(ranked_contestants: List[Contestant]):
+    update_ratings(ranked_contestants)
+    for contestant in ranked_contestants:
+        contestant.games_played += 1
+
+
+def map_tensors(function: Callable[[Any], Any], batch: Any) -> Any:
+    #  Applies function to every tensor or array of a TransitionBatch, which is made of nested namedtuples
+    if isinstance(batch, tuple):
+        return type(batch)(*(map_tensors(function, value) for value in batch))
+    return function(batch)
+
+
+class QueueingReplayBuffer(ReplayBuffer):
+    """
+    Collects transitions in a collector process and sends them to the learner in chunks, so a whole chunk crosses the
+    process boundary together.
+
+    Chunks are sent as numpy arrays, which are pickled into the queue's pipe. Tensors would be sent as handles to
+    shared memory, which the learner has to fetch from this process.
+    """
+    def __init__(self, send: Callable[[tuple], None], chunk_size: int):
+        super().__init__(chunk_size)
+        self.send = send
+
+    def push(self, transition: Transition):
+        super().push(transition)
+        if len(self) == self.capacity:
+            self.send(("transitions", map_tensors(torch.Tensor.numpy, self.gather(torch.arange(self.capacity)))))
+            self.clear()
+
+
+def collect(net_factory: Callable[[], nn.Module], contestants_factory: Callable[[], List[Contestant]],
+            learning_bot_name: str, num_games: int, chunk_size: int, seed: int, shared_net: nn.Module,
+            weights_version: mp.Value, weights_lock: mp.Lock, message_queue: mp.Queue, stop: mp.Event):
+    """
+    Collector process entry point: plays games with a local copy of the shared policy weights, refreshing it whenever
+    the learner publishes new ones.
+    """
+    torch.set_num_threads(1)
+    #  Whatever is unread when the learner stops is abandoned rather than waited for.
+    message_queue.cancel_join_thread()
+    random.seed(seed)
+    torch.manual_seed(seed)
+
+    def send(message: tuple):
+        #  Waits while the queue is full, so collectors can't run ahead of the learner, but gives up once it stops
+        while not stop.is_set():
+            try:
+                message_queue.put(message, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    net = net_factory()
+    local_version = -1
+    replay_buffer = QueueingReplayBuffer(send, chunk_size)
+    learning_bot_contestant = Contestant(learning_bot_name, lambda: SurveiledPytorchBot(net, replay_buffer))
+    worker = Worker(learning_bot_contestant, contestants_factory(), num_games)
+    while not stop.is_set():
+        if weights_version.value != local_version:
+            with weights_lock:
+                net.load_state_dict(shared_net.state_dict())
+                local_version = weights_version.value
+        #  Only the learner rates games, these contestants are this process's copies
+        for ranked_contestants in worker.play_step():
+            send(("result", [contestant.name for contestant in ranked_contestants]))
+
+
+class CollectorPool:
+    """
+    Runs self-play games in separate processes. The learner publishes its weights through shared memory, and the
+    collectors stream transitions and game results back through a queue.
+
+    net_factory and contestants_factory are called in the collector processes, so they must be picklable when
+    start_method is 'spawn', or on platforms that spawn by default. Spawn when the learner runs other threads, as a
+    forked collector can inherit locks those threads hold. At most max_queued_messages messages wait in the queue;
+    collectors block when it is full.
+    """
+    def __init__(self, net_factory: Callable[[], nn.Module], contestants_factory: Callable[[], List[Contestant]],
+                 learning_bot_name: str, num_processes: int, games_per_process: int, chunk_size: int = 32,
+                 seed: int = 0, max_queued_messages: int = 64, start_method: Optional[str] = None):
+        context = mp.get_context(start_method)
+        self.shared_net = net_factory()
+        self.shared_net.share_memory()
+        self.weights_version = context.Value('i', 0)
+        self.weights_lock = context.Lock()
+        self.message_queue = context.Queue(maxsize=max_queued_messages)
+        self.stop = context.Event()
+        self.processes = [context.Process(target=collect,
+                                     args=(net_factory, contestants_factory, learning_bot_name, games_per_process,
+                                           chunk_size, seed + index, self.shared_net, self.weights_version,
+                                           self.weights_lock, self.message_queue, self.stop),
+                                     daemon=True)
+                          for index in range(num_processes)]
+
+    def start(self, net: nn.Module):
+        self.publish(net)
+        for process in self.processes:
+            process.start()
+
+    def publish(self, net: nn.Module):
+        with self.weights_lock:
+            self.shared_net.load_state_dict(net.state_dict())
+            self.weights_version.value += 1
+
+    def drain(self, replay_buffer: ReplayBuffer, contestants: Dict[str, Contestant], timeout: float = 10.0) -> int:
+        """
+        Waits for at least one message from the collectors, then takes every message already waiting.
+
+        Args:
+            replay_buffer: Receives the transitions.
+            contestants: The learner's contestants by name, whose ratings are updated with the game results.
+            timeout: Seconds to wait for the first message. If none comes while every collector is still running,
+                no games finished.
+
+        Returns: The number of games that finished
+
+        Raises:
+            RuntimeError: A collector process died.
+        """
+        games = 0
+        try:
+            message = self.message_queue.get(timeout=timeout)
+        except queue.Empty:
+            self.check_collectors()
+            return games
+        while True:
+            kind, payload = message
+            if kind == "transitions":
+                replay_buffer.push_batch(map_tensors(torch.from_numpy, payload))
+            else:
+                rate_game([contestants[name] for name in payload])
+                games += 1
+            try:
+                message = self.message_queue.get_nowait()
+            except queue.Empty:
+                return games
+
+    def check_collectors(self):
+        dead = [f"collector {index} (exit code {process.exitcode})" for index, process in enumerate(self.processes)
+                if not process.is_alive()]
+        if dead:
+            raise RuntimeError(f"{', '.join(dead)} stopped, see its output for the error")
+
+    def close(self):
+        self.stop.set()
+        for process in self.processes:
+            process.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
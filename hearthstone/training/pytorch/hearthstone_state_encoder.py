@@ -1,8 +1,9 @@
-import copy
+import array
 import enum
 from collections import namedtuple
 from typing import Callable, List, Any, Optional, Dict
 
+import numpy
 import torch
 
 from hearthstone.agent import TripleRewardsAction, TavernUpgradeAction, RerollAction, \
@@ -16,12 +17,12 @@ State = namedtuple('State', ('player_tensor', 'cards_tensor'))
 Transition = namedtuple('Transition',
                         ('state', 'valid_actions', 'action', 'action_prob', 'next_state', 'reward', 'is_terminal'))
 
+StateBatch = namedtuple('StateBatch', ('player_tensor', 'cards_tensor'))
+TransitionBatch = namedtuple('TransitionBatch', ('state', 'valid_actions', 'action', 'action_prob',  'next_state', 'reward', 'is_terminal'))
+
 
 def frozen_player(player: Player) -> Player:
-    player = copy.copy(player)
-    player.tavern = None
-    player = copy.deepcopy(player)
-    return player
+    return player.fork(None)
 
 
 MAX_ENCODED_STORE = 7
@@ -41,11 +42,26 @@ class LocatedCard:
         self.location = location
 
 
+#  Kinds of slots in a compiled encoding plan. Every slot is a tuple starting with its kind and its offset into the
+#  flattened encoding.
+SCALAR_SLOT = 0  # (kind, offset, feat)
+ONEHOT_SLOT = 1  # (kind, offset, extractor)
+SORTED_SLOT = 2  # (kind, offset, extractor, width)
+LIST_SLOT = 3  # (kind, offset, extractor, width, stride, element slots)
+FEATURE_SLOT = 4  # (kind, offset, feature), falls back to Feature.encode
+
+
 class Feature:
 
     def fill_tensor(self, obj: Any, view: torch.Tensor):
         pass
 
+    def compile_slots(self, offset: int) -> List[tuple]:
+        return [(FEATURE_SLOT, offset, self)]
+
+    def compile(self) -> 'CompiledFeature':
+        return CompiledFeature(self)
+
     def size(self) -> torch.Size:
         pass
 
@@ -72,6 +88,9 @@ class ScalarFeature(Feature):
     def fill_tensor(self, obj: Any, view: torch.Tensor):
         view.data[0] = self.feat(obj)
 
+    def compile_slots(self, offset: int) -> List[tuple]:
+        return [(SCALAR_SLOT, offset, self.feat)]
+
     def size(self) -> torch.Size:
         return torch.Size([1])
 
@@ -88,6 +107,9 @@ class OnehotFeature(Feature):
     def fill_tensor(self, obj: Any, view: torch.Tensor):
         view[self.extractor(obj)] = 1.0
 
+    def compile_slots(self, offset: int) -> List[tuple]:
+        return [(ONEHOT_SLOT, offset, self.extractor)]
+
     def size(self) -> torch.Size:
         return torch.Size([self.num_classes])
 
@@ -107,6 +129,13 @@ class CombinedFeature(Feature):
             feature.fill_tensor(obj, view.narrow(0, start, size[0]))
             start += size[0]
 
+    def compile_slots(self, offset: int) -> List[tuple]:
+        slots = []
+        for feature in self.features:
+            slots += feature.compile_slots(offset)
+            offset += feature.flattened_size()
+        return slots
+
     def size(self) -> torch.Size:
         sizes = [feature.size() for feature in self.features]
         dimension_sum = 0
@@ -132,6 +161,10 @@ class ListOfFeatures(Feature):
         for i, value in enumerate(values_to_encode):
             self.feature.fill_tensor(value, view.narrow(0, i, 1).squeeze(0))
 
+    def compile_slots(self, offset: int) -> List[tuple]:
+        return [(LIST_SLOT, offset, self.extractor, self.width, self.feature.flattened_size(),
+                 self.feature.compile_slots(0))]
+
     def size(self):
         return torch.Size((self.width,) + self.feature.size())
 
@@ -152,6 +185,9 @@ class SortedByValueFeature(Feature):
         for i, value in enumerate(sorted_values):
             view[i] = value
 
+    def compile_slots(self, offset: int) -> List[tuple]:
+        return [(SORTED_SLOT, offset, self.extractor, self.width)]
+
     def size(self):
         return torch.Size((self.width,))
 
@@ -159,6 +195,66 @@ class SortedByValueFeature(Feature):
         return self._dtype
 
 
+def run_slots(slots: List[tuple], obj: Any, buffer: 'array.array', base: int):
+    for slot in slots:
+        kind = slot[0]
+        offset = base + slot[1]
+        if kind == SCALAR_SLOT:
+            buffer[offset] = slot[2](obj)
+        elif kind == ONEHOT_SLOT:
+            buffer[offset + slot[2](obj)] = 1.0
+        elif kind == SORTED_SLOT:
+            values_to_encode = slot[2](obj)
+            #  A longer list would run into the next row of the batch
+            assert (len(values_to_encode) <= slot[3])
+            for i, value in enumerate(sorted(values_to_encode)):
+                buffer[offset + i] = value
+        elif kind == LIST_SLOT:
+            values_to_encode = slot[2](obj)
+            assert (len(values_to_encode) <= slot[3])
+            stride = slot[4]
+            for i, value in enumerate(values_to_encode):
+                run_slots(slot[5], value, buffer, offset + i * stride)
+        else:
+            for i, value in enumerate(slot[2].encode(obj).flatten().tolist()):
+                buffer[offset + i] = value
+
+
+#  Array type codes and numpy types of the buffers compiled features encode into
+BUFFER_TYPES = {
+    torch.float32: ('f', numpy.float32),
+    torch.float64: ('d', numpy.float64),
+}
+
+
+class CompiledFeature:
+    """
+    A Feature flattened once into a static list of slots, so encoding is a single loop writing into a flat buffer
+    instead of a walk over the Feature tree writing tensor elements one at a time. Produces the same layout as the
+    Feature it was compiled from.
+
+    A batch is encoded into one zeroed array allocated up front, which the returned tensor wraps without a copy.
+    """
+    def __init__(self, feature: Feature):
+        self.feature = feature
+        self.size = torch.Size(feature.size())
+        self.dtype = feature.dtype()
+        self.typecode, self.numpy_dtype = BUFFER_TYPES[self.dtype]
+        self.itemsize = array.array(self.typecode).itemsize
+        self.flattened_size = feature.flattened_size()
+        self.slots = feature.compile_slots(0)
+
+    def encode(self, obj: Any) -> torch.Tensor:
+        return self.encode_batch([obj])[0]
+
+    def encode_batch(self, objs: List[Any]) -> torch.Tensor:
+        buffer = array.array(self.typecode, bytes(self.itemsize * self.flattened_size * len(objs)))
+        for row, obj in enumerate(objs):
+            run_slots(self.slots, obj, buffer, row * self.flattened_size)
+        return torch.from_numpy(numpy.frombuffer(buffer, dtype=self.numpy_dtype)).view(
+            (len(objs),) + tuple(self.size))
+
+
 def enum_to_int(value: Optional[enum.Enum]) -> int:
     if value is not None:
         return value.value
@@ -204,9 +300,11 @@ def default_cards_encoding() -> Feature:
 
     Encodes a `Player`.
     """
+    #  Cards like Ysera add to a full store, so it can outgrow its slots. Cards past the last slot are not encoded
+    #  and, as there are no actions for them either, can't be bought by the net.
     return CombinedFeature([
         ListOfFeatures(
-            lambda player: [LocatedCard(card, CardLocation.STORE) for card in player.store],
+            lambda player: [LocatedCard(card, CardLocation.STORE) for card in player.store[:MAX_ENCODED_STORE]],
             default_card_encoding(), MAX_ENCODED_STORE),
         ListOfFeatures(
             lambda player: [LocatedCard(card, CardLocation.HAND) for card in player.hand],
@@ -219,14 +317,23 @@ def default_cards_encoding() -> Feature:
 
 DEFAULT_PLAYER_ENCODING = default_player_encoding()
 DEFAULT_CARDS_ENCODING = default_cards_encoding()
+COMPILED_PLAYER_ENCODING = DEFAULT_PLAYER_ENCODING.compile()
+COMPILED_CARDS_ENCODING = DEFAULT_CARDS_ENCODING.compile()
 
 
 def encode_player(player: Player) -> State:
-    player_tensor = DEFAULT_PLAYER_ENCODING.encode(player)
-    cards_tensor = DEFAULT_CARDS_ENCODING.encode(player)
+    player_tensor = COMPILED_PLAYER_ENCODING.encode(player)
+    cards_tensor = COMPILED_CARDS_ENCODING.encode(player)
     return State(player_tensor, cards_tensor)
 
 
+def encode_players(players: List[Player]) -> State:
+    """
+    Encodes many players at once. Row i of each tensor equals the encoding of `players[i]` by `encode_player`.
+    """
+    return State(COMPILED_PLAYER_ENCODING.encode_batch(players), COMPILED_CARDS_ENCODING.encode_batch(players))
+
+
 EncodedActionSet = namedtuple('EncodedActionSet', ('player_action_tensor', 'card_action_tensor'))
 
 ActionSet = namedtuple('ActionSet', ('player_action_set', 'card_action_set'))
@@ -285,7 +392,7 @@ def _all_actions_dict():
 ALL_ACTIONS_DICT: Dict[str, int] = _all_actions_dict()
 
 
-def encode_valid_actions(player: Player) -> EncodedActionSet:
+def validate_all_actions(player: Player) -> EncodedActionSet:
     actions = ALL_ACTIONS
     player_action_tensor = torch.tensor([action.valid(player) for action in actions.player_action_set])
     cards_action_tensor = torch.tensor(
@@ -293,6 +400,108 @@ def encode_valid_actions(player: Player) -> EncodedActionSet:
     return EncodedActionSet(player_action_tensor, cards_action_tensor)
 
 
+#  Fingerprint of a mask row that was never validated, unequal to any real fingerprint
+UNVALIDATED = object()
+
+
+class ActionMaskTracker:
+    """
+    Keeps the valid action mask of one player between decisions and only re-validates the rows of the mask whose
+    inputs changed. Cards and heroes edit the player's hand, store and board directly, so changes are found by
+    comparing a cheap fingerprint of what each row's validator reads rather than by observing every mutation.
+    """
+    #  When set, every mask is compared against a full re-validation.
+    check_consistency = False
+
+    def __init__(self):
+        self.player_fingerprints: List[Any] = [UNVALIDATED] * len(ALL_ACTIONS.player_action_set)
+        self.card_fingerprints: List[Any] = [UNVALIDATED] * len(ALL_ACTIONS.card_action_set)
+        #  What every hand row reads besides its own card, compared once per update instead of once per row
+        self.summon_fingerprint: Any = UNVALIDATED
+        #  The player actions followed by the card actions row by row, as in the flattened action encoding
+        self.mask: List[bool] = [False] * action_encoding_size()
+        self.valid_actions: Optional[EncodedActionSet] = None
+
+    @staticmethod
+    def player_action_fingerprints(player: Player) -> List[Any]:
+        #  One entry per action of ALL_ACTIONS.player_action_set
+        return [bool(player.triple_rewards),
+                (player.tavern_tier, player.coins >= player.tavern_upgrade_cost),
+                player.coins >= player.refresh_store_cost,
+                None,
+                None]
+
+    @staticmethod
+    def summon_fingerprint_of(player: Player) -> Any:
+        #  The part of the summon rows' inputs shared by every hand row
+        return player.room_on_board(), tuple(player.in_play)
+
+    @staticmethod
+    def card_action_fingerprints(player: Player) -> List[Any]:
+        #  One entry per row of ALL_ACTIONS.card_action_set: store, then hand, then board slots.
+        #  Hand rows also depend on the summon fingerprint, which update compares separately
+        store = player.store
+        hand = player.hand
+        num_board_cards = len(player.in_play)
+        room_in_hand = player.room_in_hand()
+        fingerprints = []
+        for index in range(MAX_ENCODED_STORE):
+            if index < len(store):
+                fingerprints.append((store[index], store[index].coin_cost <= player.coins, room_in_hand))
+            else:
+                fingerprints.append(None)
+        for index in range(MAX_ENCODED_HAND):
+            fingerprints.append(hand[index] if index < len(hand) else None)
+        for index in range(MAX_ENCODED_BOARD):
+            fingerprints.append(index < num_board_cards)
+        return fingerprints
+
+    def update(self, player: Player) -> EncodedActionSet:
+        mask = self.mask
+        changed = self.valid_actions is None
+        summon_fingerprint = self.summon_fingerprint_of(player)
+        if summon_fingerprint != self.summon_fingerprint:
+            self.summon_fingerprint = summon_fingerprint
+            self.card_fingerprints[MAX_ENCODED_STORE:MAX_ENCODED_STORE + MAX_ENCODED_HAND] = \
+                [UNVALIDATED] * MAX_ENCODED_HAND
+        for index, fingerprint in enumerate(self.player_action_fingerprints(player)):
+            if fingerprint != self.player_fingerprints[index]:
+                self.player_fingerprints[index] = fingerprint
+                valid = ALL_ACTIONS.player_action_set[index].valid(player)
+                if valid != mask[index]:
+                    mask[index] = valid
+                    changed = True
+        row_start = len(ALL_ACTIONS.player_action_set)
+        for index, fingerprint in enumerate(self.card_action_fingerprints(player)):
+            card_actions = ALL_ACTIONS.card_action_set[index]
+            if fingerprint != self.card_fingerprints[index]:
+                self.card_fingerprints[index] = fingerprint
+                row = [action.valid(player) for action in card_actions]
+                if row != mask[row_start:row_start + len(row)]:
+                    mask[row_start:row_start + len(row)] = row
+                    changed = True
+            row_start += len(card_actions)
+        if changed:
+            #  A new tensor every time the mask changes, so masks handed out earlier are never modified
+            mask_tensor = torch.tensor(mask, dtype=torch.bool)
+            num_player_actions = len(ALL_ACTIONS.player_action_set)
+            self.valid_actions = EncodedActionSet(mask_tensor[:num_player_actions],
+                                                  mask_tensor[num_player_actions:].view(
+                                                      len(ALL_ACTIONS.card_action_set), -1))
+        if self.check_consistency:
+            expected = validate_all_actions(player)
+            assert torch.equal(self.valid_actions.player_action_tensor, expected.player_action_tensor) and \
+                torch.equal(self.valid_actions.card_action_tensor, expected.card_action_tensor), \
+                f"stale action mask for {player.name}"
+        return self.valid_actions
+
+
+def encode_valid_actions(player: Player) -> EncodedActionSet:
+    if player.action_mask_tracker is None:
+        player.action_mask_tracker = ActionMaskTracker()
+    return player.action_mask_tracker.update(player)
+
+
 def action_encoding_size() -> int:
     player_action_size = len(ALL_ACTIONS.player_action_set)
     card_action_size = len(ALL_ACTIONS.card_action_set) * len(ALL_ACTIONS.card_action_set[0])
@@ -0,0 +1,96 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Tuple, List, Optional
+
+import torch
+from torch import nn
+
+from hearthstone.training.pytorch.hearthstone_state_encoder import State, EncodedActionSet
+
+
+class InferenceServer:
+    """
+    Runs the forward passes of a net for many threads at once. Each call waits until a batch is full or the oldest
+    request in it has waited max_wait_secs, then the whole batch goes through the net in one forward pass.
+
+    The server is called like the net it wraps, so it can be given to a PytorchBot in place of the net.
+    """
+    def __init__(self, net: nn.Module, max_batch_size: int = 64, max_wait_secs: float = 0.002):
+        self.net = net
+        self.max_batch_size = max_batch_size
+        self.max_wait_secs = max_wait_secs
+        self.requests: queue.Queue = queue.Queue()
+        self.thread: Optional[threading.Thread] = None
+        self.num_batches = 0
+        self.num_rows = 0
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is not None:
+            self.requests.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def __call__(self, state: State, valid_actions: EncodedActionSet) -> Tuple[torch.Tensor, torch.Tensor]:
+        future = Future()
+        self.requests.put((state, valid_actions, future))
+        return future.result()
+
+    def mean_batch_size(self) -> float:
+        return self.num_rows / self.num_batches if self.num_batches else 0.0
+
+    def serve(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            batch = [request]
+            rows = len(request[0].player_tensor)
+            deadline = time.monotonic() + self.max_wait_secs
+            while rows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self.requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    #  Serve what was gathered, then stop
+                    self.requests.put(None)
+                    break
+                batch.append(request)
+                rows += len(request[0].player_tensor)
+            self.run_batch(batch)
+
+    def run_batch(self, batch: List[Tuple[State, EncodedActionSet, Future]]):
+        sizes = [len(state.player_tensor) for state, valid_actions, future in batch]
+        try:
+            with torch.no_grad():
+                policy, value = self.net(
+                    State(torch.cat([state.player_tensor for state, valid_actions, future in batch]),
+                          torch.cat([state.cards_tensor for state, valid_actions, future in batch])),
+                    EncodedActionSet(
+                        torch.cat([valid_actions.player_action_tensor for state, valid_actions, future in batch]),
+                        torch.cat([valid_actions.card_action_tensor for state, valid_actions, future in batch])))
+        except Exception as e:
+            for state, valid_actions, future in batch:
+                future.set_exception(e)
+            return
+        self.num_batches += 1
+        self.num_rows += sum(sizes)
+        for (state, valid_actions, future), request_policy, request_value in zip(batch, policy.split(sizes),
+                                                                                   value.split(sizes)):
+            future.set_result((request_policy, request_value))
@@ -24,6 +24,14 @@ class WelfordAggregator:
     def stdev(self):
         return torch.sqrt(self.variance())
 
+    def state_dict(self):
+        return {"count": self.count, "mean": self.mean, "m2": self.m2}
+
+    def load_state_dict(self, state_dict):
+        self.count = state_dict["count"]
+        self.mean = state_dict["mean"].clone()
+        self.m2 = state_dict["m2"].clone()
+
 # as per https://openreview.net/pdf?id=r1etN1rtPB
 # appending A2
 class PPONormalizer:
@@ -40,3 +48,10 @@ class PPONormalizer:
         else:
             return value
 
+    def state_dict(self):
+        return {"exponential_mean": self.exponential_mean, "welford_aggregator": self.welford_aggregator.state_dict()}
+
+    def load_state_dict(self, state_dict):
+        self.exponential_mean = state_dict["exponential_mean"].clone()
+        self.welford_aggregator.load_state_dict(state_dict["welford_aggregator"])
+
@@ -1,4 +1,3 @@
-import joblib
 import optuna
 
 from hearthstone.training.pytorch.ppo import ppo
@@ -18,6 +17,10 @@ def objective(trial: optuna.Trial):
         "normalize_advantage": trial.suggest_categorical("normalize_advantage", [True, False]),
     }
     hparams["num_workers"] = trial.suggest_int("num_workers", 1, hparams["batch_size"], log=True)
+    #  Trials run on threads, so games are played in collector processes. Those are spawned, as a fork would copy
+    #  whatever locks the other trials' threads hold at the time.
+    hparams["num_collectors"] = trial.suggest_int("num_collectors", 1, 4)
+    hparams["collector_start_method"] = "spawn"
 
     if hparams["optimizer"] == "adam":
         hparams["adam_lr"] = trial.suggest_float("adam_lr", 1e-6, 1e-3, log=True)
@@ -41,8 +44,8 @@ def main():
                                 pruner=optuna.pruners.NopPruner())
     try:
         try:
-            with joblib.parallel_backend("multiprocessing"):
-                study.optimize(objective, n_jobs=10, catch=(RuntimeError,))
+            #  Not on joblib's multiprocessing backend: its workers are daemons, which can't start collectors
+            study.optimize(objective, n_jobs=10, catch=(RuntimeError,))
         except KeyboardInterrupt:
             pass
     except Exception as e:
@@ -1,4 +1,4 @@
-from collections import namedtuple
+import functools
 from typing import List
 
 import torch
@@ -18,7 +18,7 @@ from hearthstone.ladder.ladder import Contestant
 from hearthstone.monster_types import MONSTER_TYPES
 from hearthstone.tavern import Tavern
 from hearthstone.training.pytorch.hearthstone_state_encoder import encode_player, encode_valid_actions, Transition, \
-    EncodedActionSet
+    EncodedActionSet, StateBatch, TransitionBatch
 
 
 def add_net_to_tensorboard(tensorboard: SummaryWriter, net: nn.Module):
@@ -33,20 +33,20 @@ def add_net_to_tensorboard(tensorboard: SummaryWriter, net: nn.Module):
 
 
 def easiest_contestants():
-    all_bots = [Contestant(f"RandomBot {i}", lambda: RandomBot(i)) for i in range(20)]
+    all_bots = [Contestant(f"RandomBot {i}", functools.partial(RandomBot, i)) for i in range(20)]
     all_bots += [Contestant(f"NoActionBot ", lambda: NoActionBot())]
     all_bots += [Contestant(f"CheapoBot", lambda: CheapoBot(3))]
     return all_bots
 
 
 def easier_contestants():
-    all_bots = [Contestant(f"RandomBot {i}", lambda: RandomBot(i)) for i in range(20)]
+    all_bots = [Contestant(f"RandomBot {i}", functools.partial(RandomBot, i)) for i in range(20)]
     all_bots += [Contestant(f"NoActionBot ", lambda: NoActionBot())]
     all_bots += [Contestant(f"CheapoBot", lambda: CheapoBot(3))]
-    all_bots += [Contestant(f"SupremacyBot {t}", lambda: SupremacyBot(t, False, i)) for i, t in
+    all_bots += [Contestant(f"SupremacyBot {t}", functools.partial(SupremacyBot, t, False, i)) for i, t in
                  enumerate([MONSTER_TYPES.MURLOC, MONSTER_TYPES.BEAST, MONSTER_TYPES.MECH, MONSTER_TYPES.DRAGON,
                             MONSTER_TYPES.DEMON, MONSTER_TYPES.PIRATE])]
-    all_bots += [Contestant(f"SupremacyUpgradeBot {t}", lambda: SupremacyBot(t, True, i)) for i, t in
+    all_bots += [Contestant(f"SupremacyUpgradeBot {t}", functools.partial(SupremacyBot, t, True, i)) for i, t in
                  enumerate([MONSTER_TYPES.MURLOC, MONSTER_TYPES.BEAST, MONSTER_TYPES.MECH, MONSTER_TYPES.DRAGON,
                             MONSTER_TYPES.DEMON, MONSTER_TYPES.PIRATE])]
     all_bots += [Contestant("SauroliskBot", lambda: SauroliskBot(5))]
@@ -57,20 +57,16 @@ def easy_contestants():
     all_bots = [Contestant(f"RandomBot",lambda: RandomBot(1))]
     all_bots += [Contestant(f"NoActionBot ", lambda: NoActionBot())]
     all_bots += [Contestant(f"CheapoBot", lambda: CheapoBot(3))]
-    all_bots += [Contestant(f"SupremacyBot {t}", lambda: SupremacyBot(t, False, i)) for i, t in
+    all_bots += [Contestant(f"SupremacyBot {t}", functools.partial(SupremacyBot, t, False, i)) for i, t in
                  enumerate([MONSTER_TYPES.MURLOC, MONSTER_TYPES.BEAST, MONSTER_TYPES.MECH, MONSTER_TYPES.DRAGON,
                             MONSTER_TYPES.DEMON, MONSTER_TYPES.PIRATE])]
-    all_bots += [Contestant(f"SupremacyUpgradeBot {t}", lambda: SupremacyBot(t, True, i)) for i, t in
+    all_bots += [Contestant(f"SupremacyUpgradeBot {t}", functools.partial(SupremacyBot, t, True, i)) for i, t in
                  enumerate([MONSTER_TYPES.MURLOC, MONSTER_TYPES.BEAST, MONSTER_TYPES.MECH, MONSTER_TYPES.DRAGON,
                             MONSTER_TYPES.DEMON, MONSTER_TYPES.PIRATE])]
     all_bots += [Contestant("SauroliskBot", lambda: SauroliskBot(5))]
     all_bots += [Contestant("PriorityHealthAttackBot",lambda:  attack_health_priority_bot(10, PriorityBot))]
     return all_bots
 
-StateBatch = namedtuple('StateBatch', ('player_tensor', 'cards_tensor'))
-TransitionBatch = namedtuple('TransitionBatch', ('state', 'valid_actions', 'action', 'action_prob',  'next_state', 'reward', 'is_terminal'))
-
-
 # TODO: Delete all of this
 def tensorize_batch(transitions: List[Transition]) -> TransitionBatch:
     player_tensor = torch.stack([transition.state.player_tensor for transition in transitions])
@@ -1,5 +1,5 @@
+import functools
 import logging
-import random
 import time
 from datetime import datetime
 from typing import List, Dict
@@ -9,53 +9,14 @@ import trueskill
 from torch import optim, nn
 from torch.utils.tensorboard import SummaryWriter
 
-from hearthstone.host import RoundRobinHost
-from hearthstone.ladder.ladder import Contestant, update_ratings, load_ratings, print_standings
+from hearthstone.ladder.ladder import Contestant, load_ratings
+from hearthstone.training.pytorch.collectors import Worker, CollectorPool, rate_game
 from hearthstone.training.pytorch.feedforward_net import HearthstoneFFNet
 from hearthstone.training.pytorch.hearthstone_state_encoder import Transition, get_indexed_action, \
     DEFAULT_PLAYER_ENCODING, DEFAULT_CARDS_ENCODING
-from hearthstone.training.pytorch.policy_gradient import tensorize_batch, easy_contestants
+from hearthstone.training.pytorch.policy_gradient import easy_contestants
 from hearthstone.training.pytorch.replay_buffer import ReplayBuffer, SurveiledPytorchBot, NormalizingReplayBuffer
-
-
-class Worker:
-    def __init__(self, learning_bot_contestant: Contestant, other_contestants: List[Contestant]):
-        self.other_contestants = other_contestants
-        self.learning_bot_contestant = learning_bot_contestant
-        self.host = None
-        self.round_contestants = None
-        self.one_step_generator = None
-        self.learning_bot_agent = None
-        self._start_new_game()
-
-    def _start_new_game(self):
-        self.round_contestants = [self.learning_bot_contestant] + random.sample(self.other_contestants, k=7)
-        self.host = RoundRobinHost( {contestant.name: contestant.agent_generator() for contestant in self.round_contestants})
-        self.learning_bot_agent = self.host.agents[self.learning_bot_contestant.name]
-        self.host.start_game()
-        self.one_step_generator = self.host.play_round_generator()
-
-    def play_round(self):
-        last_replay_buffer_position = self.learning_bot_agent.replay_buffer.position
-        while self.learning_bot_agent.replay_buffer.position == last_replay_buffer_position:
-            try:
-               next(self.one_step_generator)
-            except StopIteration as e:
-                if self.host.game_over():
-                    winner_names = list(reversed([name for name, player in self.host.tavern.losers]))
-                    # print("---------------------------------------------------------------")
-                    # print(winner_names)
-                    # print(self.host.tavern.players[self.learning_bot_contestant.name].in_play)
-                    ranked_contestants = sorted(self.round_contestants, key=lambda c: winner_names.index(c.name))
-                    update_ratings(ranked_contestants)
-                    # print_standings([self.learning_bot_contestant] + self.other_contestants)
-                    for contestant in self.round_contestants:
-                        contestant.games_played += 1
-
-                    self._start_new_game()
-                else:
-                    self.one_step_generator = self.host.play_round_generator()
-
+from hearthstone.training.pytorch.transition_store import resume_run, save_checkpoint
 
 
 # TODO STOP THIS HACK
@@ -64,8 +25,7 @@ expensive_tensorboard = False
 enable_crashing_tensorboard = False
 def learn(tensorboard: SummaryWriter, optimizer: optim.Optimizer, learning_net: nn.Module, replay_buffer: ReplayBuffer, batch_size, policy_weight, entropy_weight, ppo_epsilon, gradient_clipping, normalize_advantage, global_step):
     global expensive_tensorboard
-    transitions: List[Transition] = replay_buffer.sample(batch_size)
-    transition_batch = tensorize_batch(transitions)
+    transition_batch = replay_buffer.sample(batch_size)
     # TODO turn off gradient here
     # Note transition_batch.valid_actions is not the set of valid actions from the next state, but we are ignoring the policy network here so it doesn't matter
     next_policy_, next_value = learning_net(transition_batch.next_state, transition_batch.valid_actions)
@@ -126,6 +86,13 @@ def learn(tensorboard: SummaryWriter, optimizer: optim.Optimizer, learning_net:
             tensorboard.add_histogram(f"gradients_{tag}/train", parm.grad.data, global_step)
 
 
+def make_learning_net(hparams: Dict) -> HearthstoneFFNet:
+    return HearthstoneFFNet(DEFAULT_PLAYER_ENCODING, DEFAULT_CARDS_ENCODING, hparams["nn_hidden_layers"],
+                            hparams.get("nn_hidden_size") or 0,
+                            hparams.get("nn_shared") or False,
+                            hparams.get("nn_activation") or "")
+
+
 def ppo(hparams: Dict, time_limit_secs=None, early_stopper= None):
     start_time = time.time()
     last_reported_time = start_time
@@ -133,10 +100,7 @@ def ppo(hparams: Dict, time_limit_secs=None, early_stopper= None):
 
     tensorboard = SummaryWriter(f"../../../data/learning/pytorch/tensorboard/{datetime.now().isoformat()}")
     logging.getLogger().setLevel(logging.INFO)
-    learning_net = HearthstoneFFNet(DEFAULT_PLAYER_ENCODING, DEFAULT_CARDS_ENCODING, hparams["nn_hidden_layers"],
-                                    hparams.get("nn_hidden_size") or 0,
-                                    hparams.get("nn_shared") or False,
-                                    hparams.get("nn_activation") or "")
+    learning_net = make_learning_net(hparams)
     if hparams["optimizer"] == "adam":
         optimizer = optim.Adam(learning_net.parameters(), lr=hparams["adam_lr"])
     elif hparams["optimizer"] == "sgd":
@@ -149,17 +113,39 @@ def ppo(hparams: Dict, time_limit_secs=None, early_stopper= None):
         replay_buffer = NormalizingReplayBuffer(replay_buffer_size, 0.99, DEFAULT_PLAYER_ENCODING, DEFAULT_CARDS_ENCODING)
     else:
         replay_buffer = ReplayBuffer(replay_buffer_size)
+    #  A run given a transition store keeps every transition it collects there and checkpoints itself after
+    #  learning. Started again on the same store, it carries on from its last checkpoint.
+    transition_store_path = hparams.get("transition_store_path")
+    transition_store = None
+    if transition_store_path:
+        transition_store, global_step = resume_run(transition_store_path, learning_net, optimizer, replay_buffer)
     learning_bot_contestant = Contestant("LearningBot", lambda: SurveiledPytorchBot(learning_net, replay_buffer))
     learning_bot_contestant.trueskill = trueskill.Rating(14)
     # Reuse standings from the current leaderboard.
     other_contestants = easy_contestants()
     load_ratings(other_contestants, "../../../data/standings.json")
 
-    workers = [Worker(learning_bot_contestant, other_contestants) for _ in range(hparams['num_workers'])]
+    #  With collector processes, the num_workers games are split between them and this process only learns.
+    num_collectors = hparams.get("num_collectors") or 0
+    if num_collectors:
+        collector_pool = CollectorPool(functools.partial(make_learning_net, hparams), easy_contestants,
+                                       learning_bot_contestant.name, num_collectors,
+                                       max(1, hparams['num_workers'] // num_collectors),
+                                       start_method=hparams.get("collector_start_method"))
+        collector_pool.start(learning_net)
+        contestants_by_name = {contestant.name: contestant for contestant in other_contestants}
+        contestants_by_name[learning_bot_contestant.name] = learning_bot_contestant
+        play_step = lambda: collector_pool.drain(replay_buffer, contestants_by_name)
+    else:
+        collector_pool = None
+        worker = Worker(learning_bot_contestant, other_contestants, hparams['num_workers'])
+
+        def play_step():
+            for ranked_contestants in worker.play_step():
+                rate_game(ranked_contestants)
 
     for _ in range(1000000):
-        for worker in workers:
-            worker.play_round()
+        play_step()
         # print(len(replay_buffer))
         if len(replay_buffer) >= batch_size:
             for i in range(hparams["ppo_epochs"]):
@@ -168,6 +154,10 @@ def ppo(hparams: Dict, time_limit_secs=None, early_stopper= None):
                       global_step)
                 global_step += 1
             replay_buffer.clear()
+            if transition_store is not None:
+                save_checkpoint(transition_store, learning_net, optimizer, global_step, replay_buffer)
+            if collector_pool:
+                collector_pool.publish(learning_net)
         time_elapsed = int(time.time() - start_time)
         tensorboard.add_scalar("elo/train", learning_bot_contestant.elo, global_step=global_step)
         tensorboard.add_scalar("trueskill_mu/train", learning_bot_contestant.trueskill.mu, global_step=global_step)
@@ -180,6 +170,10 @@ def ppo(hparams: Dict, time_limit_secs=None, early_stopper= None):
         if time_limit_secs and time_elapsed > time_limit_secs:
             break
 
+    if collector_pool:
+        collector_pool.close()
+    if transition_store is not None:
+        transition_store.close()
     tensorboard.add_hparams(hparam_dict=hparams, metric_dict={"optuna_trueskill": learning_bot_contestant.trueskill.mu})
     tensorboard.close()
     return learning_bot_contestant.trueskill.mu
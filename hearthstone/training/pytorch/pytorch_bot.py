@@ -1,13 +1,13 @@
 import logging
 import random
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 import torch
 from torch import nn
 from torch.distributions import Categorical
 
 from hearthstone.agent import Agent, Action
-from hearthstone.training.pytorch.hearthstone_state_encoder import encode_player, encode_valid_actions, State, \
+from hearthstone.training.pytorch.hearthstone_state_encoder import encode_player, encode_players, encode_valid_actions, State, \
     EncodedActionSet, get_indexed_action, get_action_index, Transition
 
 import torch.nn.functional as F
@@ -19,22 +19,47 @@ class PytorchBot(Agent):
         self.authors = []
         self.net = net
 
-    def policy(self, player: 'Player') -> Categorical:
-        encoded_state: State = encode_player(player)
-        valid_actions_mask: EncodedActionSet = encode_valid_actions(player)
-        policy, value = self.net(State(encoded_state.player_tensor.unsqueeze(0),
-                                       encoded_state.cards_tensor.unsqueeze(0)),
-                                 EncodedActionSet(valid_actions_mask.player_action_tensor.unsqueeze(0),
-                                                  valid_actions_mask.card_action_tensor.unsqueeze(0)))
-        #print(player.tavern.turn_count, player.health, float(value), sorted([p.health for p in player.tavern.players.values()]), encoded_state.player_tensor)
-        #print(player.in_play)
+    def encode(self, players: List['Player']) -> Tuple[State, EncodedActionSet]:
+        #  The states and valid action masks of the players, one row per player
+        valid_actions_masks = [encode_valid_actions(player) for player in players]
+        return encode_players(players), EncodedActionSet(
+            torch.stack([mask.player_action_tensor for mask in valid_actions_masks]),
+            torch.stack([mask.card_action_tensor for mask in valid_actions_masks]))
+
+    def evaluate_policies(self, state: State, valid_actions: EncodedActionSet) -> torch.Tensor:
+        #  One forward pass for a batch of encoded players, returns a batch of log probabilities
+        with torch.no_grad():
+            policy, value = self.net(state, valid_actions)
         return policy
 
-    def buy_phase_action(self, player: 'Player') -> Action:
-        policy = self.policy(player)
+    def policies(self, players: List['Player']) -> torch.Tensor:
+        return self.evaluate_policies(*self.encode(players))
+
+    def policy(self, player: 'Player') -> torch.Tensor:
+        return self.policies([player])
+
+    def choose_action(self, player: 'Player', policy: torch.Tensor, state: State,
+                      valid_actions: EncodedActionSet) -> Action:
+        #  policy, state and valid_actions are batches of one row, the player's
         action = Categorical(torch.exp(policy)).sample()
         return get_indexed_action(int(action))
 
+    def buy_phase_action(self, player: 'Player') -> Action:
+        state, valid_actions = self.encode([player])
+        return self.choose_action(player, self.evaluate_policies(state, valid_actions), state, valid_actions)
+
+    def batch_key(self):
+        return self.net
+
+    def buy_phase_actions(self, agents: List['PytorchBot'], players: List['Player']) -> List[Action]:
+        state, valid_actions = self.encode(players)
+        policies = self.evaluate_policies(state, valid_actions)
+        return [agent.choose_action(player, policies[index:index + 1],
+                                    State(state.player_tensor[index:index + 1], state.cards_tensor[index:index + 1]),
+                                    EncodedActionSet(valid_actions.player_action_tensor[index:index + 1],
+                                                     valid_actions.card_action_tensor[index:index + 1]))
+                for index, (agent, player) in enumerate(zip(agents, players))]
+
     #TODO handle learning card and discover choice actions
     def rearrange_cards(self, player: 'Player') -> List['Card']:
         return player.in_play
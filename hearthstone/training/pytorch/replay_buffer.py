@@ -1,6 +1,7 @@
 import logging
 import random
-from typing import Optional, List
+import typing
+from typing import Optional, List, Dict
 
 import torch
 from torch import nn
@@ -8,46 +9,138 @@ from torch.distributions import Categorical
 
 from hearthstone.agent import Agent, Action
 from hearthstone.training.pytorch.hearthstone_state_encoder import Transition, State, encode_player, \
-    encode_valid_actions, EncodedActionSet, get_action_index, get_indexed_action
+    EncodedActionSet, get_action_index, get_indexed_action, Feature, StateBatch, TransitionBatch, \
+    ALL_ACTIONS, DEFAULT_PLAYER_ENCODING, DEFAULT_CARDS_ENCODING
 from hearthstone.training.pytorch.pytorch_bot import PytorchBot
 from hearthstone.training.pytorch.normalization import WelfordAggregator, PPONormalizer
 
+if typing.TYPE_CHECKING:
+    from hearthstone.training.pytorch.transition_store import TransitionStore
+
 logger = logging.getLogger(__name__)
 
 
 class ReplayBuffer:
-    def __init__(self, capacity):
+    """
+    Stores transitions column by column in tensors allocated up front, so sampling a batch is one index gather per
+    column instead of stacking the tensors of every sampled transition.
+    """
+    def __init__(self, capacity, player_encoding: Feature = DEFAULT_PLAYER_ENCODING,
+                 cards_encoding: Feature = DEFAULT_CARDS_ENCODING, pin_memory: bool = False, share_memory: bool = False):
         self.capacity = capacity
-        self.memory: List[Transition] = []
+        self.size = 0
         self.position = 0
+        num_player_actions = len(ALL_ACTIONS.player_action_set)
+        card_actions_size = (len(ALL_ACTIONS.card_action_set), len(ALL_ACTIONS.card_action_set[0]))
+        self.player_tensor = torch.empty((capacity,) + tuple(player_encoding.size()), dtype=player_encoding.dtype())
+        self.cards_tensor = torch.empty((capacity,) + tuple(cards_encoding.size()), dtype=cards_encoding.dtype())
+        self.valid_player_actions_tensor = torch.empty((capacity, num_player_actions), dtype=torch.bool)
+        self.valid_card_actions_tensor = torch.empty((capacity,) + card_actions_size, dtype=torch.bool)
+        self.action_tensor = torch.empty(capacity, dtype=torch.long)
+        self.action_prob_tensor = torch.empty(capacity, dtype=torch.float)
+        self.next_player_tensor = torch.empty_like(self.player_tensor)
+        self.next_cards_tensor = torch.empty_like(self.cards_tensor)
+        self.reward_tensor = torch.empty(capacity, dtype=torch.float)
+        self.is_terminal_tensor = torch.empty(capacity, dtype=torch.bool)
+        #  Receives a copy of every transition pushed, see resume_transition_store
+        self.store: Optional['TransitionStore'] = None
+        for name, tensor in self.columns().items():
+            #  Pinned memory makes copies to the GPU asynchronous, shared memory lets other processes push and sample.
+            if pin_memory:
+                tensor = tensor.pin_memory()
+            if share_memory:
+                tensor = tensor.share_memory_()
+            setattr(self, name, tensor)
+
+    def columns(self) -> Dict[str, torch.Tensor]:
+        return {name: tensor for name, tensor in vars(self).items() if name.endswith("_tensor")}
 
     def push(self, transition: Transition):
         """Saves a transition."""
-        if len(self.memory) < self.capacity:
-            self.memory.append(None)
-        self.memory[self.position] = transition
+        self.write(transition)
+        if self.store is not None:
+            self.store.push(transition)
+
+    def push_batch(self, batch: TransitionBatch):
+        """Saves a batch of transitions, as returned by sample or gather."""
+        self.load_batch(batch)
+        if self.store is not None:
+            self.store.push_batch(batch)
+
+    def write(self, transition: Transition):
+        """Saves a transition without passing it on to the store."""
+        position = self.position
+        self.player_tensor[position] = transition.state.player_tensor
+        self.cards_tensor[position] = transition.state.cards_tensor
+        self.valid_player_actions_tensor[position] = transition.valid_actions.player_action_tensor
+        self.valid_card_actions_tensor[position] = transition.valid_actions.card_action_tensor
+        self.action_tensor[position] = transition.action
+        self.action_prob_tensor[position] = transition.action_prob
+        self.next_player_tensor[position] = transition.next_state.player_tensor
+        self.next_cards_tensor[position] = transition.next_state.cards_tensor
+        self.reward_tensor[position] = transition.reward
+        self.is_terminal_tensor[position] = transition.is_terminal
+        self.size = min(self.size + 1, self.capacity)
         self.position = (self.position + 1) % self.capacity
 
-    def sample(self, batch_size):
-        return random.sample(self.memory, batch_size)
+    def load_batch(self, batch: TransitionBatch):
+        """Saves a batch of transitions without passing them on to the store."""
+        batch_size = len(batch.action)
+        positions = (self.position + torch.arange(batch_size)) % self.capacity
+        self.player_tensor[positions] = batch.state.player_tensor
+        self.cards_tensor[positions] = batch.state.cards_tensor
+        self.valid_player_actions_tensor[positions] = batch.valid_actions.player_action_tensor
+        self.valid_card_actions_tensor[positions] = batch.valid_actions.card_action_tensor
+        self.action_tensor[positions] = batch.action
+        self.action_prob_tensor[positions] = batch.action_prob
+        self.next_player_tensor[positions] = batch.next_state.player_tensor
+        self.next_cards_tensor[positions] = batch.next_state.cards_tensor
+        self.reward_tensor[positions] = batch.reward
+        self.is_terminal_tensor[positions] = batch.is_terminal
+        self.size = min(self.size + batch_size, self.capacity)
+        self.position = (self.position + batch_size) % self.capacity
+
+    def sample(self, batch_size) -> TransitionBatch:
+        indices = torch.tensor(random.sample(range(self.size), batch_size))
+        return self.gather(indices)
+
+    def gather(self, indices: torch.Tensor) -> TransitionBatch:
+        return TransitionBatch(StateBatch(self.player_tensor[indices], self.cards_tensor[indices]),
+                               EncodedActionSet(self.valid_player_actions_tensor[indices],
+                                                self.valid_card_actions_tensor[indices]),
+                               self.action_tensor[indices],
+                               self.action_prob_tensor[indices],
+                               StateBatch(self.next_player_tensor[indices], self.next_cards_tensor[indices]),
+                               self.reward_tensor[indices],
+                               self.is_terminal_tensor[indices])
 
     def clear(self):
-        self.memory.clear()
+        self.size = 0
         self.position = 0
 
+    def normalizer_state_dict(self) -> Dict:
+        #  What a checkpoint needs to normalize the transitions collected after it the same way, see save_checkpoint
+        return {}
+
+    def load_normalizer_state_dict(self, state_dict: Dict):
+        pass
+
     def __len__(self):
-        return len(self.memory)
+        return self.size
 
 
 class NormalizingReplayBuffer(ReplayBuffer):
-
+    """
+    Normalizes the observations of the transitions it saves. The store still receives them as they were collected,
+    so loading them back through load_batch normalizes them again from the same statistics.
+    """
     def __init__(self, capacity, gamma, player_encoding, cards_encoding):
-        super().__init__(capacity)
+        super().__init__(capacity, player_encoding, cards_encoding)
         self.player_normalizer = PPONormalizer(gamma, player_encoding.size())
         self.cards_normalizer = PPONormalizer(gamma, cards_encoding.size())
 
-    def push(self, transition: Transition):
-        super().push(Transition(state=State(self.player_normalizer.normalize(transition.state.player_tensor),
+    def write(self, transition: Transition):
+        super().write(Transition(state=State(self.player_normalizer.normalize(transition.state.player_tensor),
                                       self.cards_normalizer.normalize(transition.state.cards_tensor)),
                                 valid_actions=transition.valid_actions,
                                 action=transition.action,
@@ -58,6 +151,26 @@ class NormalizingReplayBuffer(ReplayBuffer):
                                 is_terminal=transition.is_terminal
                                 ))
 
+    def load_batch(self, batch: TransitionBatch):
+        #  The normalizers are updated one transition at a time
+        for index in range(len(batch.action)):
+            self.write(Transition(state=State(batch.state.player_tensor[index], batch.state.cards_tensor[index]),
+                                 valid_actions=EncodedActionSet(batch.valid_actions.player_action_tensor[index],
+                                                                batch.valid_actions.card_action_tensor[index]),
+                                 action=int(batch.action[index]),
+                                 action_prob=float(batch.action_prob[index]),
+                                 next_state=State(batch.next_state.player_tensor[index],
+                                                  batch.next_state.cards_tensor[index]),
+                                 reward=float(batch.reward[index]),
+                                 is_terminal=bool(batch.is_terminal[index])))
+
+    def normalizer_state_dict(self) -> Dict:
+        return {"player": self.player_normalizer.state_dict(), "cards": self.cards_normalizer.state_dict()}
+
+    def load_normalizer_state_dict(self, state_dict: Dict):
+        self.player_normalizer.load_state_dict(state_dict["player"])
+        self.cards_normalizer.load_state_dict(state_dict["cards"])
+
 
 class SurveiledPytorchBot(PytorchBot):
     def __init__(self, net: nn.Module, replay_buffer: ReplayBuffer):
@@ -68,19 +181,21 @@ class SurveiledPytorchBot(PytorchBot):
         self.last_action_prob: Optional[float] = None
         self.last_valid_actions: Optional[EncodedActionSet] = None
 
-    def buy_phase_action(self, player: 'Player') -> Action:
-        policy = self.policy(player)
+    def choose_action(self, player: 'Player', policy: torch.Tensor, state: State,
+                      valid_actions: EncodedActionSet) -> Action:
         probs = torch.exp(policy[0])
         action_index = Categorical(probs).sample()
         action = get_indexed_action(int(action_index))
         if not action.valid(player):
             logger.debug("No! Bad Citizen!")
         else:
-            new_state = encode_player(player)
+            #  The rows the policy was computed from, there is no need to encode the player again
+            new_state = State(state.player_tensor[0], state.cards_tensor[0])
             if self.last_state is not None:
                 self.remember_result(new_state, 0, False)
-            self.last_state = encode_player(player)
-            self.last_valid_actions = encode_valid_actions(player)
+            self.last_state = new_state
+            self.last_valid_actions = EncodedActionSet(valid_actions.player_action_tensor[0],
+                                                       valid_actions.card_action_tensor[0])
             self.last_action = int(action_index)
             self.last_action_prob = float(policy[0][action_index])
         return action
@@ -88,6 +203,14 @@ class SurveiledPytorchBot(PytorchBot):
     def game_over(self, player: 'Player', ranking: int):
         if self.last_state is not None:
             self.remember_result(encode_player(player), 3.5 - ranking, True)
+        #  The bot may be handed to another game, whose first transition must not link back to this one
+        self.last_state = None
+
+    def reset(self):
+        self.last_state = None
+        self.last_action = None
+        self.last_action_prob = None
+        self.last_valid_actions = None
 
     def remember_result(self, new_state, reward, is_terminal):
         self.replay_buffer.push(Transition(self.last_state, self.last_valid_actions,
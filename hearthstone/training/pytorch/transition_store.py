@@ -0,0 +1,224 @@
+import json
+import os
+import random
+import typing
+from typing import Tuple
+
+import numpy as np
+import torch
+from torch import nn, optim
+
+from hearthstone.training.pytorch.hearthstone_state_encoder import Transition, TransitionBatch, StateBatch, \
+    EncodedActionSet, Feature, ALL_ACTIONS, DEFAULT_PLAYER_ENCODING, DEFAULT_CARDS_ENCODING
+
+if typing.TYPE_CHECKING:
+    from hearthstone.training.pytorch.replay_buffer import ReplayBuffer
+
+#  A transition store is a file of fixed size binary records, one per transition, that only ever grows at the end.
+#  Next to it a json file records the layout, so a store is never read back with an encoding of a different size,
+#  and a checkpoint records the state of the training run that collects into it.
+
+
+def record_dtype(player_encoding: Feature, cards_encoding: Feature) -> np.dtype:
+    player_size = tuple(player_encoding.size())
+    cards_size = tuple(cards_encoding.size())
+    card_actions_size = (len(ALL_ACTIONS.card_action_set), len(ALL_ACTIONS.card_action_set[0]))
+    return np.dtype([
+        ('player', np.float32, player_size),
+        ('cards', np.float32, cards_size),
+        ('valid_player_actions', np.bool_, (len(ALL_ACTIONS.player_action_set),)),
+        ('valid_card_actions', np.bool_, card_actions_size),
+        ('action', np.int64),
+        ('action_prob', np.float32),
+        ('next_player', np.float32, player_size),
+        ('next_cards', np.float32, cards_size),
+        ('reward', np.float32),
+        ('is_terminal', np.bool_),
+    ])
+
+
+def layout_path(path: str) -> str:
+    return path + ".layout.json"
+
+
+def check_layout(path: str, dtype: np.dtype):
+    layout = {name: list(dtype.fields[name][0].shape) for name in dtype.names}
+    if os.path.exists(layout_path(path)):
+        with open(layout_path(path)) as f:
+            stored_layout = json.load(f)
+        assert stored_layout == layout, f"{path} was written with the layout {stored_layout}, not {layout}"
+    else:
+        with open(layout_path(path), "w") as f:
+            json.dump(layout, f)
+
+
+class TransitionStore:
+    """
+    Appends transitions to a file on disk. Has the push interface of a ReplayBuffer, so a SurveiledPytorchBot can
+    collect straight into it.
+    """
+    def __init__(self, path: str, player_encoding: Feature = DEFAULT_PLAYER_ENCODING,
+                 cards_encoding: Feature = DEFAULT_CARDS_ENCODING):
+        self.path = path
+        self.dtype = record_dtype(player_encoding, cards_encoding)
+        check_layout(path, self.dtype)
+        #  A crash can leave half a record at the end, which is dropped so appends stay aligned.
+        num_records = os.path.getsize(path) // self.dtype.itemsize if os.path.exists(path) else 0
+        self.file = open(path, "ab")
+        self.file.truncate(num_records * self.dtype.itemsize)
+        self.num_records = num_records
+        self.record = np.zeros(1, dtype=self.dtype)
+
+    def push(self, transition: Transition):
+        record = self.record[0]
+        record['player'] = transition.state.player_tensor.numpy()
+        record['cards'] = transition.state.cards_tensor.numpy()
+        record['valid_player_actions'] = transition.valid_actions.player_action_tensor.numpy()
+        record['valid_card_actions'] = transition.valid_actions.card_action_tensor.numpy()
+        record['action'] = transition.action
+        record['action_prob'] = transition.action_prob
+        record['next_player'] = transition.next_state.player_tensor.numpy()
+        record['next_cards'] = transition.next_state.cards_tensor.numpy()
+        record['reward'] = transition.reward
+        record['is_terminal'] = transition.is_terminal
+        self.file.write(self.record.tobytes())
+        self.num_records += 1
+
+    def push_batch(self, batch: TransitionBatch):
+        records = np.zeros(len(batch.action), dtype=self.dtype)
+        records['player'] = batch.state.player_tensor.numpy()
+        records['cards'] = batch.state.cards_tensor.numpy()
+        records['valid_player_actions'] = batch.valid_actions.player_action_tensor.numpy()
+        records['valid_card_actions'] = batch.valid_actions.card_action_tensor.numpy()
+        records['action'] = batch.action.numpy()
+        records['action_prob'] = batch.action_prob.numpy()
+        records['next_player'] = batch.next_state.player_tensor.numpy()
+        records['next_cards'] = batch.next_state.cards_tensor.numpy()
+        records['reward'] = batch.reward.numpy()
+        records['is_terminal'] = batch.is_terminal.numpy()
+        self.file.write(records.tobytes())
+        self.num_records += len(records)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __len__(self):
+        return self.num_records
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class TransitionStoreReader:
+    """
+    Samples minibatches from a transition store through a memory mapping, so only the sampled records are read.
+    Call refresh() to see records appended since the store was opened.
+    """
+    def __init__(self, path: str, player_encoding: Feature = DEFAULT_PLAYER_ENCODING,
+                 cards_encoding: Feature = DEFAULT_CARDS_ENCODING):
+        self.path = path
+        self.dtype = record_dtype(player_encoding, cards_encoding)
+        check_layout(path, self.dtype)
+        self.records = None
+        self.refresh()
+
+    def refresh(self):
+        num_records = os.path.getsize(self.path) // self.dtype.itemsize if os.path.exists(self.path) else 0
+        if num_records:
+            self.records = np.memmap(self.path, dtype=self.dtype, mode='r', shape=(num_records,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+    def sample(self, batch_size) -> TransitionBatch:
+        #  Reading the records in file order keeps the reads sequential
+        indices = np.sort(np.array(random.sample(range(len(self.records)), batch_size), dtype=np.int64))
+        return self.gather(indices)
+
+    def newest(self, num_records: int) -> TransitionBatch:
+        #  The last num_records records, oldest first
+        return self.gather(np.arange(len(self.records) - num_records, len(self.records)))
+
+    def gather(self, indices: np.ndarray) -> TransitionBatch:
+        records = self.records[indices]
+
+        def column(name: str) -> torch.Tensor:
+            return torch.from_numpy(np.ascontiguousarray(records[name]))
+
+        return TransitionBatch(StateBatch(column('player'), column('cards')),
+                               EncodedActionSet(column('valid_player_actions'), column('valid_card_actions')),
+                               column('action'),
+                               column('action_prob'),
+                               StateBatch(column('next_player'), column('next_cards')),
+                               column('reward'),
+                               column('is_terminal'))
+
+    def __len__(self):
+        return len(self.records)
+
+
+def checkpoint_path(path: str) -> str:
+    return path + ".checkpoint.pt"
+
+
+def resume_transition_store(path: str, replay_buffer: 'ReplayBuffer', first_record: int = 0) -> TransitionStore:
+    """
+    Opens the transition store at path for a run that keeps collecting into it. The replay buffer is refilled with
+    the newest transitions stored from first_record on, and from then on appends everything pushed to it to the store.
+    """
+    reader = TransitionStoreReader(path)
+    num_records = min(max(len(reader) - first_record, 0), replay_buffer.capacity)
+    if num_records:
+        replay_buffer.load_batch(reader.newest(num_records))
+    store = TransitionStore(path)
+    replay_buffer.store = store
+    return store
+
+
+def save_checkpoint(store: TransitionStore, learning_net: nn.Module, optimizer: optim.Optimizer, global_step: int,
+                    replay_buffer: 'ReplayBuffer'):
+    """
+    Saves the state of a run next to its transition store. Call it once the run has learned from every transition
+    in the store.
+    """
+    store.flush()
+    checkpoint = {
+        "net": learning_net.state_dict(),
+        "optimizer": optimizer.state_dict(),
+        "global_step": global_step,
+        "num_records": len(store),
+        "normalizers": replay_buffer.normalizer_state_dict(),
+    }
+    #  Replacing the old checkpoint in one rename means a crash never leaves half of one behind
+    temporary_path = checkpoint_path(store.path) + ".tmp"
+    torch.save(checkpoint, temporary_path)
+    os.replace(temporary_path, checkpoint_path(store.path))
+
+
+def resume_run(path: str, learning_net: nn.Module, optimizer: optim.Optimizer,
+               replay_buffer: 'ReplayBuffer') -> Tuple[TransitionStore, int]:
+    """
+    Opens the transition store at path and restores the run collecting into it from its last checkpoint: the net,
+    the optimizer and the normalizers, and in the replay buffer the transitions collected since. Those were collected
+    by the checkpointed net, so their action probabilities still match the policy being trained.
+
+    Without a checkpoint a new run starts, and is checkpointed straight away. Transitions already in the store were
+    collected by some other net and are not loaded.
+
+    Returns: The store and the global step to carry on from
+    """
+    if not os.path.exists(checkpoint_path(path)):
+        store = TransitionStore(path)
+        replay_buffer.store = store
+        save_checkpoint(store, learning_net, optimizer, 0, replay_buffer)
+        return store, 0
+    checkpoint = torch.load(checkpoint_path(path))
+    learning_net.load_state_dict(checkpoint["net"])
+    optimizer.load_state_dict(checkpoint["optimizer"])
+    replay_buffer.load_normalizer_state_dict(checkpoint["normalizers"])
+    return resume_transition_store(path, replay_buffer, checkpoint["num_records"]), checkpoint["global_step"]
@@ -1,11 +1,16 @@
 import unittest
 
+from hearthstone.board_description import describe_board, build_player, describe_war_party
 from hearthstone.card_pool import *
 from hearthstone.cards import Card
-from hearthstone.combat import WarParty, fight_boards
+from hearthstone.combat import WarParty, fight_boards, resolve_combat, combat_damage
+from hearthstone.combat_cache import CombatCache
+from hearthstone.combat_simulator import simulate_combat, simulate_trials
+from hearthstone.events import CombatPhaseContext, EVENTS
 from hearthstone.hero_pool import *
+from hearthstone.parallel_combat import ParallelCombatSimulator
 from hearthstone.player import Player
-from hearthstone.randomizer import DefaultRandomizer
+from hearthstone.randomizer import DefaultRandomizer, SeededRandomizer
 
 
 class CombatTests(unittest.TestCase):
@@ -559,5 +564,116 @@ class CombatTests(unittest.TestCase):
         self.assertEqual(ethan.health, 40)
         self.assertEqual(len(adams_war_party.board), 4)
 
+    def test_simulate_combat(self):
+        adam = Player.new_player_with_hero(None, "Adam")
+        ethan = Player.new_player_with_hero(None, "Ethan")
+        adam.in_play = [KaboomBot(), SelflessHero(), DragonspawnLieutenant()]
+        ethan.in_play = [RatPack(), ScavengingHyena(), MurlocTidecaller()]
+        odds = simulate_combat(adam, ethan, 200, seed=1)
+        self.assertEqual(adam.health, 40)
+        self.assertEqual(ethan.health, 40)
+        self.assertEqual(odds.num_trials, 200)
+        self.assertAlmostEqual(odds.win_probability + odds.tie_probability + odds.loss_probability, 1.0)
+        self.assertAlmostEqual(sum(odds.damage_distribution().values()), 1.0)
+        self.assertEqual(odds.damage_counts, simulate_combat(adam, ethan, 200, seed=1).damage_counts)
+        split_odds = simulate_trials(adam, ethan, range(0, 50), seed=1) + simulate_trials(adam, ethan, range(50, 200), seed=1)
+        self.assertEqual(odds.damage_counts, split_odds.damage_counts)
+
+    def test_simulate_combat_one_sided(self):
+        adam = Player.new_player_with_hero(None, "Adam")
+        ethan = Player.new_player_with_hero(None, "Ethan")
+        adam.in_play = [MamaBear()]
+        odds = simulate_combat(adam, ethan, 20)
+        self.assertEqual(odds.win_probability, 1.0)
+        self.assertEqual(odds.damage_distribution(), {MamaBear.tier + adam.tavern_tier: 1.0})
+        self.assertEqual(adam.in_play[0].health, MamaBear.base_health)
+
+    def test_board_description_round_trip(self):
+        adam = Player.new_player_with_hero(None, "Adam", Nefarian())
+        adam.tavern_tier = 4
+        adam.in_play = [KaboomBot(), ReplicatingMenace(), SelflessHero()]
+        adam.in_play[0].golden = True
+        adam.in_play[0].deathrattles.append(ReplicatingMenace.base_deathrattle)
+        description = describe_board(adam)
+        rebuilt = build_player(description)
+        self.assertEqual(description, describe_board(rebuilt))
+        self.assertEqual(type(rebuilt.hero), Nefarian)
+        self.assertEqual(rebuilt.tavern_tier, 4)
+
+    def test_parallel_simulate_combat(self):
+        adam = Player.new_player_with_hero(None, "Adam")
+        ethan = Player.new_player_with_hero(None, "Ethan")
+        adam.in_play = [KaboomBot(), ScavengingHyena(), MicroMachine()]
+        ethan.in_play = [RighteousProtector(), AlleyCat(), RedWhelp()]
+        serial = simulate_combat(adam, ethan, 200, seed=3)
+        with ParallelCombatSimulator(max_workers=2, batch_size=30) as simulator:
+            parallel = simulator.simulate_combat(adam, ethan, 200, seed=3)
+        self.assertEqual(serial.damage_counts, parallel.damage_counts)
+
+    def test_listener_index_matches_full_broadcast(self):
+        class FullBroadcastWarParty(WarParty):
+            def listeners(self, event):
+                return self.board.copy()
+
+        def fight(war_party_type, seed):
+            adam = Player.new_player_with_hero(None, "Adam", Deathwing())
+            ethan = Player.new_player_with_hero(None, "Ethan")
+            adam.in_play = [ScavengingHyena(), KaboomBot(), SoulJuggler(), ImpGangBoss(), RatPack(), MurlocWarleader(), OldMurkeye()]
+            ethan.in_play = [SelflessHero(), BolvarFireblood(), SecurityRover(), DeflectOBot(), ReplicatingMenace(), RedWhelp(), SouthseaCaptain()]
+            adams_war_party = war_party_type(adam)
+            ethans_war_party = war_party_type(ethan)
+            resolve_combat(adams_war_party, ethans_war_party, SeededRandomizer(seed))
+            boards = [[(type(card), card.attack, card.health, card.dead) for card in war_party.board]
+                      for war_party in (adams_war_party, ethans_war_party)]
+            return boards, combat_damage(adams_war_party, ethans_war_party)
+
+        for seed in range(20):
+            self.assertEqual(fight(WarParty, seed), fight(FullBroadcastWarParty, seed))
+
+    def test_combat_context_pair(self):
+        adam = Player.new_player_with_hero(None, "Adam")
+        ethan = Player.new_player_with_hero(None, "Ethan")
+        context = CombatPhaseContext(WarParty(adam), WarParty(ethan), DefaultRandomizer())
+        enemy_context = context.enemy_context()
+        self.assertIs(enemy_context, context.enemy_context())
+        self.assertIs(enemy_context.enemy_context(), context)
+        self.assertIs(enemy_context.friendly_war_party, context.enemy_war_party)
+        context.broadcast_card_event(None, EVENTS.COMBAT_START)
+        enemy_context.broadcast_card_event(None, EVENTS.COMBAT_START)
+        self.assertEqual(len(context.event_pool), 1)
+
+    def test_clone_for_combat(self):
+        card = KaboomBot()
+        card.golden = True
+        card.magnetic_transformation(ReplicatingMenace())
+        clone = card.clone_for_combat()
+        self.assertIs(type(clone), KaboomBot)
+        for attribute in KaboomBot.instance_slots:
+            self.assertEqual(getattr(clone, attribute), getattr(card, attribute), attribute)
+        clone.deathrattles.append(ReplicatingMenace.base_deathrattle)
+        self.assertEqual(card.deathrattles, [KaboomBot.base_deathrattle])
+
+    def test_combat_cache(self):
+        adam = Player.new_player_with_hero(None, "Adam")
+        ethan = Player.new_player_with_hero(None, "Ethan")
+        adam.in_play = [KaboomBot(), ScavengingHyena()]
+        ethan.in_play = [RighteousProtector(), AlleyCat()]
+        self.assertEqual(describe_war_party(WarParty(adam)), describe_board(adam))
+        cache = CombatCache(max_size=1)
+        odds = cache.simulate_combat(adam, ethan, 50)
+        self.assertEqual(odds.damage_counts, simulate_combat(adam, ethan, 50).damage_counts)
+        ethan_twin = Player.new_player_with_hero(None, "Ethan's twin")
+        ethan_twin.in_play = [RighteousProtector(), AlleyCat()]
+        odds.damage_counts[100] += 1
+        cached_odds = cache.simulate_combat(adam, ethan_twin, 50)
+        self.assertIsNot(cached_odds, odds)
+        self.assertEqual(cached_odds.damage_counts, simulate_combat(adam, ethan, 50).damage_counts)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.simulate_combat(adam, ethan, 50, seed=1)
+        self.assertEqual(len(cache), 1)
+        cache.simulate_combat(adam, ethan, 50)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        self.assertEqual(cache.hit_rate, 0.25)
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,12 +1,37 @@
+import functools
 import operator
+import os
+import tempfile
+import threading
 import unittest
 from functools import reduce
 
 import torch
 from torch.distributions import Categorical
 
+from hearthstone.battlebots.random_bot import RandomBot
+from hearthstone.host import RoundRobinHost, BatchedHost
+from hearthstone.ladder.ladder import Contestant
+from hearthstone.randomizer import SeededRandomizer
 from hearthstone.tavern import Tavern
-from hearthstone.training.pytorch.hearthstone_state_encoder import encode_player, encode_valid_actions
+from hearthstone.training.pytorch.collectors import CollectorPool, Worker
+from hearthstone.training.pytorch.feedforward_net import HearthstoneFFNet
+from hearthstone.training.pytorch.inference_server import InferenceServer
+from hearthstone.training.pytorch.hearthstone_state_encoder import EncodedActionSet, encode_player, encode_players, encode_valid_actions, \
+    DEFAULT_PLAYER_ENCODING, DEFAULT_CARDS_ENCODING, COMPILED_PLAYER_ENCODING, COMPILED_CARDS_ENCODING, ActionMaskTracker, \
+    MAX_ENCODED_STORE, ALL_ACTIONS, ListOfFeatures, ScalarFeature, SortedByValueFeature
+from hearthstone.training.pytorch.pytorch_bot import PytorchBot
+from hearthstone.training.pytorch.replay_buffer import ReplayBuffer, SurveiledPytorchBot, NormalizingReplayBuffer
+from hearthstone.training.pytorch.transition_store import TransitionStore, TransitionStoreReader, \
+    resume_transition_store, resume_run, save_checkpoint
+
+
+def small_net():
+    return HearthstoneFFNet(DEFAULT_PLAYER_ENCODING, DEFAULT_CARDS_ENCODING, hidden_layers=0)
+
+
+def random_bot_contestants():
+    return [Contestant(f"RandomBot {i}", functools.partial(RandomBot, i)) for i in range(7)]
 
 
 class PytorchTests(unittest.TestCase):
@@ -26,6 +51,280 @@ class PytorchTests(unittest.TestCase):
         player_1_valid_actions = encode_valid_actions(player_1)
         print(player_1_valid_actions)
 
+    def test_encode_players(self):
+        host = RoundRobinHost({f"random_bot_{i}": RandomBot(i) for i in range(8)}, SeededRandomizer(3))
+        host.start_game()
+        for _ in range(4):
+            host.play_round()
+            players = list(host.tavern.players.values())
+            batch = encode_players(players)
+            single = [encode_player(player) for player in players]
+            self.assertTrue(torch.equal(batch.player_tensor, torch.stack([state.player_tensor for state in single])))
+            self.assertTrue(torch.equal(batch.cards_tensor, torch.stack([state.cards_tensor for state in single])))
+
+    def test_compiled_encoding(self):
+        host = RoundRobinHost({f"random_bot_{i}": RandomBot(i) for i in range(8)}, SeededRandomizer(5))
+        host.start_game()
+        for _ in range(4):
+            host.play_round()
+        self.assertEqual(COMPILED_CARDS_ENCODING.size, DEFAULT_CARDS_ENCODING.size())
+        for player in host.tavern.players.values():
+            self.assertTrue(torch.equal(COMPILED_PLAYER_ENCODING.encode(player), DEFAULT_PLAYER_ENCODING.encode(player)))
+            self.assertTrue(torch.equal(COMPILED_CARDS_ENCODING.encode(player), DEFAULT_CARDS_ENCODING.encode(player)))
+
+        #  Lists longer than their width must not spill into the next row of a batch
+        for feature in (ListOfFeatures(lambda values: values, ScalarFeature(float), 2),
+                        SortedByValueFeature(lambda values: values, 2)):
+            with self.assertRaises(AssertionError):
+                feature.compile().encode_batch([[1, 2, 3], []])
+
+    def test_action_mask_tracker(self):
+        class MaskingRandomBot(RandomBot):
+            def buy_phase_action(self, player):
+                encode_valid_actions(player)
+                return super().buy_phase_action(player)
+
+        ActionMaskTracker.check_consistency = True
+        try:
+            for seed in range(3):
+                host = RoundRobinHost({f"random_bot_{i}": MaskingRandomBot(i) for i in range(8)}, SeededRandomizer(seed))
+                host.play_game()
+        finally:
+            ActionMaskTracker.check_consistency = False
+
+    def test_batched_host_forward_passes(self):
+        net = small_net()
+        batch_sizes = []
+        net.register_forward_hook(lambda module, inputs, outputs: batch_sizes.append(outputs[0].size(0)))
+        hosts = [RoundRobinHost({"pytorch_bot_1": PytorchBot(net), "pytorch_bot_2": PytorchBot(net)}) for _ in range(4)]
+        batched_host = BatchedHost(hosts)
+        for _ in range(10):
+            batched_host.step()
+        self.assertEqual(batch_sizes, [4] * 10)
+
+    def test_replay_buffer(self):
+        net = small_net()
+        replay_buffer = ReplayBuffer(16)
+        transitions = []
+        replay_buffer.push = transitions.append
+        host = RoundRobinHost({"learning_bot": SurveiledPytorchBot(net, replay_buffer), "random_bot": RandomBot(1)},
+                              SeededRandomizer(4))
+        host.play_game()
+        del replay_buffer.push
+        for transition in transitions:
+            replay_buffer.push(transition)
+        self.assertEqual(len(replay_buffer), min(len(transitions), 16))
+        #  Once full, the oldest transitions are overwritten first
+        kept = transitions[-16:]
+        batch = replay_buffer.gather(torch.tensor([(len(transitions) - len(kept) + i) % 16 for i in range(len(kept))]))
+        for i, transition in enumerate(kept):
+            self.assertTrue(torch.equal(batch.state.cards_tensor[i], transition.state.cards_tensor))
+            self.assertTrue(torch.equal(batch.next_state.player_tensor[i], transition.next_state.player_tensor))
+            self.assertTrue(torch.equal(batch.valid_actions.card_action_tensor[i], transition.valid_actions.card_action_tensor))
+            self.assertEqual(int(batch.action[i]), transition.action)
+            self.assertAlmostEqual(float(batch.action_prob[i]), transition.action_prob, places=6)
+            self.assertEqual(float(batch.reward[i]), transition.reward)
+            self.assertEqual(bool(batch.is_terminal[i]), transition.is_terminal)
+        self.assertEqual(replay_buffer.sample(8).state.cards_tensor.size(), (8,) + DEFAULT_CARDS_ENCODING.size())
+
+    def test_transition_store(self):
+        net = small_net()
+
+        class TeeBuffer:
+            def __init__(self, *buffers):
+                self.buffers = buffers
+
+            def push(self, transition):
+                for buffer in self.buffers:
+                    buffer.push(transition)
+
+        def play_game(store):
+            #  Returns what the game pushed to the store, in a replay buffer
+            replay_buffer = ReplayBuffer(1000)
+            host = RoundRobinHost({"learning_bot": SurveiledPytorchBot(net, TeeBuffer(replay_buffer, store)),
+                                   "random_bot": RandomBot(1)}, SeededRandomizer(4))
+            host.play_game()
+            return replay_buffer
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "transitions")
+            with TransitionStore(path) as store:
+                first_game = play_game(store)
+            #  Reopening appends after the records already there, as when resuming a run
+            with TransitionStore(path) as store:
+                second_game = play_game(store)
+            reader = TransitionStoreReader(path)
+            self.assertEqual(len(reader), len(first_game) + len(second_game))
+            for start, replay_buffer in ((0, first_game), (len(first_game), second_game)):
+                indices = list(range(len(replay_buffer)))
+                expected = replay_buffer.gather(torch.tensor(indices))
+                stored = reader.gather([start + index for index in indices])
+                self.assertTrue(torch.equal(stored.state.cards_tensor, expected.state.cards_tensor))
+                self.assertTrue(torch.equal(stored.next_state.player_tensor, expected.next_state.player_tensor))
+                self.assertTrue(torch.equal(stored.valid_actions.card_action_tensor, expected.valid_actions.card_action_tensor))
+                self.assertTrue(torch.equal(stored.action, expected.action))
+                self.assertTrue(torch.equal(stored.reward, expected.reward))
+                self.assertTrue(torch.equal(stored.is_terminal, expected.is_terminal))
+            self.assertEqual(reader.sample(8).state.player_tensor.size(), (8,) + DEFAULT_PLAYER_ENCODING.size())
+
+    def test_resume_transition_store(self):
+        net = small_net()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "transitions")
+            replay_buffer = ReplayBuffer(1000)
+            with resume_transition_store(path, replay_buffer):
+                self.assertEqual(len(replay_buffer), 0)
+                host = RoundRobinHost({"learning_bot": SurveiledPytorchBot(net, replay_buffer),
+                                       "random_bot": RandomBot(1)}, SeededRandomizer(4))
+                host.play_game()
+                replay_buffer.push_batch(replay_buffer.gather(torch.arange(4)))
+            num_stored = len(replay_buffer)
+            self.assertEqual(len(TransitionStoreReader(path)), num_stored)
+            #  A resumed run starts from the newest transitions that fit in its replay buffer
+            resumed_buffer = ReplayBuffer(num_stored - 1)
+            with resume_transition_store(path, resumed_buffer) as store:
+                self.assertEqual(len(resumed_buffer), num_stored - 1)
+                self.assertEqual(len(store), num_stored)
+                expected = replay_buffer.gather(torch.arange(1, num_stored))
+                resumed = resumed_buffer.gather(torch.arange(num_stored - 1))
+                self.assertTrue(torch.equal(resumed.state.cards_tensor, expected.state.cards_tensor))
+                self.assertTrue(torch.equal(resumed.action, expected.action))
+
+    def test_resume_run(self):
+        def new_run():
+            net = small_net()
+            return net, torch.optim.Adam(net.parameters()), NormalizingReplayBuffer(
+                1000, 0.99, DEFAULT_PLAYER_ENCODING, DEFAULT_CARDS_ENCODING)
+
+        def play_game(net, replay_buffer, seed):
+            host = RoundRobinHost({"learning_bot": SurveiledPytorchBot(net, replay_buffer), "random_bot": RandomBot(1)},
+                                  SeededRandomizer(seed))
+            host.play_game()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "transitions")
+            net, optimizer, replay_buffer = new_run()
+            store, global_step = resume_run(path, net, optimizer, replay_buffer)
+            self.assertEqual(global_step, 0)
+            play_game(net, replay_buffer, 4)
+            batch = replay_buffer.sample(8)
+            policy, value = net(batch.state, batch.valid_actions)
+            (value.pow(2).mean() - policy.mean()).backward()
+            optimizer.step()
+            replay_buffer.clear()
+            save_checkpoint(store, net, optimizer, 1, replay_buffer)
+            #  Collected after the checkpoint and never learned from, then the run stops without checkpointing again
+            play_game(net, replay_buffer, 5)
+            store.close()
+
+            resumed_net, resumed_optimizer, resumed_buffer = new_run()
+            store, global_step = resume_run(path, resumed_net, resumed_optimizer, resumed_buffer)
+            with store:
+                self.assertEqual(global_step, 1)
+                for parameter, resumed_parameter in zip(net.parameters(), resumed_net.parameters()):
+                    self.assertTrue(torch.equal(parameter, resumed_parameter))
+                self.assertTrue(torch.equal(optimizer.state_dict()["state"][0]["exp_avg"],
+                                            resumed_optimizer.state_dict()["state"][0]["exp_avg"]))
+                #  The store holds the transitions as collected, so they are normalized again exactly as they were
+                self.assertEqual(len(resumed_buffer), len(replay_buffer))
+                expected = replay_buffer.gather(torch.arange(len(replay_buffer)))
+                resumed = resumed_buffer.gather(torch.arange(len(resumed_buffer)))
+                self.assertTrue(torch.equal(resumed.state.player_tensor, expected.state.player_tensor))
+                self.assertTrue(torch.equal(resumed.next_state.cards_tensor, expected.next_state.cards_tensor))
+                self.assertTrue(torch.equal(resumed.action_prob, expected.action_prob))
+                self.assertEqual(resumed_buffer.player_normalizer.welford_aggregator.count,
+                                 replay_buffer.player_normalizer.welford_aggregator.count)
+
+    def test_overfull_store(self):
+        #  Ysera adds a dragon to a full store, which is one more card than the encoding has slots for
+        tavern = Tavern()
+        player = tavern.add_player_with_hero("Dante_Kong")
+        tavern.add_player_with_hero("brian")
+        tavern.buying_step()
+        while len(player.store) <= MAX_ENCODED_STORE:
+            player.store.append(tavern.deck.draw(player))
+        state = encode_player(player)
+        self.assertTrue(torch.equal(encode_players([player]).cards_tensor[0], state.cards_tensor))
+        self.assertTrue(torch.equal(DEFAULT_CARDS_ENCODING.encode(player), state.cards_tensor))
+        player.store.pop()
+        self.assertTrue(torch.equal(encode_player(player).cards_tensor, state.cards_tensor))
+        ActionMaskTracker.check_consistency = True
+        try:
+            self.assertEqual(encode_valid_actions(player).card_action_tensor.size(0), len(ALL_ACTIONS.card_action_set))
+        finally:
+            ActionMaskTracker.check_consistency = False
+
+    def test_collector_pool(self):
+        net = small_net()
+        learning_bot_contestant = Contestant("LearningBot", None)
+        contestants = {contestant.name: contestant for contestant in random_bot_contestants()}
+        contestants[learning_bot_contestant.name] = learning_bot_contestant
+        replay_buffer = ReplayBuffer(10000)
+        games = 0
+        with CollectorPool(small_net, random_bot_contestants, learning_bot_contestant.name, 2, 1, chunk_size=8,
+                           max_queued_messages=4) as pool:
+            pool.start(net)
+            while games < 2:
+                games += pool.drain(replay_buffer, contestants)
+            with torch.no_grad():
+                for parameter in net.parameters():
+                    parameter.add_(1.0)
+            pool.publish(net)
+            for name, parameter in pool.shared_net.state_dict().items():
+                self.assertTrue(torch.equal(parameter, net.state_dict()[name]))
+        self.assertGreaterEqual(len(replay_buffer), 8)
+        self.assertEqual(len(replay_buffer) % 8, 0)
+        self.assertEqual(learning_bot_contestant.games_played, games)
+        self.assertEqual(sum(contestant.games_played for contestant in contestants.values()), 8 * games)
+
+    def test_dead_collector(self):
+        #  With no opponents to sample, collectors fail as they start their games
+        with CollectorPool(small_net, list, "LearningBot", 1, 1) as pool:
+            pool.start(small_net())
+            with self.assertRaisesRegex(RuntimeError, "collector 0"):
+                for _ in range(30):
+                    pool.drain(ReplayBuffer(8), {}, timeout=1.0)
+
+    def test_worker_leaves_ratings_to_caller(self):
+        contestants = random_bot_contestants()
+        learning_bot_contestant = Contestant("LearningBot", functools.partial(RandomBot, 7))
+        worker = Worker(learning_bot_contestant, contestants, 1)
+        results = []
+        while not results:
+            results = worker.play_step()
+        self.assertEqual(len(results[0]), 8)
+        for contestant in [learning_bot_contestant] + contestants:
+            self.assertEqual(contestant.games_played, 0)
+            self.assertEqual(contestant.elo, 1200)
+
+    def test_inference_server(self):
+        net = small_net()
+        host = RoundRobinHost({f"random_bot_{i}": RandomBot(i) for i in range(8)}, SeededRandomizer(6))
+        host.start_game()
+        host.play_round()
+        players = list(host.tavern.players.values())[:4]
+        states = [encode_players([player]) for player in players]
+        valid_actions = [encode_valid_actions(player) for player in players]
+        results = [None] * len(players)
+        with InferenceServer(net, max_batch_size=len(players), max_wait_secs=10.0) as server:
+            def request(index):
+                results[index] = server(states[index], EncodedActionSet(valid_actions[index].player_action_tensor.unsqueeze(0),
+                                                                       valid_actions[index].card_action_tensor.unsqueeze(0)))
+            threads = [threading.Thread(target=request, args=(index,)) for index in range(len(players))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        server.stop()
+        self.assertEqual(server.num_batches, 1)
+        self.assertEqual(server.mean_batch_size(), len(players))
+        for index in range(len(players)):
+            with torch.no_grad():
+                policy, value = net(states[index], EncodedActionSet(valid_actions[index].player_action_tensor.unsqueeze(0),
+                                                                   valid_actions[index].card_action_tensor.unsqueeze(0)))
+            self.assertTrue(torch.allclose(results[index][0], policy))
+            self.assertTrue(torch.allclose(results[index][1], value))
+
     def test_get_stacked(self):
         tensor1 = torch.tensor([1,2,5,6])
         tensor2 = torch.tensor([5,6,83,7])
@@ -1,11 +1,24 @@
+import copy
+import functools
+import io
+import itertools
+import json
+import os
+import tempfile
 import unittest
+from collections import Counter
 from typing import List, Tuple, Type
 
+from hearthstone.battlebots.mcts_bot import MCTSBot
+from hearthstone.battlebots.random_bot import RandomBot
 from hearthstone.card_pool import *
-from hearthstone.cards import Card, CardType, PrintingPress
+from hearthstone.cards import Card, CardType, PrintingPress, TierView, CountedTierView
+from hearthstone.game_log import GameLogWriter, ReplayHost
 from hearthstone.hero_pool import *
+from hearthstone.host import RoundRobinHost, BatchedHost
+from hearthstone.ladder.ladder import Contestant, run_parallel_tournament, AgentPool
 from hearthstone.player import StoreIndex, HandIndex, BoardIndex
-from hearthstone.randomizer import DefaultRandomizer
+from hearthstone.randomizer import DefaultRandomizer, SeededRandomizer
 from hearthstone.tavern import Tavern
 
 
@@ -33,6 +46,10 @@ class RepeatedCardForcer(DefaultRandomizer):
         return force_card(cards, next_card_type)
 
 
+def random_bot_contestants():
+    return [Contestant(f"RandomBot {i}", functools.partial(RandomBot, i)) for i in range(10)]
+
+
 class CardTests(unittest.TestCase):
     def assertCardListEquals(self, cards, expected, msg=None):
         self.assertListEqual([type(card) for card in cards], expected, msg=msg)
@@ -42,6 +59,237 @@ class CardTests(unittest.TestCase):
         self.assertGreater(len(default_cardlist), 20)
         print(f"the length of the default cardlist is {len(default_cardlist)}.")
 
+    def test_cardlist_draw_remove_return(self):
+        tavern = Tavern()
+        player = tavern.add_player_with_hero("Dante_Kong")
+        deck = tavern.deck
+        size = len(deck)
+        valid_cards = TierView(deck.cards_by_tier, 2)
+        self.assertEqual(list(valid_cards), deck.cards_of_tier(1) + deck.cards_of_tier(2))
+        self.assertIs(valid_cards[-1], deck.cards_by_tier[2][-1])
+        drawn = [deck.draw(player) for _ in range(20)]
+        self.assertTrue(all(card.tier == 1 for card in drawn))
+        deck.remove_card(deck.cards_by_tier[3][0])
+        self.assertEqual(len(deck), size - 21)
+        deck.return_cards(drawn)
+        self.assertEqual(len(deck), size - 1)
+        for card, index in deck.positions.items():
+            self.assertIs(deck.cards_by_tier[card.tier][index], card)
+        golden = AlleyCat()
+        golden.golden_transformation([AlleyCat(), AlleyCat()])
+        self.assertEqual(len(set(golden.dissolve())), 3)
+
+    def test_counted_cardlist(self):
+        tavern = Tavern(deck=PrintingPress.make_counted_cards())
+        deck = tavern.deck
+        player = tavern.add_player_with_hero("Dante_Kong")
+        self.assertEqual(len(deck), len(PrintingPress.make_cards()))
+        size = len(deck)
+        valid_cards = CountedTierView(deck, 1)
+        self.assertCardListEquals(list(valid_cards), [type(card) for card in deck.cards_of_tier(1)])
+        drawn = [deck.draw(player) for _ in range(18)]
+        self.assertTrue(all(card.tier == 1 for card in drawn))
+        self.assertEqual(len(deck), size - 18)
+        deck.return_cards(itertools.chain.from_iterable(card.dissolve() for card in drawn))
+        self.assertEqual(len(deck), size)
+        self.assertEqual(deck.counts, PrintingPress.card_counts())
+
+    def test_non_golden_counts(self):
+        tavern = Tavern()
+        player = tavern.add_player_with_hero("Dante_Kong")
+        player.hand.append(AlleyCat())
+        player.in_play = [AlleyCat(), TabbyCat()]
+        player.in_play.insert(0, MechaRoo())
+        self.assertEqual(player.count_non_golden(AlleyCat), 2)
+        self.assertEqual(player.count_non_golden(MechaRoo), 1)
+        player.in_play[0] = AlleyCat()
+        del player.in_play[-1]
+        self.assertEqual((player.count_non_golden(AlleyCat), player.count_non_golden(MechaRoo),
+                          player.count_non_golden(TabbyCat)), (3, 0, 0))
+        player.check_golden(AlleyCat)
+        self.assertEqual(player.count_non_golden(AlleyCat), 0)
+        self.assertCardListEquals(player.hand, [AlleyCat])
+        self.assertTrue(player.hand[0].golden)
+        player.hand.pop()
+        self.assertEqual(+player.non_golden_counts, Counter())
+
+    def test_slotted_cards(self):
+        for card_type in PrintingPress.cards:
+            self.assertFalse(hasattr(card_type(), "__dict__"), card_type.__name__)
+        mech = MechanoEgg()
+        mech.magnetic_transformation(ReplicatingMenace())
+        self.assertCardListEquals(mech.dissolve(), [MechanoEgg, ReplicatingMenace])
+        self.assertCardListEquals(MechanoEgg().dissolve(), [MechanoEgg])
+        gambler = FreedealingGambler()
+        self.assertEqual(gambler.redeem_rate, 3)
+        gambler.golden_transformation([FreedealingGambler(), FreedealingGambler()])
+        self.assertEqual(gambler.redeem_rate, 6)
+
+    def test_seeded_game_is_reproducible(self):
+        def play_game(seed: int):
+            host = RoundRobinHost({f"random_bot_{i}": RandomBot(i) for i in range(4)}, SeededRandomizer(seed))
+            host.play_game()
+            return [(name, player.health, type(player.hero)) for name, player in host.tavern.losers]
+
+        self.assertEqual(play_game(3), play_game(3))
+
+    def test_seeded_randomizer_drops_finished_rounds(self):
+        host = RoundRobinHost({f"random_bot_{i}": RandomBot(i) for i in range(4)}, SeededRandomizer(3))
+        host.start_game()
+        for _ in range(6):
+            host.play_round()
+        randomizer = host.tavern.randomizer
+        self.assertTrue(all(keys[-1] == randomizer.round_number for keys in randomizer.streams if keys))
+        self.assertLessEqual(len(randomizer.streams), 1 + len(host.tavern.players) + 1)
+
+    def test_tavern_fork(self):
+        def new_host(seed: int) -> RoundRobinHost:
+            return RoundRobinHost({f"random_bot_{i}": RandomBot(i) for i in range(4)}, SeededRandomizer(seed))
+
+        def final_state(host: RoundRobinHost):
+            return [(name, player.health, type(player.hero), [(type(card), card.attack, card.health)
+                                                              for card in player.in_play])
+                    for name, player in host.tavern.losers]
+
+        unforked_host = new_host(3)
+        unforked_host.play_game()
+        host = new_host(3)
+        host.start_game()
+        for _ in range(4):
+            host.play_round()
+        snapshot = host.tavern.snapshot()
+        snapshot_turn_count = host.tavern.turn_count
+        forked_host = copy.copy(host)
+        forked_host.tavern = host.tavern.fork()
+        forked_host.agents = copy.deepcopy(host.agents)
+        for player in forked_host.tavern.players.values():
+            self.assertIs(player.tavern, forked_host.tavern)
+        while not host.game_over():
+            host.play_round()
+        while not forked_host.game_over():
+            forked_host.play_round()
+        self.assertEqual(final_state(unforked_host), final_state(host))
+        self.assertEqual(final_state(unforked_host), final_state(forked_host))
+        host.tavern.restore(snapshot)
+        self.assertEqual(host.tavern.turn_count, snapshot_turn_count)
+        self.assertTrue(all(player.tavern is host.tavern for player in host.tavern.players.values()))
+
+        player = host.tavern.players["random_bot_0"]
+        player.in_play = [AlleyCat()]
+        player.hand = [copy.copy(DefenderOfArgus())]
+        player.summon_from_hand(HandIndex(0))
+        self.assertEqual((player.in_play[0].attack, player.in_play[0].taunt), (2, True))
+
+    def test_mcts_bot(self):
+        def new_host(seed: int) -> RoundRobinHost:
+            agents = {"mcts_bot": MCTSBot(seed, time_budget_secs=None, max_iterations=8)}
+            agents.update({f"random_bot_{i}": RandomBot(i) for i in range(3)})
+            return RoundRobinHost(agents, SeededRandomizer(seed))
+
+        host = new_host(6)
+        host.start_game()
+        host.tavern.buying_step()
+        player = host.tavern.players["mcts_bot"]
+        before = (player.coins, [type(card) for card in player.store], len(host.tavern.deck))
+        action = host.agents["mcts_bot"].buy_phase_action(player)
+        self.assertTrue(action.valid(player))
+        self.assertEqual(before, (player.coins, [type(card) for card in player.store], len(host.tavern.deck)))
+        self.assertFalse(host.tavern.deck.shared)
+
+        host = new_host(6)
+        host.play_game()
+        self.assertTrue(host.game_over())
+
+    def test_parallel_mcts_bot(self):
+        host = RoundRobinHost({f"random_bot_{i}": RandomBot(i) for i in range(4)}, SeededRandomizer(6))
+        host.start_game()
+        host.tavern.buying_step()
+        player = host.tavern.players["random_bot_0"]
+        before = (player.coins, [type(card) for card in player.store], len(host.tavern.deck))
+        actions = []
+        for _ in range(2):
+            bot = MCTSBot(6, time_budget_secs=None, max_iterations=8, num_processes=2)
+            try:
+                action = bot.buy_phase_action(player)
+            finally:
+                bot.shutdown()
+            self.assertTrue(action.valid(player))
+            actions.append(repr(action))
+        self.assertEqual(actions[0], actions[1])
+        self.assertEqual(before, (player.coins, [type(card) for card in player.store], len(host.tavern.deck)))
+
+    def test_batched_host(self):
+        def new_host(seed: int) -> RoundRobinHost:
+            return RoundRobinHost({f"random_bot_{i}": RandomBot(i) for i in range(4)}, SeededRandomizer(seed))
+
+        def final_state(host: RoundRobinHost):
+            return [(name, player.health, type(player.hero)) for name, player in host.tavern.losers]
+
+        batched_hosts = [new_host(seed) for seed in range(3)]
+        BatchedHost(batched_hosts).play_games()
+        for seed, batched_host in enumerate(batched_hosts):
+            host = new_host(seed)
+            host.play_game()
+            self.assertEqual(final_state(host), final_state(batched_host))
+
+    def test_parallel_tournament(self):
+        def ratings(contestants):
+            return [(c.name, c.elo, c.trueskill.mu, c.trueskill.sigma, c.games_played) for c in contestants]
+
+        serial_contestants = random_bot_contestants()
+        run_parallel_tournament(serial_contestants, random_bot_contestants, 6, max_workers=1, seed=3)
+        parallel_contestants = random_bot_contestants()
+        with tempfile.TemporaryDirectory() as directory:
+            standings_path = os.path.join(directory, "standings.json")
+            run_parallel_tournament(parallel_contestants, random_bot_contestants, 6, max_workers=3, seed=3,
+                                    standings_path=standings_path, checkpoint_every=2)
+            with open(standings_path) as f:
+                standings = dict(json.load(f))
+        self.assertEqual(ratings(serial_contestants), ratings(parallel_contestants))
+        self.assertEqual(sum(c.games_played for c in parallel_contestants), 6 * 8)
+        self.assertEqual(standings["RandomBot 0"]["games_played"], parallel_contestants[0].games_played)
+
+    def test_agent_pool(self):
+        contestants = random_bot_contestants()
+        self.assertEqual([c.agent_generator().local_random.random() for c in contestants[:2]],
+                         [RandomBot(i).local_random.random() for i in range(2)])
+        pool = AgentPool(contestants[0].agent_generator)
+        first = pool.acquire()
+        second = pool.acquire()
+        self.assertIsNot(first, second)
+        expected = first.local_random.random()
+        pool.release(first)
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(first.local_random.random(), expected)
+        pool.prewarm(2)
+        self.assertEqual(len(pool.idle_agents), 2)
+
+    def test_replay_game_log(self):
+        def final_state(host: RoundRobinHost):
+            return [(name, player.health, type(player.hero), [type(card) for card in player.in_play])
+                    for name, player in host.tavern.losers]
+
+        log = io.StringIO()
+        host = RoundRobinHost({f"random_bot_{i}": RandomBot(i) for i in range(4)}, SeededRandomizer(2),
+                              GameLogWriter(log))
+        host.play_game()
+        replay_host = ReplayHost(log.getvalue().splitlines())
+        replay_host.play_game()
+        self.assertEqual(final_state(host), final_state(replay_host))
+
+    def test_seeded_randomizer_fork(self):
+        randomizer = SeededRandomizer(5)
+        cards = list(range(20))
+        randomizer.select_draw_card(cards, "lucy", 1)
+        randomizer.select_hero(cards)
+        forked = randomizer.fork()
+        self.assertEqual([randomizer.select_draw_card(cards, "lucy", 1) for _ in range(5)],
+                         [forked.select_draw_card(cards, "lucy", 1) for _ in range(5)])
+        self.assertEqual(randomizer.select_hero(cards), forked.select_hero(cards))
+        spawned = randomizer.spawn("game", 0)
+        self.assertEqual(spawned.seed, randomizer.spawn("game", 0).seed)
+        self.assertNotEqual(spawned.seed, randomizer.spawn("game", 1).seed)
+
     def test_draw(self):
         tavern = Tavern()
         player_1 = tavern.add_player_with_hero("Dante_Kong")
@@ -1162,6 +1410,20 @@ class CardTests(unittest.TestCase):
             self.assertEqual(player_1.store[i].attack, player_1.store[i].base_attack)
             self.assertEqual(player_1.store[i].health, player_1.store[i].base_health)
 
+    def test_dancin_deryl_empty_store(self):
+        tavern = Tavern()
+        player_1 = tavern.add_player_with_hero("Dante_Kong", DancinDeryl())
+        player_2 = tavern.add_player_with_hero("lucy")
+        tavern.buying_step()
+        player_1.purchase(StoreIndex(0))
+        player_1.summon_from_hand(HandIndex(0))
+        tavern.deck.return_cards(player_1.store)
+        player_1.store.clear()
+        num_cards_in_play = len(player_1.in_play)
+        player_1.sell_board_minion(BoardIndex(0))
+        self.assertEqual(len(player_1.in_play), num_cards_in_play - 1)
+        self.assertEqual(player_1.store, [])
+
     class TestFungalmancerFlurglRandomizer(DefaultRandomizer):
         def select_draw_card(self, cards: List['Card'], player_name: str, round_number: int) -> 'Card':
             return force_card(cards, MurlocTidecaller)